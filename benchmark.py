@@ -0,0 +1,276 @@
+"""
+Per-stage benchmark suite for the detection pipeline.
+
+Runs headless against synthetic frames, short video clips and synthetic
+landmark arrays, and reports p50/p95/p99 latency and throughput for every
+stage of the live loop plus the whole loop end to end. Results are written
+as JSON so two commits can be compared:
+
+    python benchmark.py --output bench_results.json
+    python benchmark.py --compare bench_results.json   # fails on regressions
+
+Video clips are read from --clips (default: data/clips). When the directory
+has no clips a short synthetic clip is generated in a temp directory, so the
+suite also runs on a fresh checkout.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from src.pretrained_detector import PretrainedSignDetector
+from src.utils import GestureManager
+from src.renderer import OverlayRenderer
+
+CLIP_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+def measure(name, fn, iterations, warmup=5, items_per_call=1):
+    """
+    Time fn(i) for i in range(iterations) and summarize the latencies.
+
+    Args:
+        name: stage name used in the report
+        fn: callable taking the iteration index
+        iterations: number of timed calls
+        warmup: untimed calls made first
+        items_per_call: frames processed per call (for batch stages)
+    """
+    for i in range(warmup):
+        fn(i)
+    times = np.empty(iterations, dtype=np.float64)
+    perf_counter = time.perf_counter
+    for i in range(iterations):
+        start = perf_counter()
+        fn(i)
+        times[i] = perf_counter() - start
+
+    total = times.sum()
+    p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1000.0
+    return {
+        "stage": name,
+        "iterations": iterations,
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(times.mean() * 1000.0), 4),
+        "throughput_per_s": round(iterations * items_per_call / total, 1) if total > 0 else None,
+    }
+
+
+def synthetic_frames(width, height, count=8, seed=0):
+    """Noise frames with a bright moving blob, so frames differ from each other."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(count):
+        img = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+        cx = int(width * (0.3 + 0.4 * i / max(1, count - 1)))
+        cv2.circle(img, (cx, height // 2), height // 6, (180, 200, 230), -1)
+        frames.append(img)
+    return frames
+
+
+def synthetic_landmarks(count, seed=0):
+    """Random (count, 21, 3) landmark arrays in normalized image coordinates."""
+    rng = np.random.default_rng(seed)
+    return rng.random((count, 21, 3)).astype(np.float32)
+
+
+def fake_results(landmarks):
+    """A MediaPipe-like results object holding one hand, for timing get_landmarks."""
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+        hand = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z in landmarks:
+            hand.landmark.add(x=float(x), y=float(y), z=float(z))
+    except ImportError:
+        hand = SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z))
+                                         for x, y, z in landmarks])
+    return SimpleNamespace(multi_hand_landmarks=[hand], multi_handedness=None)
+
+
+def load_clips(clip_dir, width, height, max_frames=90):
+    """Decode up to max_frames of every clip; generate a synthetic clip if none exist."""
+    paths = sorted(p for p in glob.glob(os.path.join(clip_dir, "*"))
+                   if p.lower().endswith(CLIP_EXTENSIONS))
+    if not paths:
+        path = os.path.join(tempfile.mkdtemp(prefix="signtowords_bench_"), "synthetic.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (width, height))
+        for frame in synthetic_frames(width, height, count=max_frames, seed=1):
+            writer.write(frame)
+        writer.release()
+        paths = [path]
+
+    clips = {}
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        frames = []
+        while len(frames) < max_frames:
+            success, img = cap.read()
+            if not success:
+                break
+            frames.append(img)
+        cap.release()
+        if frames:
+            clips[os.path.basename(path)] = frames
+    return clips
+
+
+def run_suite(width=640, height=480, iterations=200, clip_dir="data/clips", window=(1280, 720)):
+    results = []
+    frames = synthetic_frames(width, height)
+    n_frames = len(frames)
+    landmark_sets = synthetic_landmarks(1024)
+    landmark_lists = [lms.tolist() for lms in landmark_sets]
+
+    detector = PretrainedSignDetector()
+    manager = GestureManager()
+
+    # --- Frame stages ---
+    results.append(measure("flip", lambda i: cv2.flip(frames[i % n_frames], 1), iterations))
+    results.append(measure("cvtColor", lambda i: cv2.cvtColor(frames[i % n_frames], cv2.COLOR_BGR2RGB),
+                           iterations))
+    results.append(measure("find_hands", lambda i: detector.find_hands(frames[i % n_frames], draw=False),
+                           iterations))
+
+    for name, clip in load_clips(clip_dir, width, height).items():
+        results.append(measure(f"find_hands[{name}]",
+                               lambda i, clip=clip: detector.find_hands(clip[i % len(clip)], draw=False),
+                               min(iterations, len(clip)), warmup=1))
+
+    # --- Landmark stages ---
+    fake = [fake_results(lms) for lms in landmark_lists[:64]]
+
+    def get_landmarks(i):
+        detector.results = fake[i % len(fake)]
+        detector.get_landmarks()
+
+    results.append(measure("get_landmarks", get_landmarks, iterations * 10))
+    results.append(measure("recognize_gesture",
+                           lambda i: PretrainedSignDetector.recognize_gesture(landmark_lists[i % 1024]),
+                           iterations * 10))
+    results.append(measure("recognize_gestures_batch[1024]",
+                           lambda i: PretrainedSignDetector.recognize_gestures_batch(landmark_sets),
+                           iterations, items_per_call=len(landmark_sets)))
+
+    labels = list(PretrainedSignDetector.recognize_gestures_batch(landmark_sets))
+    labels = [label if i % 50 < 40 else None for i, label in enumerate(labels)]
+    results.append(measure("GestureManager.update", lambda i: manager.update(labels[i % 1024]),
+                           iterations * 10))
+
+    # --- Rendering stages ---
+    display = [f.copy() for f in frames]
+    sentence = ["Hello", "Thank You", "Good"]
+    renderer = OverlayRenderer()
+    results.append(measure("overlay",
+                           lambda i: renderer.draw_overlay(display[i % n_frames], "Hello", sentence, "FPS: 30"),
+                           iterations))
+    results.append(measure("letterbox", lambda i: renderer.letterbox(display[i % n_frames], *window),
+                           iterations))
+
+    # --- End to end (everything run_app does per frame except imshow/waitKey) ---
+    e2e_manager = GestureManager()
+
+    def end_to_end(i):
+        img = cv2.flip(frames[i % n_frames], 1)
+        display_img = detector.find_hands(img)
+        landmarks = detector.get_landmarks(img)
+        prediction = PretrainedSignDetector.recognize_gesture(landmarks) if landmarks else None
+        stabilized = e2e_manager.update(prediction)
+        e2e_manager.get_final_word(stabilized)
+        e2e_manager.should_finalize_sentence()
+        renderer.draw_overlay(display_img, stabilized, e2e_manager.sentence, "FPS: 30")
+        renderer.letterbox(display_img, *window)
+
+    results.append(measure("end_to_end", end_to_end, iterations))
+    return results
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    try:
+        import mediapipe
+        mp_version = mediapipe.__version__
+    except Exception:
+        mp_version = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "mediapipe": mp_version,
+    }
+
+
+def print_table(results):
+    print(f"{'stage':<34}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'per s':>14}")
+    print("-" * 78)
+    for r in results:
+        print(f"{r['stage']:<34}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['throughput_per_s'] or 0:>14,.0f}")
+
+
+def compare(results, baseline_path, threshold):
+    """Print p50 deltas against a previous run; return the stages that regressed."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["stage"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\nComparison with {baseline_path} (p50, regression threshold {threshold:.0%}):")
+    for r in results:
+        old = baseline.get(r["stage"])
+        if not old or not old["p50_ms"]:
+            continue
+        change = (r["p50_ms"] - old["p50_ms"]) / old["p50_ms"]
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"  {r['stage']:<34}{old['p50_ms']:>10.3f} -> {r['p50_ms']:>10.3f} ({change:+.1%}){flag}")
+        if flag:
+            regressions.append(r["stage"])
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the SignToWords pipeline stages")
+    parser.add_argument("--resolution", default="640x480", help="synthetic frame size WxH")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per frame stage")
+    parser.add_argument("--clips", default=os.path.join("data", "clips"), help="directory of video clips")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", metavar="BASELINE", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative p50 slowdown counted as a regression")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.resolution.lower().split("x"))
+    results = run_suite(width, height, args.iterations, args.clips)
+    print()
+    print_table(results)
+
+    # Compare before writing, in case the baseline and the output are the same file
+    regressions = compare(results, args.compare, args.threshold) if args.compare else []
+
+    report = {"environment": environment_info(),
+              "config": {"resolution": [width, height], "iterations": args.iterations},
+              "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} stage(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
@@ -63,17 +63,29 @@ try:
 except Exception as e:
     print(f"✗ Detector Initialization Error: {e}")
 
-# 4. Camera Presence Check (Index 0)
+# 4. Camera Presence Check (first few indices, or the source given as an argument:
+#    python diagnostic.py clip.mp4 | frames/ | frames.npy | synthetic)
 print("\nChecking Camera Hardware...")
-cap = cv2.VideoCapture(0)
-if cap.isOpened():
+from src.sources import open_frame_source
+
+sources = [sys.argv[1]] if len(sys.argv) > 1 else [0, 1, 2, 3]
+for source in sources:
+    cap = open_frame_source(source, prefetch=0)
+    if not cap.isOpened():
+        print(f"✗ Source {source} not found")
+        continue
     ret, frame = cap.read()
-    if ret:
-        print("✓ Camera index 0 connected and sending frames")
-    else:
-        print("? Camera 0 found but failed to read frame (might be in use by another app)")
+    if not ret:
+        print(f"? Source {source} found but failed to read frame (might be in use by another app)")
+        cap.release()
+        continue
+    start = time.perf_counter()
+    frames = 1
+    while frames < 30 and cap.read(frame)[0]:
+        frames += 1
+    elapsed = time.perf_counter() - start
+    print(f"✓ Source {source} sending {frame.shape[1]}x{frame.shape[0]} frames "
+          f"({(frames - 1) / elapsed if elapsed > 0 else 0:.0f} fps read)")
     cap.release()
-else:
-    print("✗ Camera index 0 not found")
 
 print("\n--- DIAGNOSTIC COMPLETE ---")
@@ -1,6 +1,7 @@
 
 import { useEffect, useRef, useState, useCallback } from 'react';
 import { recognizeGesture } from '../utils/gestureLogic';
+import { SIGN_SERVICE_URL, createSignServiceClient } from '../utils/signService';
 
 /* 
   NOTE: We are using the MediaPipe scripts loaded in index.html via CDN 
@@ -22,6 +23,7 @@ export const useSignLanguage = (videoRef, canvasRef) => {
     const cooldownSeconds = 1.2;
     const silenceThreshold = 40;
     const frameCount = useRef(0);
+    const service = useRef(null);
 
     const speak = (text) => {
         if ('speechSynthesis' in window) {
@@ -33,6 +35,28 @@ export const useSignLanguage = (videoRef, canvasRef) => {
         }
     };
 
+    // With the landmark service configured, classification and stabilization
+    // run on the server with the same rules and constants as the desktop app
+    useEffect(() => {
+        if (!SIGN_SERVICE_URL) return;
+        service.current = createSignServiceClient(SIGN_SERVICE_URL, (reply) => {
+            if (reply.error) return;
+            setGesture(reply.stabilized);
+            // A completed sentence is spoken whole (speak() would cut off the word)
+            if (reply.completed) {
+                speak(reply.completed);
+            } else if (reply.word) {
+                speak(reply.word);
+            }
+            // The server's sentence is the source of truth; only re-render when it changed
+            setSentence(prev => (prev.join(' ') === reply.sentence.join(' ') ? prev : reply.sentence));
+        });
+        return () => {
+            service.current.close();
+            service.current = null;
+        };
+    }, []);
+
     const processResults = useCallback((results) => {
         if (loading) setLoading(false);
         frameCount.current++;
@@ -67,6 +91,11 @@ export const useSignLanguage = (videoRef, canvasRef) => {
             }
 
             const landmarks = results.multiHandLandmarks[0];
+            if (service.current) {
+                service.current.sendFrame(landmarks);
+                canvasCtx.restore();
+                return;
+            }
             const currentPrediction = recognizeGesture(landmarks);
 
             if (currentPrediction) {
@@ -92,6 +121,8 @@ export const useSignLanguage = (videoRef, canvasRef) => {
                     }
                 }
             }
+        } else if (service.current) {
+            service.current.sendFrame(null);
         } else {
             setGesture(null);
             silenceCounter.current++;
@@ -178,6 +209,7 @@ export const useSignLanguage = (videoRef, canvasRef) => {
     const clearSentence = () => {
         setSentence([]);
         lastWord.current = null;
+        if (service.current) service.current.reset();
     };
 
     return {
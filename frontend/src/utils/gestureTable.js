@@ -0,0 +1,43 @@
+// Generated from data/gesture_spec.json by `python -m src.gesture_spec`. Do not edit.
+
+export const LABELS = [null, "OK", "I Love You", "Peace", "Stop", "One", "Two", "Three", "Four", "Hello", "Good", "Yes", "Help", "Thank You"];
+
+// Bit i of a predicate mask is PREDICATES[i]
+export const PREDICATES = [{"type": "distance_below", "a": 4, "b": 8, "value": 0.05, "doc": "thumb tip touches the index tip", "name": "pinch"}, {"type": "above", "a": 9, "b": 0, "doc": "middle finger base is above the wrist", "name": "palm_up"}];
+
+// Indexed by finger mask (bit 0 = thumb ... bit 4 = pinky; comments read thumb..pinky):
+// [default label code, [[label code, required predicates, forbidden predicates], ...]]
+export const TABLE = [
+  [11, []],  // 00000
+  [10, []],  // 10000
+  [5, []],  // 01000
+  [5, []],  // 11000
+  [0, []],  // 00100
+  [0, []],  // 10100
+  [3, []],  // 01100
+  [6, [[1, 1, 0]]],  // 11100
+  [0, []],  // 00010
+  [0, []],  // 10010
+  [0, []],  // 01010
+  [0, [[1, 1, 0]]],  // 11010
+  [0, []],  // 00110
+  [0, [[1, 1, 0]]],  // 10110
+  [7, [[1, 1, 0]]],  // 01110
+  [13, [[1, 1, 0]]],  // 11110
+  [0, []],  // 00001
+  [0, []],  // 10001
+  [0, []],  // 01001
+  [2, [[1, 1, 0]]],  // 11001
+  [0, []],  // 00101
+  [0, [[1, 1, 0]]],  // 10101
+  [0, [[1, 1, 0]]],  // 01101
+  [13, [[1, 1, 0]]],  // 11101
+  [0, []],  // 00011
+  [0, [[1, 1, 0]]],  // 10011
+  [0, [[1, 1, 0]]],  // 01011
+  [13, [[1, 1, 0]]],  // 11011
+  [12, [[1, 1, 0]]],  // 00111
+  [12, [[1, 1, 0]]],  // 10111
+  [8, [[1, 1, 0]]],  // 01111
+  [9, [[1, 1, 0], [4, 2, 0]]],  // 11111
+];
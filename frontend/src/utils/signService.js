@@ -0,0 +1,57 @@
+/*
+  Client for the Python landmark service (serve_landmarks.py).
+
+  Sends each frame's hand landmarks over a WebSocket; the server classifies
+  them and keeps the stabilizer / cooldown / sentence state, so the browser
+  behaves exactly like the desktop app. Enable it by setting
+  VITE_SIGN_SERVICE_URL, e.g. ws://localhost:8765/ws
+*/
+
+export const SIGN_SERVICE_URL = import.meta.env.VITE_SIGN_SERVICE_URL || null;
+
+export const createSignServiceClient = (url, onReply) => {
+    let socket = null;
+    let seq = 0;
+    let sessionId = sessionStorage.getItem('signServiceSession');
+    let closed = false;
+
+    const connect = () => {
+        const target = sessionId ? `${url}?session=${encodeURIComponent(sessionId)}` : url;
+        socket = new WebSocket(target);
+        socket.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+            if (message.type === 'session') {
+                // Reconnects resume the same server-side sentence
+                sessionId = message.session;
+                sessionStorage.setItem('signServiceSession', sessionId);
+                return;
+            }
+            onReply(message);
+        };
+        socket.onclose = () => {
+            if (!closed) setTimeout(connect, 1000);
+        };
+    };
+
+    connect();
+
+    const send = (payload) => {
+        // Drop frames while (re)connecting instead of queueing stale ones
+        if (socket && socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify(payload));
+        }
+    };
+
+    return {
+        sendFrame: (landmarks) => send({
+            seq: ++seq,
+            t: Date.now() / 1000,
+            landmarks: landmarks ? landmarks.map(p => [p.x, p.y, p.z]) : null,
+        }),
+        reset: () => send({ type: 'reset' }),
+        close: () => {
+            closed = true;
+            if (socket) socket.close();
+        },
+    };
+};
@@ -0,0 +1,215 @@
+"""
+Headless detection loop for servers, CI and benchmarks.
+
+Runs capture, hand tracking, recognition and stabilization with no window,
+no console prompts and no speech unless asked for. Output goes to any
+combination of sinks, each fed from its own thread so a slow one never
+holds up the loop:
+
+    python headless.py --source clip.mp4 --sink stdout
+    python headless.py --source 0 --sink file:words.jsonl --sink voice
+    python headless.py --source clip.mp4 --sink stdout+frames --sink tcp:127.0.0.1:9000
+    python headless.py --source 0 --sink window --sink voice   # like the live app
+    python headless.py --source synthetic:1280x720 --max-frames 600   # no camera needed
+
+Sources are anything src/sources.py opens, decoded ahead on a background
+thread. Sinks: stdout, file:PATH, tcp:HOST:PORT, voice, window. Add "+frames" to
+stdout/file/tcp to also get one event per frame. With no sink, only the
+final summary is printed.
+"""
+import argparse
+import json
+import time
+
+import cv2
+
+from src.buffers import FrameBuffer, read_frame
+from src.metrics import Metrics, MetricsServer
+from src.roi import make_roi
+from src.sinks import parse_sink
+from src.sources import frame_times
+from src.startup import StartupTimeline, start_components
+from src.tracing import WordTracer
+from src.utils import GestureManager, FPS
+
+
+def source_arg(spec):
+    return int(spec) if spec.isdigit() else spec
+
+
+def run_headless(cap, sinks=(), detector=None, manager=None, max_frames=None, flip=True,
+                 recorder=None, metrics=None, scheduler=None, timeline=None, tracer=None, max_seconds=None):
+    """
+    Run the detection loop until the source ends, max_frames or max_seconds
+    is reached or a window sink asks to quit. Returns a summary dict (with the startup
+    timeline, and the per-word latency summary of a WordTracer, when given).
+    """
+    if detector is None:
+        from src.pretrained_detector import PretrainedSignDetector
+        detector = PretrainedSignDetector()
+    manager = manager or GestureManager(tracer=tracer)
+    metrics = metrics or Metrics()
+    sinks = list(sinks)
+    draw = any(s.wants_images for s in sinks)
+    want_frames = any("frame" in s.kinds for s in sinks)
+    fps_counter = FPS()
+    raw, flipped = FrameBuffer(), FrameBuffer()
+    perf_counter = time.perf_counter
+
+    def emit(event):
+        for sink in sinks:
+            sink.emit(event)
+
+    frames = words = sentences = 0
+    started = perf_counter()
+    deadline = None if max_seconds is None else started + max_seconds
+    while max_frames is None or frames < max_frames:
+        t_start = perf_counter()
+        success, img = read_frame(cap, raw)
+        if not success:
+            break
+        if flip:
+            img = cv2.flip(img, 1, dst=flipped.like(img))
+        frames += 1
+        timestamp, t_grabbed = frame_times(cap)
+        t_captured = perf_counter()
+
+        inferred = scheduler is None or scheduler.should_infer(scheduler.frame_motion(img))
+        if inferred:
+            detector.find_hands(img, draw=draw)
+            landmarks = detector.get_landmarks(img)
+        else:
+            if draw:
+                detector.draw_results(img)
+            landmarks = scheduler.skipped_landmarks()
+        t_inferred = perf_counter()
+
+        prediction = detector.recognize_frame(landmarks)
+        if scheduler:
+            if inferred:
+                scheduler.record_inference(landmarks, prediction, t_inferred - t_captured)
+            else:
+                scheduler.record_skip(prediction)
+                metrics.inc("inference_skipped")
+        if recorder:
+            recorder.write(landmarks, timestamp, label=prediction)
+
+        if timeline:
+            timeline.mark("first frame")
+            if prediction:
+                timeline.mark("first recognition")
+
+        stabilized = manager.update(prediction, captured=t_grabbed)
+        word = manager.get_final_word(stabilized)
+        sentence = manager.should_finalize_sentence()
+        t_end = perf_counter()
+
+        if want_frames:
+            emit({"type": "frame", "frame": frames, "t": timestamp, "hand": landmarks is not None,
+                  "prediction": prediction, "stabilized": stabilized, "sentence": list(manager.sentence),
+                  "fps": fps_counter.get_fps(), "image": img if draw else None})
+        if word:
+            words += 1
+            emit({"type": "word", "frame": frames, "t": timestamp, "word": word})
+        if sentence:
+            sentences += 1
+            emit({"type": "sentence", "frame": frames, "t": timestamp, "sentence": sentence})
+
+        metrics.observe("capture", t_captured - t_start)
+        metrics.observe("inference", t_inferred - t_captured)
+        metrics.observe("frame", t_end - t_start)
+        metrics.inc("frames")
+        if any(getattr(s, "quit_requested", False) for s in sinks):
+            break
+        if deadline is not None and t_end > deadline:
+            break
+
+    elapsed = perf_counter() - started
+    summary = {
+        "type": "summary",
+        "frames": frames,
+        "seconds": round(elapsed, 3),
+        "fps": round(frames / elapsed, 1) if elapsed > 0 else 0.0,
+        "words": words,
+        "sentences": sentences,
+        "pending_sentence": " ".join(manager.sentence),
+        "stages": metrics.snapshot()["stages"],
+        "sink_drops": {type(s).__name__: s.dropped for s in sinks},
+    }
+    if hasattr(cap, "stats"):
+        summary["source"] = cap.stats()
+    if scheduler:
+        summary["motion_gating"] = scheduler.stats()
+    if timeline:
+        summary["startup"] = timeline.snapshot()
+    if tracer:
+        summary["word_latency"] = tracer.summary()
+    emit(summary)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run SignToWords without a display")
+    parser.add_argument("--source", default="0",
+                        help="camera index, video file, stream URL, image directory, frames .npy or synthetic[:WxH]")
+    parser.add_argument("--prefetch", type=int, default=4, metavar="N",
+                        help="frames decoded ahead on a background thread (0 to read inline)")
+    parser.add_argument("--sink", action="append", default=[], metavar="SPEC",
+                        help="stdout | file:PATH | tcp:HOST:PORT | voice | window (+frames); repeatable")
+    parser.add_argument("--max-frames", type=int, help="stop after this many frames")
+    parser.add_argument("--no-flip", action="store_true", help="do not mirror the frames")
+    parser.add_argument("--record", metavar="PATH", help="save landmarks to a recording file")
+    parser.add_argument("--label", metavar="NAME", help="with --record, label every hand frame NAME")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT", help="serve live metrics on this port")
+    parser.add_argument("--motion-gating", action="store_true", help="skip tracking on steady frames")
+    parser.add_argument("--classifier", metavar="PATH", help="trained classifier to use instead of the rules")
+    parser.add_argument("--motion", metavar="PATH", help="motion sign templates to recognize as well")
+    parser.add_argument("--roi", type=int, metavar="SIZE", help="track the hand in a crop resized to SIZE pixels")
+    parser.add_argument("--roi-budget-ms", type=float, metavar="MS",
+                        help="like --roi, choosing the crop size from a per-frame latency budget")
+    parser.add_argument("--trace", metavar="PATH", help="trace each word from capture to speech into PATH")
+    args = parser.parse_args()
+
+    metrics = Metrics()
+    timeline = StartupTimeline(metrics)
+    cap, detector, _ = start_components(
+        source_arg(args.source), timeline, prefetch=args.prefetch,
+        detector_kwargs={"classifier": args.classifier, "motion": args.motion,
+                         "roi": make_roi(args.roi, args.roi_budget_ms)})
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open source: {args.source}")
+    # start_components read one frame to start the device; rewind files
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    tracer = WordTracer(metrics, args.trace) if args.trace else None
+    sinks = [parse_sink(spec, tracer=tracer) for spec in args.sink]
+    metrics_server = MetricsServer(metrics, port=args.metrics_port).start() if args.metrics_port else None
+    recorder = None
+    if args.record:
+        from src.recording import LandmarkRecorder
+        recorder = LandmarkRecorder(args.record, fps=cap.get(cv2.CAP_PROP_FPS), labels=detector.labels,
+                                    annotation=args.label)
+    scheduler = None
+    if args.motion_gating:
+        from src.scheduler import MotionGatedScheduler
+        scheduler = MotionGatedScheduler()
+
+    try:
+        summary = run_headless(cap, sinks, detector, max_frames=args.max_frames, flip=not args.no_flip,
+                               recorder=recorder, metrics=metrics, scheduler=scheduler, timeline=timeline,
+                               tracer=tracer)
+    except KeyboardInterrupt:
+        summary = None
+    finally:
+        cap.release()
+        for sink in sinks:
+            sink.close()
+        if recorder:
+            recorder.close()
+        if metrics_server:
+            metrics_server.stop()
+        if tracer:
+            tracer.close()
+
+    if summary and not any(type(s).__name__ == "StdoutSink" for s in sinks):
+        print(json.dumps(summary, indent=2))
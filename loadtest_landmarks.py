@@ -0,0 +1,188 @@
+"""
+Load test for the landmark service with simulated WebSocket clients.
+
+Each client sends landmark frames at a fixed rate (signs held for a second or
+two, with pauses where no hand is visible) and measures the round trip of
+every frame. By default a service is started in a subprocess on a free port:
+
+    python loadtest_landmarks.py --clients 200 --fps 30 --duration 20
+    python loadtest_landmarks.py --connect 127.0.0.1:8765 --clients 50
+    python loadtest_landmarks.py --recording session.lmrec   # replay real landmarks
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+from src import websocket
+
+
+def synthetic_sequence(frames, seed=0):
+    """Landmark frames of held signs separated by pauses (None = no hand)."""
+    rng = np.random.default_rng(seed)
+    sequence = []
+    while len(sequence) < frames:
+        pose = rng.random((21, 3)).astype(np.float32)
+        for _ in range(int(rng.integers(30, 60))):
+            sequence.append((pose + rng.normal(0, 0.003, pose.shape)).round(4).tolist())
+        sequence.extend([None] * int(rng.integers(10, 30)))
+    return sequence[:frames]
+
+
+def recorded_sequence(path):
+    from src.recording import LandmarkReplay
+    replay = LandmarkReplay(path)
+    return [replay.landmarks[i].round(4).tolist() if replay.has_hand[i] else None
+            for i in range(len(replay))]
+
+
+async def run_client(index, host, port, fps, duration, sequence, latencies, stats):
+    try:
+        ws = await websocket.connect(host, port, f"/ws?session=loadtest-{index}")
+    except (OSError, websocket.ConnectionClosed):
+        stats["connect_errors"] += 1
+        return
+    await ws.recv()  # session announcement
+    sent = {}
+    done = asyncio.Event()
+
+    async def receive():
+        try:
+            while True:
+                reply = json.loads(await ws.recv())
+                start = sent.pop(reply.get("seq"), None)
+                if start is not None:
+                    latencies.append(time.perf_counter() - start)
+                if "error" in reply:
+                    stats["errors"] += 1
+                if reply.get("word"):
+                    stats["words"] += 1
+                if done.is_set() and not sent:
+                    return
+        except websocket.ConnectionClosed:
+            pass
+
+    receiver = asyncio.create_task(receive())
+    # Spread client start times so frames do not all arrive in lockstep
+    await asyncio.sleep(np.random.default_rng(index).random() / fps)
+    interval = 1.0 / fps
+    start = next_time = time.perf_counter()
+    seq = 0
+    offset = index * 37
+    while time.perf_counter() - start < duration:
+        seq += 1
+        landmarks = sequence[(offset + seq) % len(sequence)]
+        sent[seq] = time.perf_counter()
+        await ws.send(json.dumps({"seq": seq, "t": next_time, "landmarks": landmarks}))
+        stats["sent"] += 1
+        next_time += interval
+        await asyncio.sleep(max(0.0, next_time - time.perf_counter()))
+    done.set()
+    if not sent:
+        receiver.cancel()
+    try:
+        await asyncio.wait_for(receiver, timeout=5.0)
+    except asyncio.CancelledError:
+        pass
+    except asyncio.TimeoutError:
+        stats["lost"] += len(sent)
+    await ws.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_service(port, budget_ms):
+    process = subprocess.Popen([sys.executable, "serve_landmarks.py", "--port", str(port),
+                                "--latency-budget-ms", str(budget_ms)],
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1).read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("landmark service did not start")
+
+
+def server_metrics(host, port):
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics.json", timeout=5) as response:
+            return json.load(response)
+    except OSError:
+        return None
+
+
+async def load_test(host, port, clients, fps, duration, sequence):
+    latencies = []
+    stats = {"sent": 0, "errors": 0, "lost": 0, "words": 0, "connect_errors": 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(i, host, port, fps, duration, sequence, latencies, stats)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    lat = np.array(latencies) * 1000.0 if latencies else np.zeros(1)
+    return {
+        "clients": clients,
+        "offered_fps": clients * fps,
+        "replies": len(latencies),
+        "throughput_per_s": round(len(latencies) / elapsed, 1),
+        "rtt_p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "rtt_p95_ms": round(float(np.percentile(lat, 95)), 2),
+        "rtt_p99_ms": round(float(np.percentile(lat, 99)), 2),
+        "rtt_max_ms": round(float(lat.max()), 2),
+        **stats,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the landmark service")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--fps", type=float, default=30.0, help="frames per second per client")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of sending")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="existing service (default: start one)")
+    parser.add_argument("--latency-budget-ms", type=float, default=5.0, help="budget for a started service")
+    parser.add_argument("--recording", help="replay landmarks from a .lmrec recording")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    sequence = recorded_sequence(args.recording) if args.recording else synthetic_sequence(3000)
+    process = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        host, port = host or "127.0.0.1", int(port)
+    else:
+        host, port = "127.0.0.1", free_port()
+        process = start_service(port, args.latency_budget_ms)
+
+    try:
+        report = asyncio.run(load_test(host, port, args.clients, args.fps, args.duration, sequence))
+        metrics = server_metrics(host, port)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    if metrics:
+        counters = metrics["counters"]
+        batches = counters.get("service_batches", 0)
+        report["avg_batch_size"] = round(counters.get("service_frames", 0) / batches, 1) if batches else 0
+        report["server_queue"] = metrics["stages"].get("service_queue")
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Report written to {args.output}")
@@ -1,22 +1,75 @@
+import argparse
 import cv2
 import time
-from src.pretrained_detector import PretrainedSignDetector
 from src.voice import VoiceEngine
 from src.utils import GestureManager, FPS
+from src.pipeline import Pipeline
+from src.process_pipeline import ProcessPipeline
+from src.recording import LandmarkRecorder
+from src.metrics import Metrics, MetricsServer
+from src.scheduler import MotionGatedScheduler
+from src.renderer import OverlayRenderer
+from src.roi import make_roi
+from src.tracing import WordTracer
+from src.buffers import FrameBuffer, read_frame
+from src.sources import frame_times
+from src.startup import StartupTimeline, start_components
 
 # --- CONFIGURATION ---
 CONFIDENCE_THRESHOLD = 0.7
+WINDOW_NAME = "SignToWords - AI Sign Language Translator"
 # ---------------------
 
-def run_app():
+def quit_requested():
+    key = cv2.waitKey(1) & 0xFF
+    if key == ord('q') or key == ord('Q'):
+        print("\n" + "=" * 60)
+        print("Shutting down cleanly...")
+        return True
+    return False
+
+def run_app(pipelined=False, record_path=None, metrics_port=None, motion_gating=False, speech_cache=True,
+            classifier_path=None, motion_path=None, roi=None, trace_path=None, source=0, prefetch=4,
+            workers=0, record_label=None):
     """
     Main application using pre-trained gesture recognition.
     No training required - works out of the box!
+
+    Args:
+        pipelined: Run capture and inference on separate threads
+                   (see src/pipeline.py) instead of one sequential loop
+        record_path: If set, save every frame's landmarks and prediction
+                     to this file (see src/recording.py)
+        metrics_port: If set, serve live metrics on http://127.0.0.1:<port>/metrics
+        motion_gating: Skip MediaPipe on steady frames and reuse the last
+                       landmarks (see src/scheduler.py)
+        speech_cache: Speak known words from cached waveforms (see src/tts_cache.py)
+        classifier_path: Trained classifier to use instead of the rule cascade
+                         (see train_classifier.py)
+        motion_path: Motion sign templates recognized next to the static
+                     signs (see src/dynamic_signs.py)
+        roi: Optional HandROI cropping frames around the hand before
+             tracking (see src/roi.py)
+        trace_path: If set, trace every word from capture to speech and
+                    write one record per word to this file (see src/tracing.py)
+        source: Camera index, or any other source spec from src/sources.py
+                (video file, image directory, .npy frames, synthetic)
+        prefetch: Frames read ahead on a background thread (0 reads inline)
+        workers: If set, run hand tracking in this many processes fed
+                 through shared memory (see src/process_pipeline.py);
+                 implies pipelined
+        record_label: Record every hand frame under this label instead of
+                      the prediction, e.g. to collect motion sign templates
     """
-    # Initialize components
-    cap = cv2.VideoCapture(0)
-    
-    # Check if camera opened successfully
+    # Open the camera and build the Hands graph in the background while the
+    # TTS engine is created here (see src/startup.py)
+    metrics = Metrics()
+    timeline = StartupTimeline(metrics)
+    tracer = WordTracer(metrics, trace_path) if trace_path else None
+    cap, detector, voice = start_components(
+        source, timeline, prefetch=prefetch, voice_factory=lambda: VoiceEngine(use_cache=speech_cache, metrics=metrics, tracer=tracer),
+        detector_kwargs={"classifier": classifier_path, "motion": motion_path, "roi": roi})
+
     if not cap.isOpened():
         print("=" * 60)
         print("ERROR: Could not open camera!")
@@ -30,9 +83,9 @@ def run_app():
         print("  • Check Windows Settings → Privacy → Camera")
         print("  • Try unplugging and replugging USB camera")
         print("=" * 60)
-        input("\nPress Enter to exit...")
+        voice.stop()
         return
-    
+
     print("=" * 60)
     print("       SignToWords - Pre-trained Sign Language AI")
     print("=" * 60)
@@ -50,157 +103,253 @@ def run_app():
     print("  • Lower your hand for 2 seconds to finish a sentence")
     print("  • Press 'Q' to exit")
     print("=" * 60)
-    print("\n🚀 Starting in 3 seconds...")
-    time.sleep(3)
-    
-    detector = PretrainedSignDetector()
-    voice = VoiceEngine()
-    manager = GestureManager()  # Using optimized defaults
-    fps_counter = FPS()
-    
+
+    manager = GestureManager(tracer=tracer)  # Using optimized defaults
+    recorder = LandmarkRecorder(record_path, fps=cap.get(cv2.CAP_PROP_FPS),
+                                labels=detector.labels, annotation=record_label) if record_path else None
+
+    metrics.gauge("speech_queue_depth", voice.speech_queue.qsize)
+    metrics_server = MetricsServer(metrics, port=metrics_port).start() if metrics_port else None
+    scheduler = MotionGatedScheduler() if motion_gating else None
+
     # Create a resizable window
-    window_name = "SignToWords - AI Sign Language Translator"
+    window_name = WINDOW_NAME
     cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
     # Ensure window maintains Aspect Ratio when resized
     cv2.setWindowProperty(window_name, cv2.WND_PROP_ASPECT_RATIO, cv2.WINDOW_KEEPRATIO)
     # OPTIONAL: Set a better default size that isn't too small
     cv2.resizeWindow(window_name, 1280, 720)
-    
+
     print("\n✓ Application started! Show your signs...\n")
 
+    if workers:
+        if scheduler:
+            print("Note: motion gating is not available with --workers; tracking every frame")
+        run_pipelined_loop(cap, detector, manager, voice, window_name, recorder, metrics, None, timeline,
+                           workers=workers)
+    elif pipelined:
+        run_pipelined_loop(cap, detector, manager, voice, window_name, recorder, metrics, scheduler, timeline)
+    else:
+        run_sequential_loop(cap, detector, manager, voice, window_name, recorder, metrics, scheduler, timeline)
+
+    print(timeline.report())
+
+    if scheduler:
+        print(f"[Motion gating] {scheduler.stats()}")
+
+    if metrics_server:
+        metrics_server.stop()
+
+    if recorder:
+        recorder.close()
+        print(f"✓ Recorded {recorder.frames_written} frames to {record_path}")
+    cap.release()
+    cv2.destroyAllWindows()
+    voice.stop()
+    if tracer:
+        tracer.close()
+        print(tracer.report())
+        print(f"✓ Word traces written to {trace_path}")
+    print("✓ SignToWords closed successfully!")
+    print("=" * 60)
+
+def run_sequential_loop(cap, detector, manager, voice, window_name, recorder=None, metrics=None,
+                        scheduler=None, timeline=None):
+    """Capture, inference and rendering one after another on the main thread."""
+    fps_counter = FPS()
+    renderer = OverlayRenderer(window_name)
+    raw, flipped = FrameBuffer(), FrameBuffer()
+    metrics = metrics or Metrics()
+    perf_counter = time.perf_counter
+
     frame_count = 0
     while True:
-        success, img = cap.read()
+        t_start = perf_counter()
+        success, img = read_frame(cap, raw)
         if not success:
             print("Warning: Failed to read frame from camera")
             break
-        
+
         frame_count += 1
-        img = cv2.flip(img, 1)
-        display_img = img.copy()
-        
-        # 1. Detect Hands (Process every frame for smoothness)
-        display_img = detector.find_hands(display_img)
-        landmarks = detector.get_landmarks(img)
-        
-        current_prediction = None
-        
-        # 2. Recognize gesture if hand is present
-        if landmarks:
-            gesture = detector.recognize_gesture(landmarks)
-            if gesture:
-                current_prediction = gesture
+        img = cv2.flip(img, 1, dst=flipped.like(img))
+        # Landmarks come from detector.results, so the frame itself can be drawn on
+        display_img = img
+        t_captured = perf_counter()
+        timestamp, t_grabbed = frame_times(cap)
+
+        # 1. Detect Hands (Process every frame for smoothness, unless motion gating
+        #    finds the frame steady enough to reuse the last landmarks)
+        inferred = scheduler is None or scheduler.should_infer(scheduler.frame_motion(img))
+        if inferred:
+            display_img = detector.find_hands(display_img)
+            landmarks = detector.get_landmarks(img)
         else:
-            # Clear buffer when no hand detected
-            detector.gesture_buffer.clear()
-        
+            detector.draw_results(display_img)
+            landmarks = scheduler.skipped_landmarks()
+        t_inferred = perf_counter()
+
+        current_prediction = None
+
+        # 2. Recognize gesture if hand is present (and motion signs, if loaded)
+        gesture = detector.recognize_frame(landmarks)
+        if gesture:
+            current_prediction = gesture
+
+        if scheduler:
+            if inferred:
+                scheduler.record_inference(landmarks, current_prediction, t_inferred - t_captured)
+            else:
+                scheduler.record_skip(current_prediction)
+                metrics.inc("inference_skipped")
+
+        if recorder:
+            recorder.write(landmarks, timestamp, label=current_prediction)
+        t_recognized = perf_counter()
+
         # 3. Temporal stabilization with GestureManager
-        stabilized = manager.update(current_prediction)
-        
+        stabilized = manager.update(current_prediction, captured=t_grabbed)
+
         # 4. Handle "Final" word detection (cooldown/new word)
         final_word = manager.get_final_word(stabilized)
         if final_word:
             print(f"DEBUG: Gesture detected and ready: {final_word}")
             voice.speak(final_word)
             print(f"🔊 Speaking: {final_word}")
-            
+
         # 5. Sentence Finalization (Silence detection)
         sentence_to_speak = manager.should_finalize_sentence()
         if sentence_to_speak:
             print(f"✓ Sentence completed: {sentence_to_speak}")
             # Also speak the whole sentence for better context
-            voice.speak(f"Sentence completed: {sentence_to_speak}")
-
-        # --- PREMIUM UI OVERLAY ---
-        h, w = display_img.shape[:2]
-        
-        # Semi-transparent top bar (Glassmorphism effect)
-        overlay = display_img.copy()
-        cv2.rectangle(overlay, (0, 0), (w, 90), (40, 40, 40), -1)
-        cv2.addWeighted(overlay, 0.6, display_img, 0.4, 0, display_img)
-        
-        # Top boundary line (accent)
-        cv2.line(display_img, (0, 90), (w, 90), (0, 255, 127), 2)
-        
-        # Current Prediction with better styling
-        word_text = stabilized if stabilized else "..."
-        color = (0, 255, 127) if stabilized else (200, 200, 200)
-        cv2.putText(display_img, f"SIGN: {word_text.upper()}", 
-                    (25, 60), cv2.FONT_HERSHEY_DUPLEX, 1.2, color, 2)
-        
-        # FPS Indicator
+            voice.speak_sentence(f"Sentence completed: {sentence_to_speak}")
+        t_stabilized = perf_counter()
+
         fps = fps_counter.get_fps()
-        cv2.putText(display_img, f"FPS: {fps}", (w - 140, 55), 
-                    cv2.FONT_HERSHEY_PLAIN, 1.2, (255, 255, 255), 1)
-        
-        # Semi-transparent bottom bar
-        overlay_bottom = display_img.copy()
-        cv2.rectangle(overlay_bottom, (0, h - 100), (w, h), (30, 30, 30), -1)
-        cv2.addWeighted(overlay_bottom, 0.7, display_img, 0.3, 0, display_img)
-        cv2.line(display_img, (0, h - 100), (w, h - 100), (0, 165, 255), 2)
-        
-        # Sentence Display
-        current_sentence = " ".join(manager.sentence)
-        if not current_sentence:
-            current_sentence = "Ready for signs..."
-        
-        # Wrap/Truncate sentence
-        if len(current_sentence) > 45:
-            current_sentence = "..." + current_sentence[-42:]
-        
-        cv2.putText(display_img, f"SENTENCE: {current_sentence}", 
-                    (25, h - 45), cv2.FONT_HERSHEY_DUPLEX, 0.9, (255, 255, 255), 1)
-        
-        # Instructions (Subtle)
-        cv2.putText(display_img, "Press 'Q' to quit | Lower hand to end sentence", 
-                    (w - 380, h - 15), cv2.FONT_HERSHEY_PLAIN, 0.8, (180, 180, 180), 1)
-
-        # Get current window size to prevent stretching
-        win_w, win_h = 1280, 720 # Default
-        try:
-            _, _, cur_w, cur_h = cv2.getWindowImageRect(window_name)
-            if cur_w > 0 and cur_h > 0:
-                win_w, win_h = cur_w, cur_h
-        except:
-            pass
-            
-        # Calculate scaling to fit without stretching (Letterboxing)
-        scale_w = win_w / w
-        scale_h = win_h / h
-        scale = min(scale_w, scale_h)
-        
-        new_w = int(w * scale)
-        new_h = int(h * scale)
-        
-        # Resize image
-        resized = cv2.resize(display_img, (new_w, new_h), interpolation=cv2.INTER_AREA)
-        
-        # Create a black canvas of window size
-        canvas = np.zeros((win_h, win_w, 3), dtype=np.uint8)
-        
-        # Center the resized image on canvas
-        start_y = (win_h - new_h) // 2
-        start_x = (win_w - new_w) // 2
-        canvas[start_y:start_y+new_h, start_x:start_x+new_w] = resized
+        renderer.draw_overlay(display_img, stabilized, manager.sentence, f"FPS: {fps}")
+        canvas = renderer.letterbox(display_img)
 
         cv2.imshow(window_name, canvas)
-        
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q') or key == ord('Q'):
-            print("\n" + "=" * 60)
-            print("Shutting down cleanly...")
+        t_end = perf_counter()
+        if timeline:
+            timeline.mark("first frame")
+            if current_prediction:
+                timeline.mark("first recognition")
+
+        metrics.observe("capture", t_captured - t_start)
+        metrics.observe("inference", t_inferred - t_captured)
+        metrics.observe("recognize", t_recognized - t_inferred)
+        metrics.observe("stabilize", t_stabilized - t_recognized)
+        metrics.observe("render", t_end - t_stabilized)
+        metrics.observe("frame", t_end - t_start)
+        metrics.inc("frames")
+        if not landmarks:
+            metrics.inc("frames_no_hand")
+
+        if quit_requested():
             break
 
-    cap.release()
-    cv2.destroyAllWindows()
-    voice.stop()
-    print("✓ SignToWords closed successfully!")
-    print("=" * 60)
+def run_pipelined_loop(cap, detector, manager, voice, window_name, recorder=None, metrics=None,
+                       scheduler=None, timeline=None, workers=0):
+    """
+    Capture and inference run on background threads joined by
+    "latest frame wins" queues; this (main) thread only renders.
+    With workers, hand tracking runs in that many processes instead.
+    """
+    def on_word(word):
+        voice.speak(word)
+        print(f"🔊 Speaking: {word}")
+
+    def on_sentence(sentence):
+        print(f"✓ Sentence completed: {sentence}")
+        voice.speak_sentence(f"Sentence completed: {sentence}")
+
+    renderer = OverlayRenderer(window_name)
+    if workers:
+        pipeline = ProcessPipeline(cap, detector, manager, on_word=on_word, on_sentence=on_sentence,
+                                   recorder=recorder, metrics=metrics, workers=workers).start()
+    else:
+        pipeline = Pipeline(cap, detector, manager, on_word=on_word, on_sentence=on_sentence,
+                            recorder=recorder, metrics=metrics, scheduler=scheduler).start()
+    last_report = time.time()
+
+    try:
+        while pipeline.running or len(pipeline.results):
+            result = pipeline.get_result(timeout=0.05)
+            if result is None:
+                # Keep the window responsive while waiting for inference
+                if quit_requested():
+                    break
+                continue
+
+            start = time.perf_counter()
+            fps_text = (f"CAP {pipeline.capture_stats.fps():.0f} | "
+                        f"INF {pipeline.inference_stats.fps():.0f} | "
+                        f"UI {pipeline.render_stats.fps():.0f}")
+            renderer.draw_overlay(result.image, result.stabilized, result.sentence, fps_text)
+            canvas = renderer.letterbox(result.image)
+            cv2.imshow(window_name, canvas)
+            if timeline:
+                timeline.mark("first frame")
+                if result.prediction:
+                    timeline.mark("first recognition")
+            pipeline.release(result)
+            pipeline.record_render(start, time.perf_counter())
+
+            if time.time() - last_report > 5:
+                print_stage_stats(pipeline)
+                last_report = time.time()
+
+            if quit_requested():
+                break
+    finally:
+        pipeline.stop()
+        print_stage_stats(pipeline)
+
+def print_stage_stats(pipeline):
+    print("[Pipeline] " + " | ".join(
+        f"{s['stage']}: {s['fps']} fps, {s['avg_ms']} ms"
+        + (f", dropped {s['dropped']}" if "dropped" in s else "")
+        for s in pipeline.stats()
+    ) + f" | bottleneck: {pipeline.bottleneck()}")
 
 if __name__ == "__main__":
-    import numpy as np # Ensure numpy is available for canvas
+    parser = argparse.ArgumentParser(description="SignToWords live sign language translator")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="run capture, inference and rendering on separate threads")
+    parser.add_argument("--record", metavar="PATH",
+                        help="save landmarks and predictions to a recording file for offline replay")
+    parser.add_argument("--label", metavar="NAME",
+                        help="with --record, label every hand frame NAME (e.g. a motion sign to build templates from)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve live metrics (Prometheus text and JSON) on this local port")
+    parser.add_argument("--motion-gating", action="store_true",
+                        help="skip hand tracking on steady frames and reuse the last landmarks")
+    parser.add_argument("--no-speech-cache", action="store_true",
+                        help="synthesize every word with the TTS engine instead of cached waveforms")
+    parser.add_argument("--classifier", metavar="PATH",
+                        help="recognize signs with a trained classifier (see train_classifier.py)")
+    parser.add_argument("--motion", metavar="PATH",
+                        help="also recognize motion signs from templates (see src/dynamic_signs.py)")
+    parser.add_argument("--roi", type=int, metavar="SIZE",
+                        help="track the hand in a crop around it, resized to SIZE pixels (see src/roi.py)")
+    parser.add_argument("--roi-budget-ms", type=float, metavar="MS",
+                        help="like --roi, choosing the crop size to keep tracking within MS per frame")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="trace each word from camera to speech and write the spans to PATH (JSON lines)")
+    parser.add_argument("--source", default="0",
+                        help="camera index, video file, image directory, frames .npy or synthetic[:WxH] (see src/sources.py)")
+    parser.add_argument("--prefetch", type=int, default=4, metavar="N",
+                        help="frames read ahead on a background thread (0 reads on the main loop)")
+    parser.add_argument("--workers", type=int, default=0, metavar="N",
+                        help="track hands in N processes fed through shared memory (for high-fps cameras)")
+    args = parser.parse_args()
     try:
-        run_app()
+        run_app(pipelined=args.pipelined, record_path=args.record, metrics_port=args.metrics_port,
+                motion_gating=args.motion_gating, speech_cache=not args.no_speech_cache,
+                classifier_path=args.classifier, motion_path=args.motion,
+                roi=make_roi(args.roi, args.roi_budget_ms), trace_path=args.trace,
+                source=int(args.source) if args.source.isdigit() else args.source, prefetch=args.prefetch,
+                workers=args.workers, record_label=args.label)
     except KeyboardInterrupt:
         print("\n\n" + "=" * 60)
         print("Application interrupted by user.")
@@ -0,0 +1,47 @@
+"""
+Run the landmark classification service for browser / kiosk clients.
+
+    python serve_landmarks.py --port 8765
+    python serve_landmarks.py --host 0.0.0.0 --latency-budget-ms 5
+
+See src/landmark_service.py for the WebSocket and HTTP protocol.
+"""
+import argparse
+import asyncio
+
+from src.landmark_service import LandmarkService
+
+
+async def main(args):
+    classifier = None
+    if args.classifier:
+        from src.classifier import LandmarkClassifier
+        classifier = LandmarkClassifier.load(args.classifier)
+    service = await LandmarkService(latency_budget=args.latency_budget_ms / 1000.0,
+                                    max_batch=args.max_batch,
+                                    session_ttl=args.session_ttl,
+                                    classifier=classifier).start(args.host, args.port)
+    print(f"✓ Landmark service on ws://{args.host}:{service.port}/ws "
+          f"(budget {args.latency_budget_ms} ms, max batch {args.max_batch})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SignToWords landmark classification service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-budget-ms", type=float, default=5.0,
+                        help="longest a frame waits to be batched with other clients' frames")
+    parser.add_argument("--max-batch", type=int, default=512, help="frames classified per batch at most")
+    parser.add_argument("--session-ttl", type=float, default=300.0,
+                        help="seconds before an idle session's state is dropped")
+    parser.add_argument("--classifier", metavar="PATH",
+                        help="classify with a trained classifier (see train_classifier.py)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,81 @@
+"""
+Serve several cameras / kiosks / clips from one process.
+
+    python serve_streams.py clip1.mp4 clip2.mp4 rtsp://kiosk-3/stream
+    python serve_streams.py --listen 0.0.0.0:9000          # JPEG frames over TCP
+    python serve_streams.py --send clip.mp4 --to 127.0.0.1:9000   # test client
+
+Prints each stream's words and sentences as they are recognized, and a
+per-stream latency / fairness report every few seconds and on exit.
+"""
+import argparse
+import json
+
+from src.streams import StreamServer, send_video
+
+
+def print_report(report):
+    print(f"[Streams] {len(report['streams'])} streams on {report['workers']} workers | "
+          f"total {report['total_fps']} fps | fairness {report['fairness']} "
+          f"(worst stream at {report['min_fair_share']:.0%} of its fair share) | "
+          f"max wait {report['max_wait_ms']} ms")
+    for s in report["streams"]:
+        lat = s["latency"]
+        print(f"  {s['stream']:<32} {s['fps']:>6} fps  served {s['served_ratio']:.0%}  "
+              f"latency p50 {lat['p50_ms']} ms / p95 {lat['p95_ms']} ms"
+              + ("  (ended)" if s["done"] else ""))
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-stream SignToWords server")
+    parser.add_argument("sources", nargs="*", help="video files, URLs or camera indexes")
+    parser.add_argument("--workers", type=int, help="inference threads (default: core count)")
+    parser.add_argument("--max-streams", type=int, default=16, help="concurrent stream limit")
+    parser.add_argument("--listen", metavar="HOST:PORT", help="accept JPEG frame streams over TCP")
+    parser.add_argument("--unpaced", action="store_true",
+                        help="read video files as fast as they can be processed (no dropped frames) instead of at their frame rate")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between reports")
+    parser.add_argument("--report-json", metavar="PATH", help="write the final report as JSON")
+    parser.add_argument("--send", metavar="VIDEO", help="client mode: stream a video to --to")
+    parser.add_argument("--to", metavar="HOST:PORT", help="server address for --send")
+    args = parser.parse_args()
+
+    if args.send:
+        send_video(args.send, *parse_address(args.to or "127.0.0.1:9000"))
+        raise SystemExit(0)
+
+    if not args.sources and not args.listen:
+        parser.error("give at least one source or --listen")
+
+    server = StreamServer(
+        workers=args.workers,
+        max_streams=args.max_streams,
+        on_word=lambda name, word: print(f"[{name}] Word: {word}"),
+        on_sentence=lambda name, sentence: print(f"[{name}] Sentence: {sentence}"),
+    )
+    for spec in args.sources:
+        server.add_source(spec, paced=False if args.unpaced else None)
+    if args.listen:
+        port = server.listen(*parse_address(args.listen))
+        print(f"✓ Listening for frame streams on port {port}")
+
+    server.start()
+    print(f"✓ Serving {len(args.sources)} source(s) on {server.workers} worker(s)")
+    try:
+        while not server.wait(timeout=args.report_every):
+            print_report(server.report())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        report = server.report()
+        print_report(report)
+        if args.report_json:
+            with open(args.report_json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"✓ Report written to {args.report_json}")
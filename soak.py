@@ -0,0 +1,356 @@
+"""
+Soak test for long-running kiosks.
+
+Drives the headless detection loop (see headless.py) at full speed for a
+set duration and samples every --interval seconds:
+- the process RSS
+- the memory traced by tracemalloc, with the allocation sites that grew most
+- garbage collector counts and the number of live objects
+- the depth of every queue and buffer in the loop: the sentence, the speech
+  queue, word traces waiting for the voice, sink queues and read-ahead frames
+
+The run fails (exit code 1) when RSS or traced memory grows past its
+threshold between the end of the warm-up and the end of the run, or when a
+queue gets deeper than --max-depth:
+
+    python soak.py --duration 3600                          # synthetic signing, no camera or MediaPipe
+    python soak.py --replay session.lmrec --duration 3600   # recorded landmarks, looped
+    python soak.py --source clip.mp4 --duration 600         # full pipeline with MediaPipe, video looped
+
+Speech goes through the real SpeechScheduler to a silent voice that takes
+--speech-seconds per utterance, so the speech queue fills up the way it
+does when words come faster than they can be said.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from headless import run_headless
+from src.landmarks import LandmarkFrame
+from src.metrics import Metrics
+from src.pretrained_detector import PretrainedSignDetector, GESTURE_LABELS
+from src.sinks import VoiceSink
+from src.sources import open_frame_source
+from src.speech_scheduler import SpeechScheduler, WORD, SENTENCE
+from src.tracing import WordTracer
+from src.utils import GestureManager
+
+
+def synthetic_signing(seed=0):
+    """
+    Endless landmark frames of held signs, with pauses of every length
+    between them (None = no hand). One pose per sign is found by sampling
+    random hands until the rules recognize it.
+    """
+    rng = np.random.default_rng(seed)
+    candidates = rng.random((20000, 21, 3)).astype(np.float32)
+    codes = PretrainedSignDetector.recognize_gesture_codes(candidates)
+    poses = [candidates[np.argmax(codes == code)] for code in range(1, len(GESTURE_LABELS))
+             if (codes == code).any()]
+    while True:
+        pose = poses[rng.integers(len(poses))]
+        for _ in range(int(rng.integers(15, 45))):
+            yield LandmarkFrame(pose + rng.normal(0, 0.002, pose.shape))
+        # Mostly short gaps between words, sometimes long enough to end the sentence
+        for _ in range(int(rng.integers(0, 8) if rng.random() < 0.8 else rng.integers(15, 40))):
+            yield None
+
+
+def replay_signing(path):
+    """Landmark frames of a recording (see src/recording.py), over and over."""
+    from src.recording import LandmarkReplay
+
+    replay = LandmarkReplay(path)
+    if not len(replay):
+        raise ValueError(f"{path} holds no frames")
+    landmarks, has_hand = replay.landmarks, replay.has_hand
+    while True:
+        for i in range(len(replay)):
+            yield LandmarkFrame(landmarks[i]) if has_hand[i] else None
+
+
+class ScriptedDetector:
+    """Detector stand-in that plays landmark frames instead of tracking hands."""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def find_hands(self, img, draw=True):
+        return img
+
+    def draw_results(self, img):
+        return img
+
+    def get_landmarks(self, img=None, out=None, timestamp=None):
+        return next(self.frames)
+
+    def recognize_frame(self, landmarks):
+        return PretrainedSignDetector.recognize_gesture(landmarks) if landmarks is not None else None
+
+
+class SilentVoice:
+    """VoiceEngine stand-in: the real speech scheduler, but utterances are only waited out."""
+
+    def __init__(self, speech_seconds=0.3, tracer=None, metrics=None):
+        self.speech_queue = SpeechScheduler(metrics=metrics)
+        self.speech_seconds = speech_seconds
+        self.tracer = tracer
+        self.utterances = 0
+        self._thread = threading.Thread(target=self._speech_worker, name="silent-voice", daemon=True)
+        self._thread.start()
+
+    def _speech_worker(self):
+        while True:
+            items = self.speech_queue.get_items()
+            if not items:
+                break
+            start = time.perf_counter()
+            for item in items:
+                if item.trace is not None:
+                    item.trace.mark("dequeued", start)
+                    item.trace.mark("speech_start", start)
+                    item.trace.finish("spoken")
+            self.utterances += 1
+            time.sleep(self.speech_seconds)
+
+    def speak(self, text, kind=WORD):
+        if text:
+            trace = self.tracer.claim(text) if self.tracer and kind == WORD else None
+            self.speech_queue.put(text, kind, trace)
+
+    def speak_sentence(self, text):
+        self.speak(text, SENTENCE)
+
+    def stop(self):
+        self.speech_queue.close()
+        self._thread.join(timeout=1.0)
+
+
+def rss_mb():
+    """Resident set size of this process in MB, or None where it can't be read."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class SoakMonitor:
+    """Samples memory, the garbage collector and queue depths on a background thread."""
+
+    def __init__(self, probes, metrics=None, interval=10.0, warmup=30.0, trace_memory=True, top=10):
+        """
+        Args:
+            probes: name -> callable returning the current depth of a queue or buffer
+            metrics: Optional Metrics registry whose "frames" counter is sampled
+            interval: Seconds between samples
+            warmup: Seconds before the baseline sample (caches and pools filling up)
+            trace_memory: Trace Python allocations with tracemalloc (slows the loop down)
+            top: Allocation sites reported, by growth since the baseline
+        """
+        self.probes = probes
+        self.metrics = metrics
+        self.interval = interval
+        self.warmup = warmup
+        self.trace_memory = trace_memory
+        self.top = top
+        self.samples = []
+        self.baseline = None
+        self._snapshot = None
+        self._started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="soak-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        elapsed = time.perf_counter() - self._started
+        if self.baseline is None and elapsed >= self.warmup:
+            gc.collect()
+        rss = rss_mb()
+        sample = {
+            "t": round(elapsed, 1),
+            "frames": self.metrics.counters.get("frames", 0) if self.metrics else None,
+            "rss_mb": round(rss, 2) if rss is not None else None,
+            "traced_mb": round(tracemalloc.get_traced_memory()[0] / 2**20, 3) if self.trace_memory else None,
+            "gc_counts": list(gc.get_count()),
+            "gc_collections": [s["collections"] for s in gc.get_stats()],
+            "objects": len(gc.get_objects()),
+            "depths": {name: probe() for name, probe in self.probes.items()},
+        }
+        self.samples.append(sample)
+        if self.baseline is None and elapsed >= self.warmup:
+            self.baseline = sample
+            if self.trace_memory:
+                self._snapshot = tracemalloc.take_snapshot()
+        return sample
+
+    def stop(self):
+        """Take the final sample; returns it."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        gc.collect()
+        final = self.sample()
+        if self.baseline is None:
+            self.baseline = self.samples[0]
+        return final
+
+    def top_growth(self):
+        """Allocation sites that grew most since the baseline."""
+        if not self.trace_memory or self._snapshot is None:
+            return []
+        stats = tracemalloc.take_snapshot().compare_to(self._snapshot, "lineno")
+        return [{"site": str(stat.traceback[0]), "growth_kb": round(stat.size_diff / 1024, 1),
+                 "size_kb": round(stat.size / 1024, 1), "count_diff": stat.count_diff}
+                for stat in stats[:self.top] if stat.size_diff > 0]
+
+    def report(self, max_rss_growth_mb=None, max_traced_growth_mb=None, max_depth=None):
+        """Growth between the baseline and the last sample, and the thresholds it broke."""
+        first, last = self.baseline, self.samples[-1]
+        hours = max(last["t"] - first["t"], 1e-9) / 3600.0
+
+        def growth(key):
+            if first[key] is None or last[key] is None:
+                return None
+            return round(last[key] - first[key], 3)
+
+        report = {
+            "duration_s": last["t"],
+            "frames": last["frames"],
+            "fps": round(last["frames"] / last["t"], 1) if last["frames"] and last["t"] else None,
+            "baseline_t": first["t"],
+            "rss_mb": {"baseline": first["rss_mb"], "final": last["rss_mb"], "growth": growth("rss_mb")},
+            "traced_mb": {"baseline": first["traced_mb"], "final": last["traced_mb"],
+                          "growth": growth("traced_mb")},
+            "objects": {"baseline": first["objects"], "final": last["objects"], "growth": growth("objects")},
+            "max_depths": {name: max(s["depths"][name] for s in self.samples) for name in self.probes},
+            "gc_collections": last["gc_collections"],
+            "top_growth": self.top_growth(),
+        }
+        for key in ("rss_mb", "traced_mb"):
+            if report[key]["growth"] is not None:
+                report[key]["growth_per_hour"] = round(report[key]["growth"] / hours, 2)
+
+        failures = []
+        if max_rss_growth_mb is not None and (report["rss_mb"]["growth"] or 0) > max_rss_growth_mb:
+            failures.append(f"RSS grew {report['rss_mb']['growth']:.1f} MB (limit {max_rss_growth_mb} MB)")
+        if max_traced_growth_mb is not None and (report["traced_mb"]["growth"] or 0) > max_traced_growth_mb:
+            failures.append(f"Traced memory grew {report['traced_mb']['growth']:.2f} MB "
+                            f"(limit {max_traced_growth_mb} MB)")
+        if max_depth is not None:
+            failures.extend(f"{name} reached depth {depth} (limit {max_depth})"
+                            for name, depth in report["max_depths"].items() if depth > max_depth)
+        report["failures"] = failures
+        report["passed"] = not failures
+        return report
+
+
+def run_soak(duration=600.0, source=None, replay=None, interval=10.0, warmup=30.0, speech_seconds=0.3,
+             cooldown=0.1, trace_memory=True, max_rss_growth_mb=50.0, max_traced_growth_mb=10.0,
+             max_depth=256):
+    """
+    Soak the loop for duration seconds; returns the monitor's report.
+
+    Args:
+        source: Frame source spec (see src/sources.py) to run MediaPipe on,
+                looped; by default landmark frames are played instead
+        replay: Landmark recording to play instead of synthetic signing
+        cooldown: GestureManager cooldown; short, so words come quickly
+    """
+    metrics = Metrics()
+    # Few finished traces are kept, so the tracer is full by the end of the warm-up
+    tracer = WordTracer(metrics, keep=256)
+    manager = GestureManager(cooldown_seconds=cooldown, tracer=tracer)
+    voice = SilentVoice(speech_seconds, tracer, metrics)
+    sinks = [VoiceSink(voice=voice)]
+
+    if source is not None:
+        cap = open_frame_source(source, loop=True)
+        detector = PretrainedSignDetector()
+    else:
+        cap = open_frame_source("synthetic:160x120")
+        detector = ScriptedDetector(replay_signing(replay) if replay else synthetic_signing())
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open source: {source}")
+
+    probes = {
+        "sentence_words": lambda: len(manager.sentence),
+        "speech_queue": voice.speech_queue.qsize,
+        "word_traces_pending": tracer.pending,
+        "voice_sink_queue": lambda: len(sinks[0]._events),
+        "frames_read_ahead": lambda: cap.stats()["buffered"],
+    }
+    monitor = SoakMonitor(probes, metrics, interval=interval, warmup=warmup, trace_memory=trace_memory).start()
+    try:
+        # The manager reports to the tracer; its summary is added after the last sample
+        summary = run_headless(cap, sinks, detector, manager, metrics=metrics, max_seconds=duration)
+    finally:
+        monitor.stop()
+        for sink in sinks:
+            sink.close()
+        cap.release()
+        tracer.close()
+
+    report = monitor.report(max_rss_growth_mb, max_traced_growth_mb, max_depth)
+    report["words"] = summary["words"]
+    report["sentences"] = summary["sentences"]
+    report["speech"] = voice.speech_queue.stats()
+    report["word_latency"] = tracer.summary()
+    report["samples"] = monitor.samples
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the detection loop for a long time and watch for leaks")
+    parser.add_argument("--duration", type=float, default=600.0, help="seconds to run")
+    parser.add_argument("--interval", type=float, default=10.0, help="seconds between samples")
+    parser.add_argument("--warmup", type=float, default=30.0, help="seconds before the baseline sample")
+    parser.add_argument("--source", help="run MediaPipe on this frame source (looped) instead of landmarks")
+    parser.add_argument("--replay", metavar="PATH", help="play this landmark recording instead of synthetic signing")
+    parser.add_argument("--speech-seconds", type=float, default=0.3, help="time the silent voice takes per utterance")
+    parser.add_argument("--cooldown", type=float, default=0.1, help="GestureManager cooldown between words")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip allocation tracing (runs faster)")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=50.0)
+    parser.add_argument("--max-traced-growth-mb", type=float, default=10.0)
+    parser.add_argument("--max-depth", type=int, default=256, help="deepest any queue or buffer may get")
+    parser.add_argument("--output", metavar="PATH", help="also write the full report with all samples here")
+    args = parser.parse_args()
+
+    report = run_soak(args.duration, args.source, args.replay, args.interval, args.warmup, args.speech_seconds,
+                      args.cooldown, not args.no_tracemalloc, args.max_rss_growth_mb,
+                      args.max_traced_growth_mb, args.max_depth)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    samples = report.pop("samples")
+    print(json.dumps(report, indent=2))
+    print(f"{len(samples)} samples")
+    if report["passed"]:
+        print("✓ Soak test passed")
+    else:
+        for failure in report["failures"]:
+            print(f"✗ {failure}")
+        sys.exit(1)
@@ -0,0 +1,373 @@
+"""
+Trainable landmark classifier.
+
+The rule cascade in pretrained_detector.py needs a new branch per sign and
+its branches shadow each other. LandmarkClassifier learns signs from
+examples instead:
+
+- features are the 21 landmarks relative to the wrist, divided by the palm
+  size (wrist to middle-finger base), so position and distance to the
+  camera do not matter
+- PCA keeps the few directions that carry the pose (hand poses are low
+  dimensional), which keeps the KD-tree effective
+- a k-nearest-neighbour vote over a KD-tree gives the label; frames far
+  from every example, without a clear majority, or closest to examples of
+  a hand that is not signing give no gesture
+
+Only the few leaves of the tree near a frame are compared against it, so
+adding signs barely changes per-frame cost, and a whole batch of frames is
+queried with a handful of array operations. predict_codes() and labels
+follow the rule cascade's convention (code 0 = no gesture), so the
+classifier can stand in for it anywhere.
+
+Train one with train_classifier.py; measure scaling with:
+
+    python -m src.classifier
+"""
+import csv
+
+import numpy as np
+
+PALM_BASE = 9   # middle finger MCP, used as the scale reference
+
+
+def landmark_features(landmarks):
+    """
+    Wrist-relative, scale-invariant features.
+
+    Args:
+        landmarks: array-like of shape (N, 21, 3) or (21, 3)
+
+    Returns:
+        float32 array of shape (N, 63)
+    """
+    lm = np.asarray(landmarks, dtype=np.float32)
+    if lm.ndim == 2:
+        lm = lm[None]
+    if lm.ndim != 3 or lm.shape[1:] != (21, 3):
+        raise ValueError(f"Expected landmarks of shape (N, 21, 3), got {lm.shape}")
+    rel = lm - lm[:, :1]
+    scale = np.linalg.norm(rel[:, PALM_BASE], axis=1)
+    scale[scale < 1e-6] = 1.0
+    return (rel / scale[:, None, None]).reshape(len(lm), 63)
+
+
+class KDTree:
+    """
+    KD-tree over the examples with exact k-nearest-neighbour queries.
+
+    The points are split recursively at the median of their widest
+    dimension until at most leaf_size remain. Leaves are kept in
+    depth-first order, padded to leaf_size, and grouped into a shallow
+    hierarchy of bounding boxes (branching factor fanout), so a whole batch
+    of queries is answered level by level with array operations:
+
+    1. each query descends greedily to a nearby leaf, whose k-th distance
+       bounds the search radius
+    2. the hierarchy is walked again, keeping only boxes within the radius
+    3. the points of the leaves that remain are compared
+    """
+
+    def __init__(self, points, leaf_size=32, fanout=16):
+        self.points = np.asarray(points, dtype=np.float32)
+        self.leaf_size = leaf_size
+        self.fanout = fanout
+        leaves = []
+        pending = [np.arange(len(self.points))] if len(self.points) else []
+        while pending:
+            idx = pending.pop()
+            if len(idx) <= leaf_size:
+                leaves.append(idx)
+                continue
+            pts = self.points[idx]
+            dim = int(np.argmax(pts.max(axis=0) - pts.min(axis=0)))
+            half = len(idx) // 2
+            order = np.argpartition(pts[:, dim], half)
+            pending += [idx[order[half:]], idx[order[:half]]]
+
+        d = self.points.shape[1]
+        # Padded leaves: unused slots are infinitely far away
+        self.leaf_points = np.full((len(leaves), leaf_size, d), np.inf, dtype=np.float32)
+        self.leaf_index = np.full((len(leaves), leaf_size), -1, dtype=np.int64)
+        lo = np.empty((len(leaves), d), dtype=np.float32)
+        hi = np.empty((len(leaves), d), dtype=np.float32)
+        for i, idx in enumerate(leaves):
+            pts = self.points[idx]
+            self.leaf_points[i, :len(idx)] = pts
+            self.leaf_index[i, :len(idx)] = idx
+            lo[i] = pts.min(axis=0)
+            hi[i] = pts.max(axis=0)
+
+        # Box levels from the root down to the leaves; every level below the
+        # top is padded to whole groups with empty (never near) boxes
+        self.levels = [(lo, hi)]
+        while len(lo) > fanout:
+            pad = -len(lo) % fanout
+            lo = np.concatenate([lo, np.full((pad, d), np.inf, dtype=np.float32)])
+            hi = np.concatenate([hi, np.full((pad, d), -np.inf, dtype=np.float32)])
+            self.levels[0] = (lo, hi)
+            lo = lo.reshape(-1, fanout, d).min(axis=1)
+            hi = hi.reshape(-1, fanout, d).max(axis=1)
+            self.levels.insert(0, (lo, hi))
+
+    def __len__(self):
+        return len(self.points)
+
+    @staticmethod
+    def _box_d2(q, lo, hi):
+        gap = np.maximum(lo - q, 0) + np.maximum(q - hi, 0)
+        return (gap * gap).sum(axis=-1)
+
+    def query(self, queries, k=1, chunk=1024):
+        """
+        Args:
+            queries: array of shape (M, D)
+            k: Number of neighbours
+            chunk: Queries handled per vectorized step (bounds memory)
+
+        Returns:
+            (distances, indices): arrays of shape (M, k), nearest first
+        """
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, self.points.shape[1])
+        k = min(k, len(self))
+        if k > self.leaf_size:
+            raise ValueError(f"k={k} is larger than the tree's leaf_size={self.leaf_size}")
+        dist = np.empty((len(q), k), dtype=np.float32)
+        ind = np.empty((len(q), k), dtype=np.int64)
+        for start in range(0, len(q), chunk):
+            dist[start:start + chunk], ind[start:start + chunk] = self._query(q[start:start + chunk], k)
+        return dist, ind
+
+    def _query(self, q, k):
+        m = len(q)
+        rows = np.arange(m)
+        top = len(self.levels[0][0])
+
+        # 1. Greedy descent to a nearby leaf; its k-th distance is the radius
+        lo, hi = self.levels[0]
+        node = self._box_d2(q[:, None, :], lo, hi).argmin(axis=1)
+        for lo, hi in self.levels[1:]:
+            children = node[:, None] * self.fanout + np.arange(self.fanout)
+            node = children[rows, self._box_d2(q[:, None, :], lo[children], hi[children]).argmin(axis=1)]
+        own = node
+        own_d2 = ((self.leaf_points[own] - q[:, None, :]) ** 2).sum(axis=2)
+        radius2 = np.partition(own_d2, k - 1, axis=1)[:, k - 1]
+
+        # 2. Walk down again keeping (query, box) pairs within the radius
+        fq = np.repeat(rows, top)
+        fn = np.tile(np.arange(top), m)
+        for level, (lo, hi) in enumerate(self.levels):
+            if level:
+                fq = np.repeat(fq, self.fanout)
+                fn = (fn[:, None] * self.fanout + np.arange(self.fanout)).ravel()
+            d2 = self._box_d2(q[fq], lo[fn], hi[fn])
+            near = (d2 <= radius2[fq]) & np.isfinite(d2)
+            fq, fn = fq[near], fn[near]
+        other = fn != own[fq]
+        pair_q, pair_leaf = fq[other], fn[other]
+
+        # 3. Merge all candidates and keep the k closest per query
+        rows = np.concatenate([np.repeat(rows, self.leaf_size), np.repeat(pair_q, self.leaf_size)])
+        d2 = np.concatenate([own_d2.ravel(),
+                             ((self.leaf_points[pair_leaf] - q[pair_q, None, :]) ** 2).sum(axis=2).ravel()])
+        idx = np.concatenate([self.leaf_index[own].ravel(), self.leaf_index[pair_leaf].ravel()])
+        # The radius already holds k candidates per query, so nothing beyond it is needed
+        keep = d2 <= radius2[rows]
+        rows, d2, idx = rows[keep], d2[keep], idx[keep]
+        order = np.lexsort((d2, rows))
+        starts = np.searchsorted(rows[order], np.arange(m))
+        take = order[starts[:, None] + np.arange(k)]
+        return np.sqrt(d2[take]), idx[take]
+
+
+class LandmarkClassifier:
+    def __init__(self, k=5, min_confidence=0.6, max_distance=None, max_components=16,
+                 explained_variance=0.99, leaf_size=32):
+        """
+        Args:
+            k: Neighbours that vote on each frame
+            min_confidence: Fraction of the k votes the winner needs
+            max_distance: Frames farther than this from every example are
+                          "no gesture" (default: estimated from the training set)
+            max_components: Upper bound on PCA dimensions
+            explained_variance: Keep the fewest components explaining this much variance
+            leaf_size: KD-tree leaf size (raised to k if smaller, since a
+                       query starts from the k nearest in one leaf)
+        """
+        self.k = k
+        self.min_confidence = min_confidence
+        self.max_distance = max_distance
+        self.max_components = max_components
+        self.explained_variance = explained_variance
+        self.leaf_size = leaf_size
+        self.labels = (None,)
+        self.mean = None
+        self.components = None
+        self.codes = None
+        self.tree = None
+
+    def _project(self, landmarks):
+        return (landmark_features(landmarks) - self.mean) @ self.components.T
+
+    def fit(self, landmarks, labels):
+        """
+        Args:
+            landmarks: array of shape (N, 21, 3)
+            labels: N label strings; None or "" marks a hand that is not
+                    signing, which then votes for "no gesture"
+        """
+        labels = np.asarray([label or "" for label in labels], dtype=object)
+        signed = labels != ""
+        if not signed.any():
+            raise ValueError("No labelled examples to train on")
+        features = landmark_features(landmarks)
+        names, codes = np.unique(labels[signed].astype(str), return_inverse=True)
+        self.labels = (None,) + tuple(names.tolist())
+        self.codes = np.zeros(len(labels), dtype=np.int32)
+        self.codes[signed] = codes + 1
+
+        self.mean = features.mean(axis=0)
+        _, s, vt = np.linalg.svd(features - self.mean, full_matrices=False)
+        ratio = np.cumsum(s * s) / max(float((s * s).sum()), 1e-12)
+        n = int(np.searchsorted(ratio, self.explained_variance) + 1)
+        self.components = vt[:min(n, self.max_components)].astype(np.float32)
+        self.tree = KDTree((features - self.mean) @ self.components.T, max(self.leaf_size, self.k))
+
+        if self.max_distance is None:
+            self.max_distance = self._estimate_max_distance()
+        return self
+
+    def _estimate_max_distance(self, sample=2000, scale=3.0):
+        """A few times the typical gap between an example and its nearest neighbour."""
+        if len(self.tree) < 2:
+            return np.inf
+        rng = np.random.default_rng(0)
+        pick = rng.choice(len(self.tree), min(sample, len(self.tree)), replace=False)
+        dist, _ = self.tree.query(self.tree.points[pick], k=2)
+        gap = float(np.percentile(dist[:, 1], 95))
+        return scale * gap if gap > 0 else np.inf
+
+    def predict_codes(self, landmarks, return_confidence=False):
+        """
+        Args:
+            landmarks: array of shape (N, 21, 3)
+
+        Returns:
+            int array of shape (N,) indexing into self.labels (0 = no gesture),
+            plus the winning vote fractions if return_confidence is set
+        """
+        if self.tree is None:
+            raise RuntimeError("Classifier is not trained")
+        points = self._project(landmarks)
+        dist, ind = self.tree.query(points, self.k)
+        votes = self.codes[ind]
+        counts = np.zeros((len(points), len(self.labels)), dtype=np.int32)
+        np.add.at(counts, (np.arange(len(points))[:, None], votes), 1)
+        codes = counts.argmax(axis=1)
+        confidence = counts[np.arange(len(points)), codes] / ind.shape[1]
+        codes[(confidence < self.min_confidence) | (dist[:, 0] > self.max_distance)] = 0
+        return (codes, confidence) if return_confidence else codes
+
+    def predict(self, landmarks):
+        """Labels for a batch of frames as an object array (None = no gesture)."""
+        return np.array(self.labels, dtype=object)[self.predict_codes(landmarks)]
+
+    def recognize_gesture(self, landmarks):
+        """Drop-in for PretrainedSignDetector.recognize_gesture: one frame -> label or None."""
+        if landmarks is None or len(landmarks) != 21:
+            return None
+        return self.labels[int(self.predict_codes(landmarks)[0])]
+
+    def save(self, path):
+        np.savez_compressed(
+            path, points=self.tree.points, codes=self.codes, labels=np.array(self.labels[1:], dtype=str),
+            mean=self.mean, components=self.components,
+            params=np.array([self.k, self.min_confidence, self.max_distance, self.leaf_size], dtype=np.float64))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            k, min_confidence, max_distance, leaf_size = data["params"].tolist()
+            clf = cls(k=int(k), min_confidence=min_confidence, max_distance=max_distance,
+                      leaf_size=int(leaf_size))
+            clf.labels = (None,) + tuple(data["labels"].tolist())
+            clf.codes = data["codes"]
+            clf.mean = data["mean"]
+            clf.components = data["components"]
+            clf.tree = KDTree(data["points"], max(clf.leaf_size, clf.k))
+        return clf
+
+
+def load_csv(path):
+    """
+    Examples from a CSV file with one row per frame: label, x0, y0, z0, ... z20
+    (a header row is allowed, an empty label means "no gesture").
+    Returns (landmarks (N, 21, 3), labels).
+    """
+    landmarks, labels = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) != 64:
+                continue
+            try:
+                values = [float(v) for v in row[1:]]
+            except ValueError:
+                continue  # header
+            labels.append(row[0].strip() or None)
+            landmarks.append(values)
+    return np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3), labels
+
+
+def load_recordings(paths):
+    """
+    Frames with a hand from landmark recordings (see src/recording.py), with
+    their recorded labels (None where no sign was recognized).
+    """
+    from src.recording import LandmarkReplay
+
+    landmarks, labels = [], []
+    for path in paths:
+        replay = LandmarkReplay(path)
+        hand = np.asarray(replay.has_hand)
+        landmarks.append(np.asarray(replay.landmarks[hand]))
+        labels.extend(replay.labels[c] if c >= 0 else None for c in np.asarray(replay.label_codes)[hand])
+    if not landmarks:
+        return np.zeros((0, 21, 3), dtype=np.float32), []
+    return np.concatenate(landmarks), labels
+
+
+# For quick testing: per-frame and batch cost as the vocabulary grows
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(1)
+    # Synthetic signs: a base hand plus a few "joint" directions, like real
+    # poses (which vary along ~20 joint angles, not 63 free coordinates)
+    base = rng.uniform(0.3, 0.7, (21, 3)).astype(np.float32)
+    joints = rng.normal(0, 0.05, (12, 21 * 3)).astype(np.float32)
+    print(f"{'signs':>6}{'examples':>10}{'accuracy':>10}{'1 frame us':>12}{'512 batch us/frame':>20}")
+    for signs in (10, 50, 200, 500):
+        poses = rng.uniform(-1, 1, (signs, len(joints))).astype(np.float32)
+        prototypes = base + (poses @ joints).reshape(signs, 21, 3)
+        per_sign = 40
+        train = np.repeat(prototypes, per_sign, axis=0)
+        train += rng.normal(0, 0.003, train.shape).astype(np.float32)
+        # Random position and distance to the camera must not matter
+        train = train * rng.uniform(0.7, 1.3, (len(train), 1, 1)) + rng.uniform(-0.1, 0.1, (len(train), 1, 3))
+        labels = np.repeat([f"sign{i}" for i in range(signs)], per_sign)
+        clf = LandmarkClassifier().fit(train, labels)
+
+        test_idx = rng.integers(0, signs, 512)
+        test = prototypes[test_idx] + rng.normal(0, 0.003, (512, 21, 3)).astype(np.float32)
+        test = test * 1.1 + 0.05
+        accuracy = float(np.mean(clf.predict(test) == np.array([f"sign{i}" for i in test_idx], dtype=object)))
+
+        start = time.perf_counter()
+        for frame in test[:200]:
+            clf.recognize_gesture(frame)
+        single = (time.perf_counter() - start) / 200 * 1e6
+        start = time.perf_counter()
+        for _ in range(5):
+            clf.predict_codes(test)
+        batch = (time.perf_counter() - start) / (5 * 512) * 1e6
+        print(f"{signs:>6}{len(train):>10}{accuracy:>10.3f}{single:>12.0f}{batch:>20.1f}")
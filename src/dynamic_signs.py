@@ -0,0 +1,541 @@
+"""
+Dynamic (motion) sign recognition.
+
+recognize_gesture() sees one frame, so signs that are defined by how the
+hand moves cannot be told apart from their start or end pose.
+DynamicSignRecognizer keeps a sliding window of the most recent landmark
+frames and matches it against recorded motion templates with dynamic time
+warping (DTW):
+
+- every frame becomes a small feature vector: the wrist path relative to
+  the window's mean position plus the fingertips relative to the wrist,
+  both in palm-size units
+- windows and templates are resampled to a fixed length, so DTW only has
+  to absorb uneven speed within a sign (a Sakoe-Chiba band of `band`
+  steps); the window is as long as each template was when recorded
+- an LB_Keogh lower bound against every template's envelope is computed
+  for all templates at once; templates are then aligned in order of their
+  bound, a batch at a time, and the search stops as soon as the next bound
+  exceeds the best distance found (or max_distance)
+- inside a batch the DTW table is filled one anti-diagonal at a time for
+  every template together; a template is abandoned as soon as the cheapest
+  path so far plus the bound of the remaining rows cannot win
+
+The result is the same nearest template brute-force DTW would find. A
+match is reported for `hold` frames so the GestureManager's stabilizer sees
+it, and runs next to the static recognizer (see
+PretrainedSignDetector.recognize_frame).
+
+Templates are runs of frames with the same label in landmark recordings.
+The live recognizers never predict a sign that has no template yet, so
+record each motion sign under its own name with --label:
+
+    python main_pretrained.py --record wave.lmrec --label wave
+    python -m src.dynamic_signs build wave.lmrec thanks.lmrec --out data/motion_templates.npz
+    python -m src.dynamic_signs check     # record -> build -> recognize on synthetic signs
+    python -m src.dynamic_signs bench     # matches per second vs. template count
+"""
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+from src.classifier import PALM_BASE
+
+FINGERTIPS = (4, 8, 12, 16, 20)
+FEATURES = 2 + 2 * len(FINGERTIPS)
+
+
+def motion_features(landmarks, lengths, length=32):
+    """
+    Features of the last n frames of a window, for every n in lengths at once.
+
+    Per frame: wrist x, y relative to the mean wrist position of those n
+    frames, then fingertip x, y relative to the wrist, all divided by their
+    mean palm size (z is too noisy to help).
+
+    Args:
+        landmarks: array-like of shape (T, 21, 3), newest frame last
+        lengths: Window lengths, each at most T
+        length: Frames every window is linearly resampled to
+
+    Returns:
+        float32 array of shape (len(lengths), length, 12)
+    """
+    lm = np.asarray(landmarks, dtype=np.float32)[:, :, :2]
+    lengths = np.asarray(lengths)
+    wrist = lm[:, 0]
+    palm = np.linalg.norm(lm[:, PALM_BASE] - wrist, axis=1)
+    frame = np.concatenate([wrist, (lm[:, FINGERTIPS] - wrist[:, None]).reshape(len(lm), -1)], axis=1)
+
+    # Means over the last n frames, from cumulative sums of the reversed window
+    mean_wrist = np.cumsum(wrist[::-1], axis=0)[lengths - 1] / lengths[:, None]
+    scale = np.cumsum(palm[::-1])[lengths - 1] / lengths
+    scale[scale < 1e-6] = 1.0
+
+    position = (len(lm) - lengths)[:, None] + np.linspace(0, 1, length) * (lengths - 1)[:, None]
+    lo = position.astype(np.int64)
+    hi = np.minimum(lo + 1, len(lm) - 1)
+    frac = (position - lo)[:, :, None].astype(np.float32)
+    features = frame[lo] * (1 - frac) + frame[hi] * frac
+    features[:, :, :2] -= mean_wrist[:, None]
+    features /= scale[:, None, None].astype(np.float32)
+    return features
+
+
+def envelopes(templates, band):
+    """Upper and lower LB_Keogh envelopes of (M, L, D) templates within +-band steps."""
+    window = 2 * band + 1
+    padded = np.pad(templates, ((0, 0), (band, band), (0, 0)), mode="edge")
+    view = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)
+    return view.max(axis=-1), view.min(axis=-1)
+
+
+def lb_keogh(query, upper, lower):
+    """
+    Per-row LB_Keogh contributions of one (L, D) query against (M, L, D)
+    envelopes: (M, L), whose row sums bound the DTW distance from below.
+    """
+    above = np.maximum(query - upper, 0)
+    below = np.maximum(lower - query, 0)
+    return np.einsum("mld,mld->ml", above, above) + np.einsum("mld,mld->ml", below, below)
+
+
+def _diagonals(length, band):
+    """
+    Flat indices into an (L + 1) x (L + 1) DTW table of the cells of every
+    anti-diagonal inside the band, of their three predecessors and of their
+    (L x L) step costs, plus each cell's row.
+    """
+    width = length + 1
+    diagonals = []
+    for d in range(2, 2 * length + 1):
+        i = np.arange(max(1, d - length), min(length, d - 1) + 1)
+        j = d - i
+        keep = np.abs(i - j) <= band
+        i, j = i[keep], j[keep]
+        cell = i * width + j
+        diagonals.append((cell, cell - width - 1, cell - width, cell - 1, (i - 1) * length + j - 1, i))
+    return diagonals
+
+
+def dtw_batch(queries, templates, band, threshold=np.inf, remaining=None, diagonals=None, check_every=4):
+    """
+    Banded DTW distances (sum of squared steps) between K queries and K
+    templates, each (K, L, D).
+
+    Args:
+        threshold: Distances above this are not needed; templates that
+                   cannot get below it are abandoned and reported as inf
+        remaining: Optional (K, L + 1) lower bounds on the cost of rows
+                   i+1..L (suffix sums of lb_keogh), tightening abandoning
+        diagonals: Precomputed _diagonals(L, band)
+        check_every: Anti-diagonals between abandoning checks
+
+    Returns:
+        float array of shape (K,)
+    """
+    k, length, _ = queries.shape
+    if diagonals is None:
+        diagonals = _diagonals(length, band)
+    qq = np.einsum("kld,kld->kl", queries, queries)
+    tt = np.einsum("kld,kld->kl", templates, templates)
+    cost = qq[:, :, None] + tt[:, None, :] - 2 * queries @ templates.transpose(0, 2, 1)
+    cost = np.maximum(cost, 0).reshape(k, -1)
+    if remaining is None:
+        remaining = np.zeros((k, length + 1), dtype=cost.dtype)
+
+    alive = np.arange(k)
+    table = np.full((k, (length + 1) ** 2), np.inf, dtype=cost.dtype)
+    table[:, 0] = 0
+    result = np.full(k, np.inf)
+    abandon = np.isfinite(threshold)
+    for step, (cell, diag, up, left, steps, row) in enumerate(diagonals):
+        table[:, cell] = cost[:, steps] + np.minimum(np.minimum(table[:, diag], table[:, up]), table[:, left])
+        if abandon and step % check_every == 0 and 0 < step < len(diagonals) - 1:
+            # Every warping path crosses this diagonal or the one before it
+            prev_cell, prev_row = diagonals[step - 1][0], diagonals[step - 1][5]
+            bound = np.minimum((table[:, cell] + remaining[:, row]).min(axis=1),
+                               (table[:, prev_cell] + remaining[:, prev_row]).min(axis=1))
+            keep = bound <= threshold
+            if not keep.all():
+                if not keep.any():
+                    return result
+                alive, table, cost, remaining = alive[keep], table[keep], cost[keep], remaining[keep]
+    result[alive] = table[:, -1]
+    return result
+
+
+class DynamicSignRecognizer:
+    def __init__(self, length=32, band=4, max_distance=None, hold=10, hop=2, batch=16,
+                 length_step=4, durations=(0.8, 1.0, 1.25), coarse_step=4, distance_scale=2.0):
+        """
+        Args:
+            length: Frames every window and template is resampled to
+            band: Sakoe-Chiba band of the warping, in resampled steps
+            max_distance: Windows farther than this from every template are
+                          no sign (default: estimated from the templates)
+            hold: Frames a recognized sign is reported for
+            hop: Match the window every hop frames
+            batch: Templates aligned together per DTW batch
+            length_step: Template durations are rounded to this many frames,
+                         so only a few window lengths are matched per frame
+            durations: Window lengths compared with each template, relative
+                       to its recorded duration (signs are not always made
+                       at the same pace)
+            coarse_step: Rows of the cheap first lower bound, every coarse_step-th
+            distance_scale: max_distance estimate as a multiple of the
+                            typical distance between templates of a sign
+        """
+        self.length = length
+        self.band = band
+        self.max_distance = max_distance
+        self.hold = hold
+        self.hop = hop
+        self.batch = batch
+        self.length_step = length_step
+        self.durations = tuple(durations)
+        self.coarse_step = coarse_step
+        self.distance_scale = distance_scale
+        self.labels = ()
+        self.templates = np.zeros((0, length, FEATURES), dtype=np.float32)
+        self.codes = np.zeros(0, dtype=np.int32)
+        self.frames = np.zeros(0, dtype=np.int32)
+        self._diagonals = _diagonals(length, band)
+        self.reset()
+        self.matches = 0
+        self.aligned = 0
+
+    def reset(self):
+        """Forget the current window (e.g. when the hand left the frame)."""
+        self._window = deque(maxlen=max(self._window_lengths(self.frames.max()), default=1)
+                             if len(self.frames) else 1)
+        self._since_match = 0
+        self._held = None
+        self._hold_left = 0
+
+    def fit(self, sequences, labels):
+        """
+        Args:
+            sequences: Landmark sequences, each of shape (T, 21, 3)
+            labels: One sign label per sequence
+        """
+        if not len(sequences):
+            raise ValueError("No motion templates to fit")
+        names, codes = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        self.labels = tuple(names.tolist())
+        self.codes = codes.astype(np.int32)
+        lengths = np.array([len(s) for s in sequences])
+        self.frames = np.maximum(self.length_step,
+                                 np.round(lengths / self.length_step) * self.length_step).astype(np.int32)
+        self.templates = np.concatenate([motion_features(s, [len(s)], self.length) for s in sequences])
+        self._index()
+        if self.max_distance is None:
+            self.max_distance = self._estimate_max_distance()
+        self.reset()
+        return self
+
+    def _index(self):
+        self._upper, self._lower = envelopes(self.templates, self.band)
+        # Every (template, window length) pair is one candidate alignment
+        windows = [self._window_lengths(n) for n in self.frames]
+        self._window_sizes = np.array(sorted({n for sizes in windows for n in sizes}), dtype=np.int64)
+        slot = {n: i for i, n in enumerate(self._window_sizes.tolist())}
+        self._pair_template = np.array([t for t, sizes in enumerate(windows) for _ in sizes], dtype=np.int64)
+        self._pair_window = np.array([slot[n] for sizes in windows for n in sizes], dtype=np.int64)
+        self._shortest = int(self._window_sizes.min()) if len(self._window_sizes) else 1
+        self._coarse_upper = np.ascontiguousarray(self._upper[self._pair_template, ::self.coarse_step])
+        self._coarse_lower = np.ascontiguousarray(self._lower[self._pair_template, ::self.coarse_step])
+
+    def _window_lengths(self, frames):
+        return sorted({max(2, int(round(frames * d))) for d in self.durations})
+
+    def _estimate_max_distance(self):
+        """distance_scale times the 95th percentile distance from a template to its nearest same-sign one."""
+        nearest = []
+        for code in np.unique(self.codes):
+            idx = np.flatnonzero(self.codes == code)
+            for a in idx if len(idx) > 1 else ():
+                others = idx[idx != a]
+                dist = dtw_batch(np.repeat(self.templates[a:a + 1], len(others), axis=0),
+                                 self.templates[others], self.band, diagonals=self._diagonals)
+                nearest.append(dist.min())
+        if not nearest:
+            return np.inf
+        return self.distance_scale * float(np.percentile(nearest, 95))
+
+    def match(self, window):
+        """
+        Nearest template of a landmark window.
+
+        Args:
+            window: (T, 21, 3) frames, newest last; each template is compared
+                    with the last as many frames as it was long
+
+        Returns:
+            (label or None, distance)
+        """
+        window = np.asarray(window, dtype=np.float32)
+        usable = self._window_sizes <= len(window)
+        if not usable.any():
+            return None, np.inf
+        queries = motion_features(window, self._window_sizes[usable], self.length)
+        if usable.all():
+            index, query_of = self._pair_template, self._pair_window
+        else:
+            keep = usable[self._pair_window]
+            index = self._pair_template[keep]
+            query_of = (np.cumsum(usable) - 1)[self._pair_window[keep]]
+        # Cascade: LB_Keogh on every coarse_step-th row ranks all candidates
+        # (a partial sum is still a lower bound); the full bound and its
+        # per-row suffix sums are only computed for the candidates aligned
+        coarse = slice(None, None, self.coarse_step)
+        if usable.all():
+            upper, lower = self._coarse_upper, self._coarse_lower
+        else:
+            upper, lower = self._coarse_upper[keep], self._coarse_lower[keep]
+        bounds = lb_keogh(queries[:, coarse][query_of], upper, lower).sum(axis=1)
+
+        order = np.argsort(bounds, kind="stable")
+        best, best_at = self.max_distance, -1
+        self.matches += 1
+        for start in range(0, len(order), self.batch):
+            pick = order[start:start + self.batch]
+            pick = pick[bounds[pick] <= best]
+            if not len(pick):
+                break
+            rows = lb_keogh(queries[query_of[pick]], self._upper[index[pick]], self._lower[index[pick]])
+            tight = rows.sum(axis=1) <= best
+            pick, rows = pick[tight], rows[tight]
+            if not len(pick):
+                continue
+            # Bound of the rows after each row, for abandoning inside the DTW
+            remaining = np.zeros((len(pick), self.length + 1), dtype=np.float32)
+            remaining[:, :-1] = np.cumsum(rows[:, ::-1], axis=1)[:, ::-1]
+            self.aligned += len(pick)
+            dist = dtw_batch(queries[query_of[pick]], self.templates[index[pick]], self.band, best,
+                             remaining, self._diagonals)
+            at = int(dist.argmin())
+            if dist[at] <= best:
+                best, best_at = float(dist[at]), int(index[pick[at]])
+        if best_at < 0:
+            return None, np.inf
+        return self.labels[self.codes[best_at]], best
+
+    def update(self, landmarks):
+        """
+        Add one frame (LandmarkFrame / 21 points, or None without a hand).
+
+        Returns:
+            The motion sign that just ended, repeated for `hold` frames, or None
+        """
+        if self._hold_left:
+            self._hold_left -= 1
+            if self._hold_left:
+                return self._held
+        if landmarks is None:
+            self._window.clear()
+            return None
+        self._window.append(np.asarray(landmarks, dtype=np.float32))
+        self._since_match += 1
+        if self._since_match < self.hop or len(self._window) < self._shortest:
+            return None
+        self._since_match = 0
+        label, _ = self.match(np.stack(self._window))
+        if label is None:
+            return None
+        # Start afresh so the same movement is not matched again
+        self._window.clear()
+        self._held, self._hold_left = label, self.hold
+        return label
+
+    def save(self, path):
+        np.savez_compressed(
+            path, templates=self.templates, codes=self.codes, frames=self.frames,
+            labels=np.array(self.labels, dtype=str), durations=np.array(self.durations),
+            params=np.array([self.length, self.band, self.max_distance, self.hold, self.hop,
+                             self.batch, self.length_step], dtype=np.float64))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            length, band, max_distance, hold, hop, batch, length_step = data["params"].tolist()
+            rec = cls(length=int(length), band=int(band), max_distance=max_distance, hold=int(hold),
+                      hop=int(hop), batch=int(batch), length_step=int(length_step),
+                      durations=data["durations"].tolist())
+            rec.templates = data["templates"]
+            rec.codes = data["codes"]
+            rec.frames = data["frames"]
+            rec.labels = tuple(data["labels"].tolist())
+        rec._index()
+        rec.reset()
+        return rec
+
+
+def load_templates(paths, min_frames=8, label=None):
+    """
+    Motion templates from landmark recordings (see src/recording.py): every
+    run of at least min_frames consecutive hand frames with the same label.
+
+    Args:
+        label: Label every run of hand frames with this sign instead,
+               ignoring the recorded labels (for clips of a single sign
+               recorded without --label)
+
+    Returns:
+        (sequences, labels)
+    """
+    from src.recording import LandmarkReplay
+
+    sequences, labels = [], []
+    for path in paths:
+        replay = LandmarkReplay(path)
+        has_hand = np.asarray(replay.has_hand)
+        if label is not None:
+            names, codes = [label], np.where(has_hand, 0, -1)
+        else:
+            names, codes = replay.labels, np.where(has_hand, np.asarray(replay.label_codes), -1)
+        edges = np.flatnonzero(np.diff(codes)) + 1
+        for start, end in zip(np.r_[0, edges], np.r_[edges, len(codes)]):
+            if codes[start] >= 0 and end - start >= min_frames:
+                sequences.append(np.asarray(replay.landmarks[start:end]))
+                labels.append(names[codes[start]])
+    return sequences, labels
+
+
+def synthetic_signs(signs, per_sign, rng, frames=(20, 40)):
+    """
+    Random motion signs for benchmarking: a hand shape moved along a smooth
+    random path, repeated per_sign times at different speeds, sizes and
+    positions. Returns (sequences, labels).
+    """
+    sequences, labels = [], []
+    for s in range(signs):
+        shape = rng.normal(0, 0.04, (21, 3)).astype(np.float32)
+        shape[0] = 0
+        shape[PALM_BASE] = (0, -0.1, 0)
+        keys = rng.normal(0, 0.08, (5, 3)).astype(np.float32)
+        for _ in range(per_sign):
+            n = int(rng.integers(*frames))
+            # Uneven speed: warp time with a random monotone curve
+            t = np.cumsum(rng.uniform(0.5, 1.5, n))
+            t = (t - t[0]) / (t[-1] - t[0]) * (len(keys) - 1)
+            path = np.stack([np.interp(t, np.arange(len(keys)), keys[:, d]) for d in range(3)], axis=1)
+            size, offset = rng.uniform(0.8, 1.2), rng.uniform(0.3, 0.7, 3)
+            seq = offset + size * (shape[None] + path[:, None]) + rng.normal(0, 0.003, (n, 21, 3))
+            sequences.append(seq.astype(np.float32))
+            labels.append(f"sign{s}")
+    return sequences, labels
+
+
+def benchmark(counts=(10, 50, 100, 200, 500), windows=200, seed=1):
+    """Matches per second and pruning as the number of templates grows; checks exactness against brute force."""
+    rng = np.random.default_rng(seed)
+    print(f"{'templates':>10}{'matches/s':>11}{'ms/match':>10}{'aligned':>9}"
+          f"{'brute ms':>10}{'accuracy':>10}{'exact':>7}")
+    for count in counts:
+        per_sign = 5
+        sequences, labels = synthetic_signs(max(1, count // per_sign), per_sign + 1, rng)
+        # The last recording of every sign is held out as a test window
+        test = np.arange(len(labels)) % (per_sign + 1) == per_sign
+        rec = DynamicSignRecognizer().fit([s for s, t in zip(sequences, test) if not t],
+                                          [l for l, t in zip(labels, test) if not t])
+        tests = [(s, l) for s, l, t in zip(sequences, labels, test) if t]
+        queries = []
+        for i in rng.integers(0, len(tests), windows):
+            # Half of the windows hold a sign, the others an unknown movement
+            if len(queries) % 2 == 0:
+                queries.append(tests[i])
+            else:
+                unknown, _ = synthetic_signs(1, 1, rng)
+                queries.append((unknown[0], None))
+
+        rec.matches = rec.aligned = 0
+        start = time.perf_counter()
+        found = [rec.match(window) for window, _ in queries]
+        pruned_s = time.perf_counter() - start
+        aligned = rec.aligned / max(rec.matches, 1) / len(rec.templates)
+
+        start = time.perf_counter()
+        exact = True
+        for (window, _), (label, dist) in zip(queries[:40], found[:40]):
+            best = np.inf
+            for w, n in enumerate(rec._window_sizes.tolist()):
+                idx = rec._pair_template[rec._pair_window == w]
+                if n <= len(window):
+                    query = motion_features(window, [n], rec.length)
+                    d = dtw_batch(np.repeat(query, len(idx), axis=0), rec.templates[idx],
+                                  rec.band, diagonals=rec._diagonals)
+                    best = min(best, float(d.min()))
+            expected = best if best <= rec.max_distance else np.inf
+            exact &= bool(np.isclose(expected, dist, rtol=1e-4) or expected == dist)
+        brute_ms = (time.perf_counter() - start) / 40 * 1e3
+
+        accuracy = np.mean([label == want for (label, _), (_, want) in zip(found, queries)])
+        print(f"{len(rec.templates):>10}{len(queries) / pruned_s:>11.0f}{pruned_s / len(queries) * 1e3:>10.2f}"
+              f"{aligned:>9.1%}{brute_ms:>10.2f}{accuracy:>10.3f}{'yes' if exact else 'NO':>7}")
+
+
+def check(signs=("wave", "thanks"), takes=4, seed=2):
+    """
+    The template workflow end to end: record each motion sign with the
+    recorder's annotation (what --label does), build templates from the
+    recordings, then recognize a held-out take through update().
+    """
+    import os
+    import tempfile
+
+    from src.recording import LandmarkRecorder
+
+    rng = np.random.default_rng(seed)
+    sequences, _ = synthetic_signs(len(signs), takes + 1, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for s, name in enumerate(signs):
+            path = os.path.join(tmp, f"{name}.lmrec")
+            with LandmarkRecorder(path, annotation=name) as recorder:
+                for take in sequences[s * (takes + 1):s * (takes + 1) + takes]:
+                    for frame in take:
+                        recorder.write(frame, label="Hello")   # the prediction is ignored
+                    for _ in range(5):
+                        recorder.write(None)                   # hand lowered between takes
+            paths.append(path)
+        templates, labels = load_templates(paths)
+        rec = DynamicSignRecognizer().fit(templates, labels)
+        rec.save(os.path.join(tmp, "motion_templates.npz"))
+        rec = DynamicSignRecognizer.load(os.path.join(tmp, "motion_templates.npz"))
+    print(f"✓ {len(templates)} templates of {rec.labels}")
+
+    for s, name in enumerate(signs):
+        rec.reset()
+        seen = {rec.update(frame) for frame in sequences[s * (takes + 1) + takes]}
+        seen.update(rec.update(None) for _ in range(rec.hold))
+        found = sorted(label for label in seen if label)
+        print(f"{'✓' if found == [name] else '✗'} held-out {name!r} recognized as {found}")
+
+
+# For quick testing: build templates from recordings, or benchmark on synthetic signs
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Motion sign templates and DTW benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build templates from labelled landmark recordings")
+    build.add_argument("recordings", nargs="+")
+    build.add_argument("--out", default="data/motion_templates.npz")
+    build.add_argument("--min-frames", type=int, default=8, help="shortest labelled run used as a template")
+    build.add_argument("--label", help="label every hand run in the recordings with this sign")
+    sub.add_parser("check", help="record, build and recognize synthetic motion signs end to end")
+    bench = sub.add_parser("bench", help="matches per second vs. template count")
+    bench.add_argument("--counts", type=int, nargs="+", default=[10, 50, 100, 200, 500])
+    args = parser.parse_args()
+
+    if args.command == "build":
+        sequences, labels = load_templates(args.recordings, args.min_frames, args.label)
+        rec = DynamicSignRecognizer().fit(sequences, labels)
+        print(f"✓ {len(sequences)} templates of {len(rec.labels)} signs, max distance {rec.max_distance:.3f}")
+        rec.save(args.out)
+        print(f"✓ Saved motion templates to {args.out}")
+    elif args.command == "check":
+        check()
+    else:
+        benchmark(args.counts)
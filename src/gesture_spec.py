@@ -0,0 +1,329 @@
+"""
+Declarative gesture rules compiled into a finger-bitmask dispatch table.
+
+The signs are defined once in data/gesture_spec.json: a finger pattern
+(thumb..pinky extended / folded / either), optional finger-count bounds and
+named geometric predicates, in priority order. compile_spec() resolves the
+priorities for each of the 32 finger masks ahead of time, so recognizing a
+frame is a table lookup: most masks map straight to a label, and the few
+that depend on geometry (OK needs a pinch, Stop needs the palm up) carry a
+short list of residual predicate checks.
+
+The same table is written to frontend/src/utils/gestureTable.js for the
+browser, and --check proves both runtimes agree on a corpus of frames:
+
+    python -m src.gesture_spec            # regenerate the JS table
+    python -m src.gesture_spec --check    # table up to date + Python/JS parity
+"""
+import json
+import math
+import os
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SPEC_PATH = os.path.join(ROOT, "data", "gesture_spec.json")
+JS_TABLE_PATH = os.path.join(ROOT, "frontend", "src", "utils", "gestureTable.js")
+JS_LOGIC_PATH = os.path.join(ROOT, "frontend", "src", "utils", "gestureLogic.js")
+
+FINGER_TIPS = (8, 12, 16, 20)     # index..pinky tips, compared with
+FINGER_JOINTS = (6, 10, 14, 18)   # their middle joints
+PREDICATE_TYPES = ("distance_below", "above")
+
+
+def finger_mask(lm):
+    """Bit i set when finger i (thumb = 0 ... pinky = 4) is extended, for one frame."""
+    # Thumb: compare tip (4) to base (2), mirrored by hand orientation
+    if lm[5][0] > lm[17][0]:
+        mask = 1 if lm[4][0] > lm[2][0] else 0
+    else:
+        mask = 1 if lm[4][0] < lm[2][0] else 0
+    # Fingers: tip above middle joint (image y grows downwards)
+    if lm[8][1] < lm[6][1]:
+        mask |= 2
+    if lm[12][1] < lm[10][1]:
+        mask |= 4
+    if lm[16][1] < lm[14][1]:
+        mask |= 8
+    if lm[20][1] < lm[18][1]:
+        mask |= 16
+    return mask
+
+
+def finger_masks(lm):
+    """finger_mask for a batch of shape (N, 21, 3)."""
+    x = lm[:, :, 0]
+    y = lm[:, :, 1]
+    thumb = np.where(x[:, 5] > x[:, 17], x[:, 4] > x[:, 2], x[:, 4] < x[:, 2])
+    ext = y[:, list(FINGER_TIPS)] < y[:, list(FINGER_JOINTS)]
+    return thumb.astype(np.int64) | (ext.astype(np.int64) << np.arange(1, 5)).sum(axis=1)
+
+
+def _predicate(spec):
+    """(single-frame function, batch function) for one predicate spec."""
+    kind, a, b = spec["type"], spec["a"], spec["b"]
+    if kind == "distance_below":
+        value = spec["value"]
+
+        def single(lm):
+            pa, pb = lm[a], lm[b]
+            dx, dy, dz = pa[0] - pb[0], pa[1] - pb[1], pa[2] - pb[2]
+            return math.sqrt(dx * dx + dy * dy + dz * dz) < value
+
+        def batch(lm):
+            d = lm[:, a] - lm[:, b]
+            return np.sqrt(d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1] + d[:, 2] * d[:, 2]) < value
+    elif kind == "above":
+        def single(lm):
+            return lm[a][1] < lm[b][1]
+
+        def batch(lm):
+            return lm[:, a, 1] < lm[:, b, 1]
+    else:
+        raise ValueError(f"Unknown predicate type {kind!r} (expected one of {PREDICATE_TYPES})")
+    return single, batch
+
+
+def _matches(gesture, mask):
+    pattern = gesture["fingers"]
+    for i, c in enumerate(pattern):
+        bit = (mask >> i) & 1
+        if (c == "1" and not bit) or (c == "0" and bit):
+            return False
+    count = bin(mask).count("1")
+    return gesture.get("min_count", 0) <= count <= gesture.get("max_count", 5)
+
+
+class GestureTable:
+    """
+    Compiled rules: for every finger mask a default label code plus the
+    residual (code, required predicate bits, forbidden predicate bits)
+    checks that come before it.
+    """
+
+    def __init__(self, labels, predicates, default, residuals, unreachable=()):
+        self.labels = tuple(labels)
+        self.predicates = list(predicates)          # [(name, spec)], bit i = predicate i
+        self.default = list(default)                # 32 label codes
+        self.residuals = [list(r) for r in residuals]
+        self.unreachable = list(unreachable)        # gestures that can never win
+        self._single = [_predicate(spec)[0] for _, spec in self.predicates]
+        self._batch = [_predicate(spec)[1] for _, spec in self.predicates]
+        self._needed = [0] * 32
+        for mask, checks in enumerate(self.residuals):
+            for _, require, forbid in checks:
+                self._needed[mask] |= require | forbid
+
+        # Dense arrays for the batch path; code -1 pads masks with fewer checks
+        depth = max((len(r) for r in self.residuals), default=0)
+        self._default_codes = np.array(self.default, dtype=np.int64)
+        self._res_code = np.full((32, depth), -1, dtype=np.int64)
+        self._res_require = np.zeros((32, depth), dtype=np.int64)
+        self._res_forbid = np.zeros((32, depth), dtype=np.int64)
+        for mask, checks in enumerate(self.residuals):
+            for level, (code, require, forbid) in enumerate(checks):
+                self._res_code[mask, level] = code
+                self._res_require[mask, level] = require
+                self._res_forbid[mask, level] = forbid
+
+    def recognize_code(self, lm):
+        """Label code for one frame of 21 [x, y, z] landmarks."""
+        mask = finger_mask(lm)
+        checks = self.residuals[mask]
+        if checks:
+            bits = 0
+            needed = self._needed[mask]
+            for i, fn in enumerate(self._single):
+                if needed >> i & 1 and fn(lm):
+                    bits |= 1 << i
+            for code, require, forbid in checks:
+                if bits & require == require and not bits & forbid:
+                    return code
+        return self.default[mask]
+
+    def recognize(self, landmarks):
+        """Label (or None) for one frame; None/incomplete landmarks give None."""
+        if landmarks is None or len(landmarks) != 21:
+            return None
+        if hasattr(landmarks, "tolist"):
+            # Plain floats: the scalar rules are several times slower on NumPy elements
+            landmarks = landmarks.tolist()
+        return self.labels[self.recognize_code(landmarks)]
+
+    def codes(self, landmarks):
+        """Label codes for a batch of shape (N, 21, 3)."""
+        lm = np.asarray(landmarks)
+        mask = finger_masks(lm)
+        codes = self._default_codes[mask]
+        if self._res_code.shape[1]:
+            bits = np.zeros(len(lm), dtype=np.int64)
+            for i, fn in enumerate(self._batch):
+                bits |= fn(lm).astype(np.int64) << i
+            # Lowest level last, so the highest-priority passing check wins
+            for level in range(self._res_code.shape[1] - 1, -1, -1):
+                code = self._res_code[mask, level]
+                require = self._res_require[mask, level]
+                hit = (code >= 0) & (bits & require == require) & (bits & self._res_forbid[mask, level] == 0)
+                codes = np.where(hit, code, codes)
+        return codes
+
+    def to_js(self):
+        """Source of the generated frontend/src/utils/gestureTable.js."""
+        # Row comments spell the mask thumb..pinky, like the spec's finger patterns
+        rows = [f"  [{default}, {json.dumps([list(c) for c in checks])}],  // {format(mask, '05b')[::-1]}"
+                for mask, (default, checks) in enumerate(zip(self.default, self.residuals))]
+        predicates = [dict(spec, name=name) for name, spec in self.predicates]
+        return "\n".join([
+            "// Generated from data/gesture_spec.json by `python -m src.gesture_spec`. Do not edit.",
+            "",
+            f"export const LABELS = {json.dumps(list(self.labels))};",
+            "",
+            "// Bit i of a predicate mask is PREDICATES[i]",
+            f"export const PREDICATES = {json.dumps(predicates)};",
+            "",
+            "// Indexed by finger mask (bit 0 = thumb ... bit 4 = pinky; comments read thumb..pinky):",
+            "// [default label code, [[label code, required predicates, forbidden predicates], ...]]",
+            "export const TABLE = [",
+            *rows,
+            "];",
+            "",
+        ])
+
+
+def compile_spec(spec):
+    """Build a GestureTable from a parsed gesture spec."""
+    predicates = list(spec.get("predicates", {}).items())
+    bit = {name: i for i, (name, _) in enumerate(predicates)}
+    for name, p in predicates:
+        _predicate(p)  # validates the type
+
+    labels = [None]
+    gestures = []
+    for g in spec["gestures"]:
+        pattern = g["fingers"]
+        if len(pattern) != 5 or set(pattern) - set("01x"):
+            raise ValueError(f"{g['label']}: fingers must be 5 characters of 0, 1 or x, got {pattern!r}")
+        require = forbid = 0
+        for name in g.get("require", []):
+            negate = name.startswith("!")
+            name = name.lstrip("!")
+            if name not in bit:
+                raise ValueError(f"{g['label']}: unknown predicate {name!r}")
+            if negate:
+                forbid |= 1 << bit[name]
+            else:
+                require |= 1 << bit[name]
+        if g["label"] not in labels:
+            labels.append(g["label"])
+        gestures.append((g, labels.index(g["label"]), require, forbid))
+
+    default, residuals, winners = [], [], set()
+    for mask in range(32):
+        checks = []
+        fallback = 0
+        for i, (g, code, require, forbid) in enumerate(gestures):
+            if not _matches(g, mask):
+                continue
+            winners.add(i)
+            if require or forbid:
+                checks.append((code, require, forbid))
+            else:
+                fallback = code
+                break
+        default.append(fallback)
+        residuals.append(checks)
+    unreachable = [g["label"] for i, (g, *_) in enumerate(gestures) if i not in winners]
+    return GestureTable(labels, predicates, default, residuals, unreachable)
+
+
+def load_table(path=SPEC_PATH):
+    with open(path, encoding="utf-8") as f:
+        return compile_spec(json.load(f))
+
+
+def parity_corpus(n=20000, seed=0):
+    """
+    Landmark frames for the Python/JS parity check: random hands, plus
+    frames pushed onto the predicate boundaries (near-pinches, palm level
+    with the wrist) where the two runtimes are most likely to disagree.
+    """
+    rng = np.random.default_rng(seed)
+    lm = rng.uniform(0, 1, (n, 21, 3))
+    lm[:, :, 2] *= 0.2
+    near = n // 4
+    lm[:near, 8] = lm[:near, 4] + rng.uniform(-0.05, 0.05, (near, 3))
+    level = slice(near, 2 * near)
+    lm[level, 9, 1] = lm[level, 0, 1] + rng.choice([-1e-9, 0.0, 1e-9], near)
+    return lm
+
+
+def js_labels(landmarks, logic_path=JS_LOGIC_PATH):
+    """Run the frontend's recognizeGesture under node on every frame."""
+    import subprocess
+    from pathlib import Path
+
+    script = (
+        f"import {{ recognizeGesture }} from '{Path(logic_path).resolve().as_uri()}';\n"
+        "let input = '';\n"
+        "process.stdin.on('data', (chunk) => { input += chunk; });\n"
+        "process.stdin.on('end', () => {\n"
+        "  const frames = JSON.parse(input).map((f) => f.map(([x, y, z]) => ({ x, y, z })));\n"
+        "  process.stdout.write(JSON.stringify(frames.map(recognizeGesture)));\n"
+        "});\n"
+    )
+    result = subprocess.run(["node", "--input-type=module", "-e", script],
+                            input=json.dumps(np.asarray(landmarks, dtype=np.float64).tolist()),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from collections import Counter
+
+    parser = argparse.ArgumentParser(description="Compile data/gesture_spec.json")
+    parser.add_argument("--check", action="store_true",
+                        help="verify the JS table is up to date and that Python and JS agree")
+    parser.add_argument("--frames", type=int, default=20000, help="random frames in the parity corpus")
+    parser.add_argument("--recording", action="append", default=[], metavar="PATH",
+                        help="also check the frames of a landmark recording")
+    args = parser.parse_args()
+
+    table = load_table()
+    for label in table.unreachable:
+        print(f"Warning: '{label}' can never be recognized (earlier gestures always win)")
+    source = table.to_js()
+
+    if not args.check:
+        with open(JS_TABLE_PATH, "w", encoding="utf-8", newline="\n") as f:
+            f.write(source)
+        print(f"✓ Wrote {os.path.relpath(JS_TABLE_PATH, ROOT)} "
+              f"({sum(map(len, table.residuals))} residual checks over 32 finger masks)")
+        sys.exit(0)
+
+    with open(JS_TABLE_PATH, encoding="utf-8") as f:
+        if f.read() != source:
+            sys.exit(f"{os.path.relpath(JS_TABLE_PATH, ROOT)} is out of date; run python -m src.gesture_spec")
+
+    frames = [parity_corpus(args.frames)]
+    for path in args.recording:
+        from src.recording import LandmarkReplay
+        replay = LandmarkReplay(path)
+        frames.append(np.asarray(replay.landmarks[np.asarray(replay.has_hand)], dtype=np.float64))
+    frames = np.concatenate(frames)
+
+    import shutil
+    if not shutil.which("node"):
+        sys.exit("node is needed to run the JS side of the parity check")
+    py_single = [table.recognize(frame.tolist()) for frame in frames]
+    py_batch = np.array(table.labels, dtype=object)[table.codes(frames)].tolist()
+    js = js_labels(frames)
+    mismatches = [i for i in range(len(frames)) if not py_single[i] == py_batch[i] == js[i]]
+    if mismatches:
+        i = mismatches[0]
+        sys.exit(f"{len(mismatches)} of {len(frames)} frames disagree, e.g. frame {i}: "
+                 f"python {py_single[i]!r}, batch {py_batch[i]!r}, js {js[i]!r}")
+    counts = Counter(label or "-" for label in js)
+    print(f"✓ Python (per frame and batch) and JS agree on {len(frames)} frames: "
+          + ", ".join(f"{label} {n}" for label, n in counts.most_common()))
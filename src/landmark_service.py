@@ -0,0 +1,355 @@
+"""
+Landmark classification service for browser and kiosk clients.
+
+Clients run MediaPipe themselves and send only the 21 hand landmarks per
+frame. The service classifies frames from all clients together in
+micro-batches through the vectorized rule cascade, and keeps each session's
+GestureManager (stabilizer, cooldown, sentence) on the server, so every
+client gets the same constants and rules as the desktop app.
+
+WebSocket  /ws?session=<id>
+    -> {"seq": 1, "t": 12.34, "landmarks": [[x, y, z] * 21] | [{x, y, z} * 21] | null}
+    <- {"seq": 1, "prediction": "Peace", "stabilized": "Peace", "word": null,
+        "sentence": ["Hello"], "completed": null}
+    -> {"type": "reset"}                  clears the session's sentence
+
+HTTP
+    POST /classify   {"session": id, "frames": [{"t": ..., "landmarks": ...}, ...]}
+    GET  /health     GET /metrics    GET /metrics.json
+
+Run with `python serve_landmarks.py`; load test with `python loadtest_landmarks.py`.
+"""
+import asyncio
+import json
+import time
+import uuid
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from src import websocket
+from src.metrics import Metrics
+from src.utils import GestureManager
+
+# Largest /classify request body accepted
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
+def _classifier(classifier=None):
+    if classifier is not None:
+        return classifier.predict_codes, classifier.labels
+    # Imported on first use so the module can be loaded without MediaPipe set up
+    from src.pretrained_detector import GESTURE_LABELS, PretrainedSignDetector
+    return PretrainedSignDetector.recognize_gesture_codes, GESTURE_LABELS
+
+
+def parse_landmarks(data):
+    """Landmarks from JSON (21 [x, y, z] lists, 21 {x, y, z} objects or 63 numbers) as (21, 3) float32."""
+    if data is None:
+        return None
+    if data and isinstance(data[0], dict):
+        data = [(p["x"], p["y"], p.get("z", 0.0)) for p in data]
+    arr = np.asarray(data, dtype=np.float32)
+    if arr.size != 63:
+        raise ValueError(f"expected 21 landmarks, got {arr.size // 3 if arr.size % 3 == 0 else arr.shape}")
+    return arr.reshape(21, 3)
+
+
+class Session:
+    __slots__ = ("id", "manager", "last_seen", "frames")
+
+    def __init__(self, session_id, manager):
+        self.id = session_id
+        self.manager = manager
+        self.last_seen = time.monotonic()
+        self.frames = 0
+
+
+class _Pending:
+    __slots__ = ("session", "seq", "timestamp", "landmarks", "future", "arrival")
+
+    def __init__(self, session, seq, timestamp, landmarks, future, arrival):
+        self.session = session
+        self.seq = seq
+        self.timestamp = timestamp
+        self.landmarks = landmarks
+        self.future = future
+        self.arrival = arrival
+
+
+class MicroBatcher:
+    """
+    Collects frames from all sessions and classifies them together.
+
+    A batch is flushed when it reaches max_batch frames or when its oldest
+    frame would otherwise exceed the latency budget (minus the time a batch
+    usually takes to process). Frames are handled in arrival order, so each
+    session's GestureManager sees its frames in the order they were sent.
+    """
+
+    def __init__(self, latency_budget=0.005, max_batch=512, metrics=None, classifier=None):
+        """
+        Args:
+            latency_budget: Seconds a frame may wait in the batcher
+            max_batch: Frames classified in one call at most
+            metrics: Optional Metrics registry
+            classifier: Optional trained LandmarkClassifier (default: rule cascade)
+        """
+        self.latency_budget = latency_budget
+        self.max_batch = max_batch
+        self.metrics = metrics
+        self._items = []
+        self._has_items = asyncio.Event()
+        self._full = asyncio.Event()
+        self._process_estimate = 0.0
+        self._recognize_codes, labels = _classifier(classifier)
+        self._labels = np.array(labels, dtype=object)
+
+    def submit(self, session, seq, timestamp, landmarks):
+        """Queue one frame; returns a future resolving to the reply dict."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append(_Pending(session, seq, timestamp, landmarks, future, loop.time()))
+        self._has_items.set()
+        if len(self._items) >= self.max_batch:
+            self._full.set()
+        return future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._items:
+                self._has_items.clear()
+                await self._has_items.wait()
+            # Wait for more frames while the oldest one can still afford it
+            wait = self._items[0].arrival + self.latency_budget - self._process_estimate - loop.time()
+            if wait > 0 and len(self._items) < self.max_batch:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._items[:self.max_batch]
+            del self._items[:self.max_batch]
+            start = time.perf_counter()
+            try:
+                self._process(batch, loop.time())
+            except Exception as e:
+                # Fail this batch's frames, keep serving the next ones
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                if self.metrics:
+                    self.metrics.inc("service_errors")
+            elapsed = time.perf_counter() - start
+            self._process_estimate = 0.9 * self._process_estimate + 0.1 * elapsed
+
+    def _process(self, batch, now):
+        hands = [i for i, item in enumerate(batch) if item.landmarks is not None]
+        predictions = np.full(len(batch), None, dtype=object)
+        if hands:
+            codes = self._recognize_codes(np.stack([batch[i].landmarks for i in hands]))
+            predictions[hands] = self._labels[codes]
+
+        for item, prediction in zip(batch, predictions):
+            manager = item.session.manager
+            stabilized = manager.update(prediction)
+            word = manager.get_final_word(stabilized, timestamp=item.timestamp)
+            completed = manager.should_finalize_sentence()
+            item.session.frames += 1
+            if not item.future.done():
+                item.future.set_result({
+                    "seq": item.seq,
+                    "prediction": prediction,
+                    "stabilized": stabilized,
+                    "word": word,
+                    "sentence": list(manager.sentence),
+                    "completed": completed,
+                })
+
+        if self.metrics:
+            self.metrics.inc("service_frames", len(batch))
+            self.metrics.inc("service_batches")
+            for item in batch:
+                self.metrics.observe("service_queue", now - item.arrival)
+
+
+class LandmarkService:
+    def __init__(self, latency_budget=0.005, max_batch=512, session_ttl=300.0,
+                 manager_factory=GestureManager, metrics=None, classifier=None):
+        """
+        Args:
+            latency_budget: Seconds a frame may wait to be batched with others
+            max_batch: Largest batch classified at once
+            session_ttl: Seconds of inactivity before a session's state is dropped
+            manager_factory: Callable creating each session's GestureManager
+            metrics: Metrics registry (created if not given)
+            classifier: Optional trained LandmarkClassifier (default: rule cascade)
+        """
+        self.latency_budget = latency_budget
+        self.classifier = classifier
+        self.max_batch = max_batch
+        self.session_ttl = session_ttl
+        self.manager_factory = manager_factory
+        self.metrics = metrics or Metrics()
+        self.sessions = {}
+        self.batcher = None
+        self.server = None
+        self._tasks = []
+
+    def session(self, session_id=None):
+        session_id = session_id or uuid.uuid4().hex
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = Session(session_id, self.manager_factory())
+        session.last_seen = time.monotonic()
+        return session
+
+    @staticmethod
+    def _parse_frame(message):
+        """(seq, timestamp, landmarks) of one frame message; raises ValueError/TypeError/KeyError."""
+        if not isinstance(message, dict):
+            raise ValueError(f"expected a JSON object, got {type(message).__name__}")
+        landmarks = parse_landmarks(message.get("landmarks"))
+        timestamp = message.get("t")
+        timestamp = float(timestamp) if timestamp is not None else time.time()
+        return message.get("seq"), timestamp, landmarks
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.batcher = MicroBatcher(self.latency_budget, self.max_batch, self.metrics, self.classifier)
+        self.metrics.gauge("service_sessions", lambda: len(self.sessions))
+        self.metrics.gauge("service_pending", lambda: len(self.batcher._items))
+        self._tasks = [asyncio.create_task(self.batcher.run()),
+                       asyncio.create_task(self._expire_sessions())]
+        self.server = await asyncio.start_server(self._handle, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _expire_sessions(self):
+        while True:
+            await asyncio.sleep(min(30.0, self.session_ttl))
+            cutoff = time.monotonic() - self.session_ttl
+            for session_id in [k for k, s in self.sessions.items() if s.last_seen < cutoff]:
+                del self.sessions[session_id]
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await websocket.read_http_request(reader)
+            if request is None:
+                return
+            method, target, headers = request
+            url = urlsplit(target)
+            if url.path == "/ws" and websocket.is_upgrade(headers):
+                await websocket.server_handshake(writer, headers)
+                session_id = parse_qs(url.query).get("session", [None])[0]
+                await self._serve_websocket(websocket.WebSocket(reader, writer), session_id)
+            elif method == "POST" and url.path == "/classify":
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, json.dumps({"error": "invalid Content-Length"}),
+                                        "application/json")
+                elif length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, json.dumps(
+                        {"error": f"body larger than {MAX_BODY_BYTES} bytes"}), "application/json")
+                else:
+                    await self._serve_classify(writer, await reader.readexactly(length))
+            elif method == "GET" and url.path == "/health":
+                await self._respond(writer, 200, json.dumps(
+                    {"status": "ok", "sessions": len(self.sessions)}), "application/json")
+            elif method == "GET" and url.path == "/metrics.json":
+                await self._respond(writer, 200, self.metrics.to_json(), "application/json")
+            elif method == "GET" and url.path == "/metrics":
+                await self._respond(writer, 200, self.metrics.to_prometheus(), "text/plain; version=0.0.4")
+            else:
+                await self._respond(writer, 404, json.dumps({"error": "not found"}), "application/json")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            try:
+                await self._respond(writer, 400, json.dumps({"error": "malformed request"}), "application/json")
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body, content_type):
+        data = body.encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}.get(status, "")
+        writer.write((f"HTTP/1.1 {status} {reason}\r\n"
+                      f"Content-Type: {content_type}\r\n"
+                      f"Content-Length: {len(data)}\r\n"
+                      "Access-Control-Allow-Origin: *\r\n"
+                      "Connection: close\r\n\r\n").encode("ascii") + data)
+        await writer.drain()
+
+    async def _serve_classify(self, writer, body):
+        # Validate every frame before submitting any, so a bad request
+        # leaves the session's GestureManager untouched
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                raise ValueError(f"expected a JSON object, got {type(request).__name__}")
+            frames = [self._parse_frame(frame) for frame in request.get("frames", [])]
+        except (ValueError, TypeError, KeyError) as e:
+            await self._respond(writer, 400, json.dumps({"error": str(e)}), "application/json")
+            return
+        session = self.session(request.get("session"))
+        futures = [self.batcher.submit(session, *frame) for frame in frames]
+        try:
+            results = await asyncio.gather(*futures)
+        except Exception as e:
+            await self._respond(writer, 500, json.dumps({"error": str(e)}), "application/json")
+            return
+        await self._respond(writer, 200, json.dumps({"session": session.id, "results": results}),
+                            "application/json")
+
+    async def _serve_websocket(self, ws, session_id):
+        session = self.session(session_id)
+        await ws.send(json.dumps({"type": "session", "session": session.id}))
+        replies = asyncio.Queue()
+        sender = asyncio.create_task(self._send_replies(ws, replies))
+        self.metrics.inc("service_connections")
+        try:
+            while True:
+                data = await ws.recv()
+                session.last_seen = time.monotonic()
+                try:
+                    message = json.loads(data)
+                except ValueError as e:
+                    await ws.send(json.dumps({"error": f"invalid JSON: {e}"}))
+                    continue
+                if isinstance(message, dict) and message.get("type") == "reset":
+                    session.manager = self.manager_factory()
+                    continue
+                try:
+                    seq, timestamp, landmarks = self._parse_frame(message)
+                except (ValueError, TypeError, KeyError) as e:
+                    seq = message.get("seq") if isinstance(message, dict) else None
+                    await ws.send(json.dumps({"seq": seq, "error": str(e)}))
+                    continue
+                replies.put_nowait((seq, self.batcher.submit(session, seq, timestamp, landmarks)))
+        except websocket.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            await ws.close()
+
+    async def _send_replies(self, ws, replies):
+        # Replies go out in the order the frames arrived
+        while True:
+            seq, future = await replies.get()
+            try:
+                reply = await future
+            except Exception as e:
+                reply = {"seq": seq, "error": str(e)}
+            await ws.send(json.dumps(reply))
@@ -0,0 +1,184 @@
+"""
+Compact per-frame hand landmarks.
+
+LandmarkFrame holds one hand's 21 landmarks as a contiguous (21, 3) float32
+array, plus what MediaPipe reports alongside them: handedness and its score,
+the capture timestamp and the world landmarks (metres, relative to the hand
+centre). It still behaves like the list of 21 [x, y, z] points it replaces
+(len, indexing, iteration, truthiness) and converts to NumPy without a copy,
+so the detector, recognizers, motion-gating scheduler, recorder and batch
+APIs all pass the same object along.
+
+decode_landmarks() reads a MediaPipe landmark list in one step. Every
+landmark serializes to a fixed-size protobuf record (tag, length, then x, y
+and z as little-endian float32 behind one tag byte each), so the coordinates
+are a strided view of SerializeToString() and no per-point Python objects
+are made. Any other layout falls back to reading the fields one by one.
+
+    python -m src.landmarks    # decode cost vs. building lists
+"""
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+
+def _wire_layout(length):
+    """Expected tag bytes of each record when a landmark serializes to `length` bytes."""
+    stride = length + 2
+    return stride, (
+        (0, b"\x0a" * NUM_LANDMARKS),               # field 1 (landmark), length-delimited
+        (1, bytes([length]) * NUM_LANDMARKS),
+        (2, b"\x0d" * NUM_LANDMARKS),               # x: field 1, fixed32
+        (7, b"\x15" * NUM_LANDMARKS),               # y: field 2
+        (12, b"\x1d" * NUM_LANDMARKS),              # z: field 3
+    )
+
+
+# x, y, z, optionally followed by visibility and presence
+_LAYOUTS = dict(_wire_layout(length) for length in (15, 20, 25))
+_FLOAT32_LE = np.dtype("<f4")
+
+
+def decode_landmarks(message, out=None):
+    """
+    (21, 3) float32 coordinates of a MediaPipe NormalizedLandmarkList or
+    LandmarkList, written into out if given.
+    """
+    serialize = getattr(message, "SerializeToString", None)
+    data = serialize() if serialize is not None else b""
+    stride, checks = len(data) // NUM_LANDMARKS, None
+    if data and len(data) % NUM_LANDMARKS == 0:
+        checks = _LAYOUTS.get(stride)
+    if checks and all(data[offset::stride] == expected for offset, expected in checks):
+        # x, y and z start 3, 8 and 13 bytes into each record
+        points = np.ndarray((NUM_LANDMARKS, 3), _FLOAT32_LE, data, 3, (stride, 5))
+    else:
+        points = np.array([[p.x, p.y, p.z] for p in message.landmark], dtype=np.float32)
+    if out is None:
+        return np.ascontiguousarray(points, dtype=np.float32)
+    out[...] = points
+    return out
+
+
+class LandmarkFrame:
+    __slots__ = ("points", "timestamp", "handedness", "score", "_world")
+
+    def __init__(self, points, timestamp=None, handedness=None, score=None, world=None):
+        """
+        Args:
+            points: (21, 3) landmarks (kept without copying when already float32)
+            timestamp: Capture time in seconds
+            handedness: "Left", "Right" or None
+            score: Handedness confidence
+            world: (21, 3) world landmarks, or the MediaPipe message to decode
+                   them from on first access
+        """
+        self.points = np.ascontiguousarray(points, dtype=np.float32).reshape(NUM_LANDMARKS, 3)
+        self.timestamp = timestamp
+        self.handedness = handedness
+        self.score = score
+        self._world = world
+
+    @classmethod
+    def from_mediapipe(cls, results, index=0, timestamp=None, out=None):
+        """
+        The index-th hand of a Hands.process() result, or None if there is no
+        such hand. With out, the coordinates are written into that (21, 3)
+        float32 array and the frame is a view of it.
+        """
+        hands = results.multi_hand_landmarks if results else None
+        if not hands or index >= len(hands):
+            return None
+        points = decode_landmarks(hands[index], out)
+        handedness = score = None
+        if results.multi_handedness:
+            classification = results.multi_handedness[index].classification[0]
+            handedness, score = classification.label, classification.score
+        world = getattr(results, "multi_hand_world_landmarks", None)
+        return cls(points, timestamp, handedness, score, world[index] if world else None)
+
+    @property
+    def world(self):
+        """World landmarks in metres as a (21, 3) float32 array, or None."""
+        if self._world is not None and not isinstance(self._world, np.ndarray):
+            self._world = decode_landmarks(self._world)
+        return self._world
+
+    def with_points(self, points, timestamp=None):
+        """Same hand, different coordinates (e.g. extrapolated landmarks)."""
+        if timestamp is None:
+            timestamp = self.timestamp
+        return LandmarkFrame(points, timestamp, self.handedness, self.score)
+
+    def copy(self):
+        world = self._world.copy() if isinstance(self._world, np.ndarray) else self._world
+        return LandmarkFrame(self.points.copy(), self.timestamp, self.handedness, self.score, world)
+
+    def tolist(self):
+        return self.points.tolist()
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is not None and np.dtype(dtype) != self.points.dtype:
+            return self.points.astype(dtype)
+        return self.points.copy() if copy else self.points
+
+    def __len__(self):
+        return NUM_LANDMARKS
+
+    def __getitem__(self, index):
+        return self.points[index]
+
+    def __iter__(self):
+        return iter(self.points)
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return (f"LandmarkFrame(handedness={self.handedness!r}, score={self.score}, "
+                f"timestamp={self.timestamp}, wrist={self.points[0].tolist()})")
+
+
+def stack_frames(frames, out=None):
+    """
+    Batch a sequence of LandmarkFrames (or None for frames without a hand)
+    for the batch APIs.
+
+    Returns:
+        (landmarks, has_hand): float32 array of shape (N, 21, 3) with zeros
+        where there was no hand, and the matching bool mask
+    """
+    frames = list(frames)
+    landmarks = out if out is not None else np.empty((len(frames), NUM_LANDMARKS, 3), dtype=np.float32)
+    has_hand = np.zeros(len(frames), dtype=bool)
+    for i, frame in enumerate(frames):
+        if frame is None:
+            landmarks[i] = 0
+        else:
+            landmarks[i] = frame.points if isinstance(frame, LandmarkFrame) else frame
+            has_hand[i] = True
+    return landmarks, has_hand
+
+
+# For quick testing: decode cost of one hand vs. building [x, y, z] lists
+if __name__ == "__main__":
+    import timeit
+
+    from src.pretrained_detector import load_mediapipe
+
+    load_mediapipe()
+    from mediapipe.framework.formats import landmark_pb2
+
+    message = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in np.random.default_rng(0).uniform(size=(NUM_LANDMARKS, 3)):
+        point = message.landmark.add()
+        point.x, point.y, point.z = x, y, z
+
+    as_lists = [[p.x, p.y, p.z] for p in message.landmark]
+    assert np.array_equal(decode_landmarks(message), np.array(as_lists, dtype=np.float32))
+    out = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+    for name, fn in (("lists of [x, y, z]", lambda: [[p.x, p.y, p.z] for p in message.landmark]),
+                     ("decode_landmarks", lambda: decode_landmarks(message)),
+                     ("decode_landmarks(out=)", lambda: decode_landmarks(message, out))):
+        seconds = min(timeit.repeat(fn, number=20000, repeat=3)) / 20000
+        print(f"{name:<24}{seconds * 1e6:8.2f} us")
@@ -0,0 +1,252 @@
+"""
+Lightweight live metrics for the detection pipeline.
+
+Per-stage rolling latency histograms, counters and gauges, exportable as JSON
+or Prometheus text, optionally served over a local HTTP endpoint:
+
+    metrics = Metrics()
+    metrics.gauge("speech_queue_depth", voice.speech_queue.qsize)
+    server = MetricsServer(metrics, port=9100).start()
+
+    start = time.perf_counter()
+    ...
+    metrics.observe("inference", time.perf_counter() - start)
+    metrics.inc("frames")
+
+Recording an observation is a bisect plus a few integer increments, so the
+per-frame cost stays in the low microseconds.
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency bucket upper bounds in seconds (0.5 ms .. 5 s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.015, 0.02, 0.033, 0.05,
+                   0.075, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+
+class RollingHistogram:
+    """
+    Fixed-bucket latency histogram.
+
+    Quantiles are computed over a rolling window (the current plus the previous
+    window_seconds period), while lifetime totals are kept for Prometheus,
+    whose histogram counters must never decrease.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window_seconds=60.0):
+        self.buckets = tuple(buckets)
+        self.window_seconds = window_seconds
+        size = len(self.buckets) + 1  # last slot is +Inf
+        self._current = [0] * size
+        self._previous = [0] * size
+        self._current_sum = 0.0
+        self._previous_sum = 0.0
+        self._window_start = time.monotonic()
+        self.total_counts = [0] * size
+        self.total_sum = 0.0
+        self.total_count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.buckets, seconds)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._window_start >= self.window_seconds:
+                self._rotate(now)
+            self._current[index] += 1
+            self._current_sum += seconds
+            self.total_counts[index] += 1
+            self.total_sum += seconds
+            self.total_count += 1
+
+    def _rotate(self, now):
+        # A gap longer than two windows leaves nothing worth keeping
+        stale = now - self._window_start >= 2 * self.window_seconds
+        self._previous = [0] * len(self._current) if stale else self._current
+        self._previous_sum = 0.0 if stale else self._current_sum
+        self._current = [0] * len(self._previous)
+        self._current_sum = 0.0
+        self._window_start = now
+
+    def _window_counts(self):
+        with self._lock:
+            counts = [a + b for a, b in zip(self._current, self._previous)]
+            total = self._current_sum + self._previous_sum
+        return counts, total
+
+    def quantile(self, q, counts=None):
+        """Approximate quantile in seconds, interpolated inside the bucket."""
+        if counts is None:
+            counts, _ = self._window_counts()
+        n = sum(counts)
+        if n == 0:
+            return 0.0
+        target = q * n
+        cumulative = 0
+        for i, c in enumerate(counts):
+            if c and cumulative + c >= target:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - cumulative) / c
+            cumulative += c
+        return self.buckets[-1]
+
+    def snapshot(self):
+        counts, total = self._window_counts()
+        n = sum(counts)
+        return {
+            "count": n,
+            "mean_ms": round(1000.0 * total / n, 3) if n else 0.0,
+            "p50_ms": round(1000.0 * self.quantile(0.50, counts), 3),
+            "p95_ms": round(1000.0 * self.quantile(0.95, counts), 3),
+            "p99_ms": round(1000.0 * self.quantile(0.99, counts), 3),
+        }
+
+
+class Metrics:
+    """Registry of stage histograms, counters and gauges."""
+
+    def __init__(self, namespace="signtowords", window_seconds=60.0):
+        self.namespace = namespace
+        self.window_seconds = window_seconds
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, stage):
+        hist = self.stages.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self.stages.setdefault(stage, RollingHistogram(window_seconds=self.window_seconds))
+        return hist
+
+    def observe(self, stage, seconds):
+        """Record one latency sample (in seconds) for a pipeline stage."""
+        self._histogram(stage).observe(seconds)
+
+    def time(self, stage):
+        """Context manager timing a block: `with metrics.time("render"): ...`"""
+        return _StageTimer(self._histogram(stage))
+
+    def inc(self, name, amount=1):
+        # Counters are only written from one thread per name, so no lock is needed here
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, fn):
+        """Register a callable sampled at export time (e.g. a queue's qsize)."""
+        self.gauges[name] = fn
+
+    def _gauge_values(self):
+        values = {}
+        for name, fn in list(self.gauges.items()):
+            try:
+                values[name] = fn()
+            except Exception:
+                values[name] = None
+        return values
+
+    def snapshot(self):
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "stages": {name: h.snapshot() for name, h in list(self.stages.items())},
+            "counters": dict(self.counters),
+            "gauges": self._gauge_values(),
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_stage_latency_seconds Per-stage processing latency.",
+            f"# TYPE {ns}_stage_latency_seconds histogram",
+        ]
+        for stage, hist in list(self.stages.items()):
+            with hist._lock:
+                counts = list(hist.total_counts)
+                total_sum, total_count = hist.total_sum, hist.total_count
+            cumulative = 0
+            for bound, count in zip(hist.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{ns}_stage_latency_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{ns}_stage_latency_seconds_sum{{stage="{stage}"}} {total_sum}')
+            lines.append(f'{ns}_stage_latency_seconds_count{{stage="{stage}"}} {total_count}')
+
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {ns}_{name}_total counter")
+            lines.append(f"{ns}_{name}_total {value}")
+        for name, value in sorted(self._gauge_values().items()):
+            if value is not None:
+                lines.append(f"# TYPE {ns}_{name} gauge")
+                lines.append(f"{ns}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _StageTimer:
+    __slots__ = ("hist", "start")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.start)
+
+
+class MetricsServer:
+    """
+    Serves a Metrics registry on a local HTTP port from a daemon thread.
+
+    GET /metrics       Prometheus text format
+    GET /metrics.json  JSON snapshot
+    """
+
+    def __init__(self, metrics, host="127.0.0.1", port=9100):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.httpd = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, content_type = metrics.to_json(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass  # Keep the console for the app's own output
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"✓ Metrics available at http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
@@ -0,0 +1,287 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from src.buffers import FrameBuffer, FramePool, read_frame
+from src.sources import frame_times
+
+
+class LatestFrameQueue:
+    """
+    Bounded hand-off between two pipeline stages.
+
+    When the queue is full the oldest item is dropped ("latest frame wins"),
+    so a slow consumer always works on the newest frame instead of a backlog.
+    """
+
+    def __init__(self, maxsize=1, on_drop=None):
+        """
+        Args:
+            maxsize: Items kept before the oldest is dropped
+            on_drop: Optional callback(item) for dropped items, e.g. to recycle buffers
+        """
+        self.maxsize = max(1, maxsize)
+        self.on_drop = on_drop
+        self.dropped = 0
+        self.closed = False
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """Add an item; returns True if an older item had to be dropped."""
+        stale = None
+        with self._cond:
+            dropped = len(self._items) >= self.maxsize
+            if dropped:
+                stale = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+        if dropped and self.on_drop:
+            self.on_drop(stale)
+        return dropped
+
+    def get(self, timeout=None):
+        """Return the next item, or None on timeout / when closed and empty."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self.closed, timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class StageStats:
+    """Throughput and busy time of one pipeline stage over a sliding window."""
+
+    def __init__(self, name, window=60):
+        self.name = name
+        self.frames = 0
+        self.busy_seconds = 0.0
+        self._finished = deque(maxlen=window)
+        self._durations = deque(maxlen=window)
+
+    def record(self, start, end):
+        self.frames += 1
+        self.busy_seconds += end - start
+        self._finished.append(end)
+        self._durations.append(end - start)
+
+    def fps(self):
+        """Completed frames per second over the window."""
+        if len(self._finished) < 2:
+            return 0.0
+        span = self._finished[-1] - self._finished[0]
+        return (len(self._finished) - 1) / span if span > 0 else 0.0
+
+    def avg_ms(self):
+        if not self._durations:
+            return 0.0
+        return 1000.0 * sum(self._durations) / len(self._durations)
+
+    def snapshot(self):
+        return {
+            "stage": self.name,
+            "frames": self.frames,
+            "fps": round(self.fps(), 1),
+            "avg_ms": round(self.avg_ms(), 2),
+        }
+
+
+class PipelineResult:
+    """Everything the render stage needs to draw one processed frame."""
+
+    __slots__ = ("frame_id", "capture_time", "image", "landmarks", "prediction",
+                 "stabilized", "final_word", "sentence")
+
+    def __init__(self, frame_id, capture_time, image, landmarks, prediction,
+                 stabilized, final_word, sentence):
+        self.frame_id = frame_id
+        self.capture_time = capture_time
+        self.image = image
+        self.landmarks = landmarks
+        self.prediction = prediction
+        self.stabilized = stabilized
+        self.final_word = final_word
+        self.sentence = sentence
+
+
+class Pipeline:
+    """
+    Runs capture and MediaPipe inference on their own threads.
+
+    capture thread  -> frames queue  -> inference thread -> results queue -> render (caller)
+
+    Both queues use the "latest frame wins" policy, so inference never
+    processes stale frames and the render stage always shows the newest result.
+    Rendering stays with the caller because cv2.imshow must run on the main thread.
+
+    Frames travel through the stages in buffers from a FramePool; the caller
+    hands each result back with release() once it has been displayed, so the
+    steady state allocates no new frames.
+    """
+
+    def __init__(self, cap, detector, manager, on_word=None, on_sentence=None, queue_size=1,
+                 recorder=None, metrics=None, scheduler=None):
+        """
+        Args:
+            cap: cv2.VideoCapture-like object with read()
+            detector: PretrainedSignDetector
+            manager: GestureManager used for stabilization
+            on_word: callback(word) for every finalized word
+            on_sentence: callback(sentence) for every completed sentence
+            queue_size: capacity of each inter-stage queue
+            recorder: optional LandmarkRecorder fed from the inference thread
+            metrics: optional Metrics registry receiving stage latencies and counters
+            scheduler: optional MotionGatedScheduler that skips inference on steady frames
+        """
+        self.cap = cap
+        self.detector = detector
+        self.manager = manager
+        self.on_word = on_word
+        self.on_sentence = on_sentence
+        self.recorder = recorder
+        self.metrics = metrics
+        self.scheduler = scheduler
+
+        self.pool = FramePool(max_free=2 * queue_size + 3)
+        self.frames = LatestFrameQueue(queue_size, on_drop=lambda item: self.pool.release(item[2]))
+        self.results = LatestFrameQueue(queue_size, on_drop=self.release)
+
+        self.capture_stats = StageStats("capture")
+        self.inference_stats = StageStats("inference")
+        self.render_stats = StageStats("render")
+
+        self.running = False
+        self.capture_failed = False
+        self._threads = []
+
+    def start(self):
+        self.running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.frames.close()
+        self.results.close()
+        for t in self._threads:
+            t.join(timeout=1.0)
+
+    def get_result(self, timeout=None):
+        """Latest inference result, or None if nothing new arrived in time."""
+        return self.results.get(timeout)
+
+    def release(self, result):
+        """Return a displayed result's frame buffer to the pool."""
+        self.pool.release(result.image)
+        result.image = None
+
+    def record_render(self, start, end):
+        """Called by the render stage after each displayed frame."""
+        self.render_stats.record(start, end)
+        if self.metrics:
+            self.metrics.observe("render", end - start)
+
+    def stats(self):
+        """Per-stage throughput plus queue drops, to locate the bottleneck."""
+        stages = [s.snapshot() for s in
+                  (self.capture_stats, self.inference_stats, self.render_stats)]
+        stages[0]["dropped"] = self.frames.dropped
+        stages[1]["dropped"] = self.results.dropped
+        return stages
+
+    def bottleneck(self):
+        """Name of the stage with the highest average busy time."""
+        stages = (self.capture_stats, self.inference_stats, self.render_stats)
+        return max(stages, key=lambda s: s.avg_ms()).name
+
+    def _capture_loop(self):
+        frame_id = 0
+        raw = FrameBuffer()
+        while self.running:
+            start = time.perf_counter()
+            success, img = read_frame(self.cap, raw)
+            if not success:
+                print("Warning: Failed to read frame from camera")
+                self.capture_failed = True
+                self.running = False
+                break
+            # The flipped frame outlives this loop iteration, so it comes from the pool
+            img = cv2.flip(img, 1, dst=self.pool.acquire(img.shape, img.dtype))
+            frame_id += 1
+            dropped = self.frames.put((frame_id, frame_times(self.cap)[0], img))
+            end = time.perf_counter()
+            self.capture_stats.record(start, end)
+            if self.metrics:
+                self.metrics.observe("capture", end - start)
+                self.metrics.inc("frames")
+                if dropped:
+                    self.metrics.inc("frames_dropped")
+        self.frames.close()
+
+    def _inference_loop(self):
+        while self.running or len(self.frames):
+            item = self.frames.get(timeout=0.1)
+            if item is None:
+                if self.frames.closed:
+                    break
+                continue
+            start = time.perf_counter()
+            frame_id, capture_time, img = item
+
+            # find_hands draws on the frame in place; it is only used for display from here on
+            scheduler = self.scheduler
+            inferred = scheduler is None or scheduler.should_infer(scheduler.frame_motion(img))
+            if inferred:
+                img = self.detector.find_hands(img)
+                landmarks = self.detector.get_landmarks(img)
+            else:
+                self.detector.draw_results(img)
+                landmarks = scheduler.skipped_landmarks()
+            prediction = self.detector.recognize_frame(landmarks)
+            if scheduler:
+                if inferred:
+                    scheduler.record_inference(landmarks, prediction, time.perf_counter() - start)
+                else:
+                    scheduler.record_skip(prediction)
+                    if self.metrics:
+                        self.metrics.inc("inference_skipped")
+            if self.recorder:
+                self.recorder.write(landmarks, capture_time, label=prediction)
+
+            # capture_time is wall-clock; the manager traces in perf_counter time
+            captured = time.perf_counter() - (time.time() - capture_time)
+            stabilized = self.manager.update(prediction, captured=captured)
+            final_word = self.manager.get_final_word(stabilized)
+            if final_word and self.on_word:
+                self.on_word(final_word)
+            sentence = self.manager.should_finalize_sentence()
+            if sentence and self.on_sentence:
+                self.on_sentence(sentence)
+
+            self.results.put(PipelineResult(
+                frame_id, capture_time, img, landmarks, prediction,
+                stabilized, final_word, list(self.manager.sentence),
+            ))
+            end = time.perf_counter()
+            self.inference_stats.record(start, end)
+            if self.metrics:
+                self.metrics.observe("inference", end - start)
+                if not landmarks:
+                    self.metrics.inc("frames_no_hand")
+        self.results.close()
@@ -1,37 +1,67 @@
 import cv2
 import numpy as np
-from collections import Counter
+import threading
 import time
-import sys
 
-# ULTRA-ROBUST MEDIAPIPE IMPORT
-# This tries multiple paths to find the hands and drawing modules
-try:
-    import mediapipe as mp
-    
-    # Try different import paths for version compatibility (0.10.x)
-    try:
-        from mediapipe.python.solutions import hands as mp_hands
-        from mediapipe.python.solutions import drawing_utils as mp_draw
-        from mediapipe.python.solutions import drawing_styles as mp_drawing_styles
-        print("✓ MediaPipe loaded via path A")
-    except (ImportError, ModuleNotFoundError):
+from src.stabilizer import Stabilizer, MajorityVote
+from src.buffers import FrameBuffer
+from src.gesture_spec import load_table
+from src.landmarks import LandmarkFrame
+
+_mediapipe = None
+_mediapipe_lock = threading.Lock()
+
+
+def load_mediapipe():
+    """
+    Import the MediaPipe hands and drawing modules on first use.
+
+    MediaPipe takes most of a second to import, so it is only loaded when a
+    detector is created; the rule-based classifier below works without it.
+    Returns (hands, drawing_utils, drawing_styles).
+    """
+    global _mediapipe
+    with _mediapipe_lock:
+        if _mediapipe is not None:
+            return _mediapipe
+
+        # ULTRA-ROBUST MEDIAPIPE IMPORT
+        # This tries multiple paths to find the hands and drawing modules
         try:
-            import mediapipe.solutions.hands as mp_hands
-            import mediapipe.solutions.drawing_utils as mp_draw
-            import mediapipe.solutions.drawing_styles as mp_drawing_styles
-            print("✓ MediaPipe loaded via path B")
-        except (ImportError, ModuleNotFoundError):
-            # Fallback for some specific 0.10.x builds
-            import mediapipe.python.solutions.hands as mp_hands
-            import mediapipe.python.solutions.drawing_utils as mp_draw
-            import mediapipe.python.solutions.drawing_styles as mp_drawing_styles
-            print("✓ MediaPipe loaded via path C")
-
-except Exception as e:
-    print(f"CRITICAL ERROR: Could not find MediaPipe. Error: {e}")
-    print("Please run: pip uninstall mediapipe && pip install mediapipe")
-    sys.exit(1)
+            import mediapipe as mp
+
+            # Try different import paths for version compatibility (0.10.x)
+            try:
+                from mediapipe.python.solutions import hands as mp_hands
+                from mediapipe.python.solutions import drawing_utils as mp_draw
+                from mediapipe.python.solutions import drawing_styles as mp_drawing_styles
+                print("✓ MediaPipe loaded via path A")
+            except (ImportError, ModuleNotFoundError):
+                try:
+                    import mediapipe.solutions.hands as mp_hands
+                    import mediapipe.solutions.drawing_utils as mp_draw
+                    import mediapipe.solutions.drawing_styles as mp_drawing_styles
+                    print("✓ MediaPipe loaded via path B")
+                except (ImportError, ModuleNotFoundError):
+                    # Fallback for some specific 0.10.x builds
+                    import mediapipe.python.solutions.hands as mp_hands
+                    import mediapipe.python.solutions.drawing_utils as mp_draw
+                    import mediapipe.python.solutions.drawing_styles as mp_drawing_styles
+                    print("✓ MediaPipe loaded via path C")
+
+        except Exception as e:
+            print(f"CRITICAL ERROR: Could not find MediaPipe. Error: {e}")
+            print("Please run: pip uninstall mediapipe && pip install mediapipe")
+            raise RuntimeError("MediaPipe is not available") from e
+
+        _mediapipe = (mp_hands, mp_draw, mp_drawing_styles)
+        return _mediapipe
+
+# The rules are defined in data/gesture_spec.json and compiled into a
+# finger-bitmask table (see src/gesture_spec.py). Index 0 of the labels means
+# "no gesture"; the batch API returns these as integer codes.
+GESTURES = load_table()
+GESTURE_LABELS = GESTURES.labels
 
 class PretrainedSignDetector:
     """
@@ -39,11 +69,20 @@ class PretrainedSignDetector:
     Compatible with all recent MediaPipe versions.
     """
     
-    def __init__(self):
+    def __init__(self, classifier=None, motion=None, roi=None):
+        """
+        Args:
+            classifier: Optional trained LandmarkClassifier (or the path of a
+                        saved one, see src/classifier.py) used instead of the
+                        rule cascade
+            motion: Optional DynamicSignRecognizer (or the path of saved
+                    motion templates, see src/dynamic_signs.py) that
+                    recognize_frame() runs next to the static recognizer
+            roi: Optional HandROI (see src/roi.py) cropping the frame around
+                 the tracked hand before hand tracking
+        """
+        self.mp_hands, self.mp_draw, self.mp_drawing_styles = load_mediapipe()
         try:
-            self.mp_hands = mp_hands
-            self.mp_draw = mp_draw
-            self.mp_drawing_styles = mp_drawing_styles
             
             # Initialize the Hands object
             self.hands = self.mp_hands.Hands(
@@ -59,99 +98,143 @@ class PretrainedSignDetector:
             raise RuntimeError("Hand Tracking Init Failed. Try reinstalling mediapipe.")
         
         self.results = None
-        self.gesture_buffer = []
+        self._rgb = FrameBuffer()  # RGB copy handed to MediaPipe, reused every frame
+        self.roi = roi
         self.buffer_size = 10
+        self.stabilizer = Stabilizer(self.buffer_size, MajorityVote(min_votes=self.buffer_size // 2))
+
+        if isinstance(classifier, str):
+            from src.classifier import LandmarkClassifier
+            classifier = LandmarkClassifier.load(classifier)
+            print(f"✓ Classifier loaded: {len(classifier.labels) - 1} signs")
+        self.classifier = classifier
+        if classifier is not None:
+            # Shadows the static rule cascade for this detector only, so
+            # callers keep using detector.recognize_gesture(landmarks)
+            self.recognize_gesture = classifier.recognize_gesture
+
+        if isinstance(motion, str):
+            from src.dynamic_signs import DynamicSignRecognizer
+            motion = DynamicSignRecognizer.load(motion)
+            print(f"✓ Motion templates loaded: {len(motion.templates)} of {len(motion.labels)} signs")
+        self.motion = motion
+
+    @property
+    def labels(self):
+        """Every label recognize_frame() can return; index 0 (None) is "no gesture"."""
+        labels = self.classifier.labels if self.classifier is not None else GESTURE_LABELS
+        if self.motion is not None:
+            labels = tuple(labels) + tuple(label for label in self.motion.labels if label not in labels)
+        return labels
         
     def find_hands(self, img, draw=True):
         """Detect hands and draw landmarks"""
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(img_rgb)
-        
-        if self.results.multi_hand_landmarks:
+        if self.roi is not None:
+            # Landmarks come back in full-frame coordinates
+            self.results = self.roi.finish(self.hands.process(self.roi.prepare(img)))
+        else:
+            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self._rgb.like(img))
+            self.results = self.hands.process(img_rgb)
+        
+        if draw:
+            self.draw_results(img)
+        return img
+
+    def warm_up(self, shape=(480, 640, 3)):
+        """
+        Run one inference on a blank frame so the first real frame does not
+        pay for MediaPipe's lazy initialization. Returns the seconds it took.
+        """
+        start = time.perf_counter()
+        self.hands.process(np.zeros(shape, dtype=np.uint8))
+        self.results = None
+        return time.perf_counter() - start
+
+    def draw_results(self, img):
+        """Draw the landmarks of the last find_hands() call onto img"""
+        if self.results and self.results.multi_hand_landmarks:
             for hand_lms in self.results.multi_hand_landmarks:
-                if draw:
-                    self.mp_draw.draw_landmarks(
-                        img, 
-                        hand_lms, 
-                        self.mp_hands.HAND_CONNECTIONS,
-                        self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                        self.mp_drawing_styles.get_default_hand_connections_style()
-                    )
+                self.mp_draw.draw_landmarks(
+                    img, 
+                    hand_lms, 
+                    self.mp_hands.HAND_CONNECTIONS,
+                    self.mp_drawing_styles.get_default_hand_landmarks_style(),
+                    self.mp_drawing_styles.get_default_hand_connections_style()
+                )
         return img
     
-    def get_landmarks(self, img):
-        """Extract hand landmarks"""
-        if not self.results or not self.results.multi_hand_landmarks:
+    def get_landmarks(self, img=None, out=None, timestamp=None):
+        """
+        Landmarks of the tracked hand from the last find_hands() call.
+
+        Args:
+            img: Unused, kept for existing callers
+            out: Optional (21, 3) float32 array to decode the coordinates into
+            timestamp: Capture time to attach to the frame
+
+        Returns:
+            LandmarkFrame (see src/landmarks.py) or None if no hand was found
+        """
+        return LandmarkFrame.from_mediapipe(self.results, timestamp=timestamp, out=out)
+
+    def get_handedness(self):
+        """Return "Left" or "Right" for the tracked hand, or None"""
+        if not self.results or not self.results.multi_handedness:
             return None
-        
-        hand = self.results.multi_hand_landmarks[0]
-        landmarks = []
-        for lm in hand.landmark:
-            landmarks.append([lm.x, lm.y, lm.z])
-        return landmarks
+        return self.results.multi_handedness[0].classification[0].label
     
-    def recognize_gesture(self, landmarks):
-        """Recognize signs based on finger orientation and hand geometry"""
-        if not landmarks or len(landmarks) != 21: return None
-        lm = np.array(landmarks)
-        
-        # Calculate extended fingers with improved accuracy
-        ext = []
-        # Thumb: compare tip (4) to base (2) considering hand orientation
-        # FIXED: Inverted the logic to correctly handle mirrored coordinates
-        ext.append(lm[4][0] > lm[2][0] if lm[5][0] > lm[17][0] else lm[4][0] < lm[2][0]) 
-        # Fingers: compare tips (8, 12, 16, 20) to mid-joints (6, 10, 14, 18)
-        for tip, mid in [(8, 6), (12, 10), (16, 14), (20, 18)]:
-            ext.append(lm[tip][1] < lm[mid][1])
-            
-        count = sum(ext)
-        
-        # Calculate distances for complex gestures
-        thumb_index_dist = np.linalg.norm(lm[4] - lm[8])
-        
-        # Recognition logic (ordered by specificity - specific gestures FIRST)
-        
-        # 1. Complex/Specific multi-finger gestures
-        if thumb_index_dist < 0.05 and count >= 3: return "OK"
-        if ext[0] and ext[1] and ext[4] and not ext[2] and not ext[3]: return "I Love You"
-        if ext[1] and ext[2] and not ext[0] and not ext[3] and not ext[4]: return "Peace"
-        
-        # 2. Specific palm-based gestures
-        # Stop sign - open palm facing forward/ready
-        if count == 5 and lm[9][1] < lm[0][1]: return "Stop"
-        
-        # Numbers
-        # "One" - Index only
-        if ext[1] and not ext[2] and not ext[3] and not ext[4]: return "One"
-        # "Two" - Index and Middle (Peace handled above)
-        if ext[1] and ext[2] and not ext[3] and not ext[4]: return "Two"
-        # "Three" - Index, Middle, Ring (Added logic)
-        if not ext[0] and ext[1] and ext[2] and ext[3] and not ext[4]: return "Three"
-        # "Four" - All except Thumb
-        if not ext[0] and ext[1] and ext[2] and ext[3] and ext[4]: return "Four"
-        
-        # All fingers extended (General)
-        if count == 5: return "Hello"
-        
-        # Thumbs up/Good
-        if ext[0] and count == 1: return "Good"
-        
-        # Fist/Yes
-        if count == 0: return "Yes"
-        
-        # Help - Raised hand with specific 3 fingers (Middle, Ring, Pinky)
-        if not ext[1] and ext[2] and ext[3] and ext[4]: return "Help"
-        
-        # Thank You - open palm
-        if count >= 4 and ext[0]: return "Thank You"
-        
-        return None
+    @staticmethod
+    def recognize_gesture(landmarks):
+        """Recognize signs based on finger orientation and hand geometry (see data/gesture_spec.json)"""
+        return GESTURES.recognize(landmarks)
+
+    def recognize_frame(self, landmarks):
+        """
+        Sign for the current frame: a motion sign that just ended (see
+        src/dynamic_signs.py) takes precedence over the static hand shape.
+        Call it for every frame, with None when there is no hand.
+        """
+        gesture = self.recognize_gesture(landmarks) if landmarks is not None else None
+        if self.motion is not None:
+            return self.motion.update(landmarks) or gesture
+        return gesture
 
     def get_stabilized_gesture(self, current_gesture):
+        """Majority vote over the last buffer_size gestures (see src/stabilizer.py)"""
         if current_gesture:
-            self.gesture_buffer.append(current_gesture)
-            if len(self.gesture_buffer) > self.buffer_size: self.gesture_buffer.pop(0)
-        if not self.gesture_buffer: return None
-        count = Counter(self.gesture_buffer)
-        most = count.most_common(1)[0]
-        return most[0] if most[1] >= self.buffer_size // 2 else None
+            return self.stabilizer.update(current_gesture)
+        return self.stabilizer.output
+
+    @staticmethod
+    def recognize_gesture_codes(landmarks):
+        """
+        Vectorized version of recognize_gesture over many frames at once.
+
+        Args:
+            landmarks: array-like of shape (N, 21, 3)
+
+        Returns:
+            int array of shape (N,) indexing into GESTURE_LABELS (0 = no gesture)
+        """
+        lm = np.asarray(landmarks)
+        if lm.ndim != 3 or lm.shape[1:] != (21, 3):
+            raise ValueError(f"Expected landmarks of shape (N, 21, 3), got {lm.shape}")
+        return GESTURES.codes(lm)
+
+    @staticmethod
+    def recognize_gestures_batch(landmarks):
+        """
+        Recognize signs for a whole batch of frames.
+
+        Args:
+            landmarks: array-like of shape (N, 21, 3)
+
+        Returns:
+            object array of shape (N,) with the same labels recognize_gesture
+            returns for each frame (None where no gesture matches)
+        """
+        codes = PretrainedSignDetector.recognize_gesture_codes(landmarks)
+        return _LABEL_TABLE[codes]
+
+
+_LABEL_TABLE = np.array(GESTURE_LABELS, dtype=object)
@@ -0,0 +1,444 @@
+"""
+Multi-process live inference over shared-memory frames.
+
+One MediaPipe Hands graph in one Python process tracks as many frames per
+second as one core allows, which 120 fps cameras and 1080p input outrun.
+ProcessPipeline keeps the threaded Pipeline's interface and stages, but
+hands the tracking to N worker processes:
+
+    capture thread -> shared-memory frame ring -> workers (round-robin, one
+    Hands graph each) -> results queue -> reorder by sequence number ->
+    recognition and stabilization -> render (caller)
+
+- frames are flipped straight into a slot of one multiprocessing
+  shared_memory block; workers track and draw on the same memory, and the
+  render stage shows it, so only slot numbers and landmarks are pickled
+- frame i goes to worker i % N, so every worker's tracker sees an evenly
+  spaced part of the video
+- results come back in any order and are put back in capture order
+  before recognize_frame() (motion signs need the frames in sequence) and
+  the GestureManager
+- live sources drop a frame when no slot or worker is free; files and
+  generated frames wait instead, so nothing is lost
+- the detector's --roi / --roi-budget-ms settings are used by every worker
+  (each crops around the hand it saw N frames earlier)
+- if a worker process dies the pipeline stops, as it does when the camera
+  fails
+
+Measure the scaling on any source (see src/sources.py) with:
+
+    python -m src.process_pipeline --source synthetic:1920x1080 --workers 1 2 4
+"""
+import multiprocessing as mp
+import queue
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from src.buffers import FrameBuffer, read_frame
+from src.landmarks import LandmarkFrame
+from src.pipeline import LatestFrameQueue, Pipeline, PipelineResult
+from src.sources import frame_times
+
+
+def _attach(name):
+    """Open the ring created by the parent; only the parent unlinks it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block, with the
+        # resource tracker spawned workers share with the parent: a no-op
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(index, shm_name, shape, tasks, results, draw, roi):
+    """Worker process: track hands in the slots it is sent, report the landmarks."""
+    from src.pretrained_detector import PretrainedSignDetector
+    from src.roi import make_roi
+
+    shm = _attach(shm_name)
+    frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    detector = PretrainedSignDetector(roi=make_roi(*roi) if roi else None)
+    detector.warm_up(shape[1:])
+    results.put(("ready", index))
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot = task
+            start = time.perf_counter()
+            try:
+                detector.find_hands(frames[slot], draw=draw)
+                frame = detector.get_landmarks()
+            except Exception as e:
+                print(f"[Worker {index}] Frame {seq} failed: {e}")
+                frame = None
+            seconds = time.perf_counter() - start
+            if frame is None:
+                results.put((index, seq, slot, seconds, None, None, None, None))
+            else:
+                results.put((index, seq, slot, seconds, frame.points, frame.handedness,
+                             frame.score, frame.world))
+    finally:
+        del frames
+        shm.close()
+
+
+class ReorderBuffer:
+    """Releases items in sequence order, however out of order they arrive."""
+
+    def __init__(self, max_pending=64, on_skip=None):
+        """
+        Args:
+            max_pending: Items held back before a missing sequence number is
+                         given up on (its result was lost)
+            on_skip: Called with each sequence number given up on
+        """
+        self.max_pending = max_pending
+        self.on_skip = on_skip
+        self.next_seq = 0
+        self.skipped = 0
+        self._pending = {}
+
+    def push(self, seq, item):
+        """Add an item; returns the items that are now next in order."""
+        self._pending[seq] = item
+        ready = []
+        while True:
+            while self.next_seq in self._pending:
+                ready.append(self._pending.pop(self.next_seq))
+                self.next_seq += 1
+            if len(self._pending) <= self.max_pending:
+                return ready
+            first = min(self._pending)
+            self.skipped += first - self.next_seq
+            if self.on_skip:
+                for seq in range(self.next_seq, first):
+                    self.on_skip(seq)
+            self.next_seq = first
+
+    def __len__(self):
+        return len(self._pending)
+
+
+class ProcessPipeline(Pipeline):
+    """
+    Pipeline (see src/pipeline.py) with hand tracking in worker processes.
+
+    detector stays in this process for recognize_frame(); each worker
+    builds its own. The ring has enough slots for every frame in flight
+    (two per worker), in the results queue and on screen.
+    """
+
+    def __init__(self, cap, detector, manager, on_word=None, on_sentence=None, queue_size=1,
+                 recorder=None, metrics=None, workers=2, in_flight=2, draw=True):
+        """
+        Args:
+            workers: Worker processes, each with its own Hands graph
+            in_flight: Frames queued per worker before capture waits or drops
+            draw: Workers draw the landmarks onto the frames for display
+            (other arguments as for Pipeline; motion gating is not supported)
+        """
+        super().__init__(cap, detector, manager, on_word=on_word, on_sentence=on_sentence,
+                         queue_size=queue_size, recorder=recorder, metrics=metrics)
+        self.workers = max(1, workers)
+        self.in_flight = max(1, in_flight)
+        self.draw = draw
+        self.slots = self.workers * self.in_flight + queue_size + 2
+        self.live = getattr(cap, "live", True)
+        self.results = LatestFrameQueue(queue_size, on_drop=self.release)
+        self.reorder = ReorderBuffer(max_pending=4 * self.slots, on_skip=self._skip)
+        roi = getattr(detector, "roi", None)
+        # make_roi() arguments, so every worker builds its own HandROI
+        self.roi = None if roi is None else (roi.size, roi.tuner.budget * 1000 if roi.tuner else None)
+        self.dropped = 0
+        self.worker_frames = [0] * self.workers
+
+        self._shm = None
+        self._ring = None
+        self._processes = []
+        self._tasks = []
+        self._result_queue = None
+        self._free = deque()
+        self._busy = [0] * self.workers
+        self._slot_lock = threading.Condition()
+        self._frames = {}  # seq -> (wall-clock capture time, slot, worker), until the result is back
+        self._first = None
+
+    def start(self):
+        """Read the first frame, size the ring from it and start the workers (takes a second or two)."""
+        raw = FrameBuffer()
+        success, img = read_frame(self.cap, raw)
+        if not success:
+            raise RuntimeError("Could not read a frame to size the shared frame ring")
+        shape = (self.slots,) + img.shape
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self._ring = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._free = deque(range(self.slots))
+        self._first = (img, frame_times(self.cap)[0])
+
+        # Workers are spawned, not forked: this process already runs threads
+        # (camera prefetch, speech) and may hold MediaPipe state
+        ctx = mp.get_context("spawn")
+        self._result_queue = ctx.Queue()
+        for index in range(self.workers):
+            tasks = ctx.Queue()
+            process = ctx.Process(target=_worker_main, name=f"hands-{index}", daemon=True,
+                                  args=(index, self._shm.name, shape, tasks, self._result_queue, self.draw,
+                                        self.roi))
+            process.start()
+            self._tasks.append(tasks)
+            self._processes.append(process)
+        for _ in range(self.workers):
+            message = self._result_queue.get(timeout=60)
+            assert message[0] == "ready"
+        print(f"✓ {self.workers} hand tracking workers ready")
+
+        self.running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._collect_loop, name="collect", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        with self._slot_lock:
+            self._slot_lock.notify_all()
+        self.results.close()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        if self._shm is not None:
+            # Views of the ring must be gone before the block can be closed
+            while len(self.results):
+                self.results.get(timeout=0)
+            self._ring = None
+            self._first = None
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # a result is still referenced by the caller; the OS frees it at exit
+            self._shm.unlink()
+            self._shm = None
+
+    def release(self, result):
+        """Return a displayed result's slot to the ring."""
+        slot = getattr(result, "slot", None)
+        result.image = None
+        if slot is not None:
+            with self._slot_lock:
+                self._free.append(slot)
+                self._slot_lock.notify_all()
+
+    def _acquire(self, worker):
+        """A free slot with room on the worker, or None (live sources drop the frame instead of waiting)."""
+        with self._slot_lock:
+            ready = lambda: (self._free and self._busy[worker] < self.in_flight) or not self.running
+            if not self.live:
+                self._slot_lock.wait_for(ready)
+            if not self.running or not ready():
+                return None
+            self._busy[worker] += 1
+            return self._free.popleft()
+
+    def _capture_loop(self):
+        seq = 0
+        raw = FrameBuffer()
+        shape = self._ring.shape[1:]
+        while self.running:
+            start = time.perf_counter()
+            if self._first is not None:
+                (img, capture_time), self._first = self._first, None
+            else:
+                success, img = read_frame(self.cap, raw)
+                if not success:
+                    print("Warning: Failed to read frame from camera")
+                    self.capture_failed = True
+                    self.running = False
+                    break
+                capture_time = frame_times(self.cap)[0]
+            if img.shape != shape:
+                print(f"Warning: frame size changed to {img.shape}; skipping frame")
+                continue
+            worker = seq % self.workers
+            waited = time.perf_counter()
+            slot = self._acquire(worker)
+            if not self.running:
+                break
+            # Waiting for a worker is backpressure, not capture work
+            start += time.perf_counter() - waited
+            if slot is None:
+                self.dropped += 1
+                if self.metrics:
+                    self.metrics.inc("frames_dropped")
+                continue
+            # The only write of the frame: straight into shared memory
+            cv2.flip(img, 1, dst=self._ring[slot])
+            self._frames[seq] = (capture_time, slot, worker)
+            self._tasks[worker].put((seq, slot))
+            seq += 1
+            end = time.perf_counter()
+            self.capture_stats.record(start, end)
+            if self.metrics:
+                self.metrics.observe("capture", end - start)
+                self.metrics.inc("frames")
+
+    def _collect_loop(self):
+        next_check = 0.0
+        while self.running or len(self.reorder):
+            if time.monotonic() >= next_check:
+                # A dead worker never returns its frames: the capture thread
+                # would wait on it forever and the results would stall
+                next_check = time.monotonic() + 0.5
+                dead = [p.name for p in self._processes if not p.is_alive()]
+                if dead:
+                    print(f"Warning: hand tracking worker {', '.join(dead)} exited; stopping")
+                    self.running = False
+                    with self._slot_lock:
+                        self._slot_lock.notify_all()
+                    break
+            try:
+                message = self._result_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            worker, seq, slot, seconds = message[:4]
+            self.worker_frames[worker] += 1
+            if seq not in self._frames:
+                continue  # given up on already; _skip() returned its slot
+            with self._slot_lock:
+                self._busy[worker] -= 1
+                self._slot_lock.notify_all()
+            for item in self.reorder.push(seq, message):
+                self._finish(item)
+        self.results.close()
+
+    def _skip(self, seq):
+        """A frame whose result never came back: return its slot and worker capacity."""
+        frame = self._frames.pop(seq, None)
+        if frame is not None:
+            _, slot, worker = frame
+            with self._slot_lock:
+                self._free.append(slot)
+                self._busy[worker] -= 1
+                self._slot_lock.notify_all()
+
+    def _finish(self, message):
+        worker, seq, slot, seconds, points, handedness, score, world = message
+        capture_time = self._frames.pop(seq, (time.time(),))[0]
+        end = time.perf_counter()
+        self.inference_stats.record(end - seconds, end)
+        landmarks = None if points is None else LandmarkFrame(points, capture_time, handedness, score, world)
+        prediction = self.detector.recognize_frame(landmarks)
+        if self.recorder:
+            self.recorder.write(landmarks, capture_time, label=prediction)
+
+        captured = time.perf_counter() - (time.time() - capture_time)
+        stabilized = self.manager.update(prediction, captured=captured)
+        final_word = self.manager.get_final_word(stabilized)
+        if final_word and self.on_word:
+            self.on_word(final_word)
+        sentence = self.manager.should_finalize_sentence()
+        if sentence and self.on_sentence:
+            self.on_sentence(sentence)
+
+        result = _SlotResult(seq, capture_time, self._ring[slot], landmarks, prediction,
+                             stabilized, final_word, list(self.manager.sentence))
+        result.slot = slot
+        self.results.put(result)
+        if self.metrics:
+            self.metrics.observe("inference", seconds)
+            if not landmarks:
+                self.metrics.inc("frames_no_hand")
+
+    def stats(self):
+        stages = [s.snapshot() for s in
+                  (self.capture_stats, self.inference_stats, self.render_stats)]
+        stages[0]["dropped"] = self.dropped
+        stages[1]["dropped"] = self.results.dropped
+        stages[1]["workers"] = self.workers
+        return stages
+
+    def bottleneck(self):
+        """Like Pipeline.bottleneck(), counting the workers' tracking as running in parallel."""
+        costs = {
+            "capture": self.capture_stats.avg_ms(),
+            "inference": self.inference_stats.avg_ms() / self.workers,
+            "render": self.render_stats.avg_ms(),
+        }
+        return max(costs, key=costs.get)
+
+
+class _SlotResult(PipelineResult):
+    __slots__ = ("slot",)
+
+
+def measure(source, workers, frames=300, warmup=30):
+    """
+    Steady-state frames per second of ProcessPipeline with the given number
+    of workers (0: the threaded Pipeline), and whether results came back in
+    capture order.
+    """
+    from src.pretrained_detector import PretrainedSignDetector
+    from src.sources import open_frame_source
+    from src.utils import GestureManager
+
+    cap = open_frame_source(source)
+    detector = PretrainedSignDetector()
+    if workers:
+        pipeline = ProcessPipeline(cap, detector, GestureManager(), workers=workers, queue_size=4)
+    else:
+        pipeline = Pipeline(cap, detector, GestureManager(), queue_size=4)
+    pipeline.start()
+    ids, start = [], None
+    try:
+        while len(ids) < warmup + frames:
+            result = pipeline.get_result(timeout=5.0)
+            if result is None:
+                break
+            ids.append(result.frame_id)
+            if len(ids) == warmup:
+                start = time.perf_counter()
+            pipeline.release(result)
+        elapsed = time.perf_counter() - start if start else 0.0
+    finally:
+        pipeline.stop()
+        cap.release()
+    measured = max(0, len(ids) - warmup)
+    return {
+        "workers": workers,
+        "frames": measured,
+        "fps": round(measured / elapsed, 1) if elapsed > 0 else 0.0,
+        "in_order": all(a < b for a, b in zip(ids, ids[1:])),
+        "stages": pipeline.stats(),
+    }
+
+
+# For quick testing: python -m src.process_pipeline [--source SPEC] [--workers 0 1 2 4]
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+
+    parser = argparse.ArgumentParser(description="Throughput of multi-process hand tracking")
+    parser.add_argument("--source", default="synthetic:1280x720", help="any src/sources.py spec; not a camera")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4],
+                        help="worker counts to compare (0: threaded pipeline)")
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    report = {"source": args.source, "cpus": os.cpu_count(),
+              "runs": [measure(args.source, n, args.frames) for n in args.workers]}
+    print(json.dumps(report, indent=2))
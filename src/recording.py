@@ -0,0 +1,249 @@
+"""
+Compact landmark recordings and fast replay.
+
+A recording is a single binary file:
+
+    magic (8 bytes) | header length (uint32) | JSON header | records...
+
+The header stores the format version, the label table and the nominal fps.
+Each record is a fixed-stride RECORD_DTYPE entry: timestamp, hand flag,
+handedness, label code and the (21, 3) float32 landmarks. Because the stride
+is fixed, the frame count follows from the file size and the whole file can
+be memory-mapped as a NumPy structured array for replay.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from src.landmarks import LandmarkFrame
+from src.pretrained_detector import GESTURE_LABELS, PretrainedSignDetector
+from src.utils import GestureManager
+
+MAGIC = b"SGNREC1\0"
+FORMAT_VERSION = 1
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("has_hand", "?"),
+    ("handedness", "i1"),       # -1 unknown, 0 left, 1 right
+    ("label", "<i2"),           # index into the header label table, -1 for None
+    ("landmarks", "<f4", (21, 3)),
+], align=True)
+
+HANDEDNESS_CODES = {None: -1, "Left": 0, "Right": 1}
+HANDEDNESS_NAMES = {v: k for k, v in HANDEDNESS_CODES.items()}
+
+
+class LandmarkRecorder:
+    """
+    Appends per-frame landmarks to a recording file.
+
+    Usage:
+        with LandmarkRecorder("session.lmrec") as rec:
+            rec.write(landmarks, timestamp, handedness, label)
+    """
+
+    def __init__(self, path, fps=None, labels=GESTURE_LABELS, flush_every=256, annotation=None):
+        """
+        Args:
+            labels: Label table; every label passed to write() must be in it
+            annotation: Record every frame with a hand under this label
+                        instead of the prediction, e.g. while performing one
+                        motion sign to build templates from
+        """
+        self.path = path
+        self.annotation = annotation
+        self.labels = list(labels)
+        if annotation is not None and annotation not in self.labels:
+            self.labels.append(annotation)
+        self._label_codes = {label: i for i, label in enumerate(self.labels) if label is not None}
+        self._buffer = np.zeros(flush_every, dtype=RECORD_DTYPE)
+        self._pending = 0
+        self.frames_written = 0
+
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "labels": self.labels,
+            "fps": fps,
+            "created": time.time(),
+        }).encode("utf-8")
+        # Pad so the first record starts on an 8-byte boundary
+        header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._file.write(np.uint32(len(header)).tobytes())
+        self._file.write(header)
+
+    def write(self, landmarks, timestamp=None, handedness=None, label=None):
+        """
+        Record one frame.
+
+        Args:
+            landmarks: LandmarkFrame or 21 [x, y, z] points, or None when no
+                       hand was found
+            timestamp: capture time in seconds (defaults to the frame's, then
+                       time.time())
+            handedness: "Left", "Right" or None (defaults to the frame's)
+            label: predicted gesture label, or None
+        """
+        if isinstance(landmarks, LandmarkFrame):
+            timestamp = landmarks.timestamp if timestamp is None else timestamp
+            handedness = landmarks.handedness if handedness is None else handedness
+            landmarks = landmarks.points
+        rec = self._buffer[self._pending]
+        rec["timestamp"] = time.time() if timestamp is None else timestamp
+        rec["has_hand"] = landmarks is not None
+        rec["handedness"] = HANDEDNESS_CODES.get(handedness, -1)
+        if self.annotation is not None:
+            label = self.annotation if landmarks is not None else None
+        if label is None:
+            rec["label"] = -1
+        elif label in self._label_codes:
+            rec["label"] = self._label_codes[label]
+        else:
+            raise ValueError(f"Label {label!r} is not in the recording's label table")
+        if landmarks is not None:
+            rec["landmarks"] = landmarks
+        else:
+            rec["landmarks"] = 0
+
+        self._pending += 1
+        if self._pending == len(self._buffer):
+            self.flush()
+
+    def write_from_detector(self, detector, label=None, timestamp=None):
+        """Record whatever the detector found in its last find_hands() call."""
+        self.write(detector.get_landmarks(timestamp=timestamp), timestamp, label=label)
+
+    def flush(self):
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self.frames_written += self._pending
+            self._pending = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LandmarkReplay:
+    """
+    Memory-mapped, read-only view of a recording.
+
+    Column access (timestamps, landmarks, ...) returns array views without
+    copying, so whole sessions can be fed to the batch classifier directly.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a landmark recording")
+            header_len = int(np.frombuffer(f.read(4), dtype=np.uint32)[0])
+            self.header = json.loads(f.read(header_len).decode("utf-8"))
+        if self.header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported recording version: {self.header.get('version')}")
+
+        self.labels = self.header["labels"]
+        self.fps = self.header.get("fps")
+        offset = len(MAGIC) + 4 + header_len
+        count = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def timestamps(self):
+        return self.records["timestamp"]
+
+    @property
+    def landmarks(self):
+        return self.records["landmarks"]
+
+    @property
+    def has_hand(self):
+        return self.records["has_hand"]
+
+    @property
+    def label_codes(self):
+        return self.records["label"]
+
+    def label(self, index):
+        code = int(self.records["label"][index])
+        return self.labels[code] if code >= 0 else None
+
+    def handedness(self, index):
+        return HANDEDNESS_NAMES.get(int(self.records["handedness"][index]))
+
+    def __iter__(self):
+        """Yield (timestamp, landmarks or None, handedness, label) per frame."""
+        for i, rec in enumerate(self.records):
+            landmarks = rec["landmarks"] if rec["has_hand"] else None
+            yield float(rec["timestamp"]), landmarks, self.handedness(i), self.label(i)
+
+    def predictions(self):
+        """Re-run the current recognizer over every frame using the batch API."""
+        labels = PretrainedSignDetector.recognize_gestures_batch(self.landmarks)
+        labels[~np.asarray(self.has_hand)] = None
+        return labels
+
+    def replay(self, manager=None, batch=True):
+        """
+        Feed the recording through recognition and a GestureManager as fast as possible.
+
+        Args:
+            manager: GestureManager to drive (a fresh one by default)
+            batch: classify all frames in one vectorized call instead of per frame
+
+        Returns:
+            (words, sentences): lists of (timestamp, text)
+        """
+        manager = manager or GestureManager()
+        if batch:
+            predictions = self.predictions()
+        else:
+            predictions = [PretrainedSignDetector.recognize_gesture(lms) if lms is not None else None
+                           for _, lms, _, _ in self]
+
+        words, sentences = [], []
+        for timestamp, prediction in zip(self.timestamps.tolist(), predictions):
+            stabilized = manager.update(prediction)
+            final_word = manager.get_final_word(stabilized, timestamp=timestamp)
+            if final_word:
+                words.append((timestamp, final_word))
+            sentence = manager.should_finalize_sentence()
+            if sentence:
+                sentences.append((timestamp, sentence))
+        return words, sentences
+
+
+# For quick testing: python -m src.recording session.lmrec
+if __name__ == "__main__":
+    import sys
+
+    replay = LandmarkReplay(sys.argv[1])
+    print(f"✓ {len(replay)} frames, {int(np.sum(replay.has_hand))} with a hand")
+    for batch in (True, False):
+        start = time.perf_counter()
+        words, sentences = replay.replay(batch=batch)
+        elapsed = time.perf_counter() - start
+        rate = len(replay) / elapsed if elapsed > 0 else float("inf")
+        print(f"{'batch' if batch else 'per-frame'}: {rate:,.0f} frames/s")
+    print(f"✓ {len(words)} words, {len(sentences)} sentences")
+    for timestamp, sentence in sentences[:10]:
+        print(f"  [{timestamp:.2f}] {sentence}")
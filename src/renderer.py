@@ -0,0 +1,140 @@
+"""
+UI overlay and letterbox rendering for the live window.
+
+OverlayRenderer draws the same UI as before, but without full-frame copies:
+the two translucent bars are blended in place on their own regions against
+cached tint layers, the letterbox canvas is preallocated and the resize
+writes straight into it, and the window size is polled a few times per
+second instead of every frame. The caches are rebuilt only when the frame
+or window size changes.
+"""
+import time
+
+import cv2
+import numpy as np
+
+DEFAULT_WINDOW_SIZE = (1280, 720)
+
+TOP_BAR_HEIGHT = 91        # cv2.rectangle((0, 0), (w, 90)) fills rows 0..90
+BOTTOM_BAR_HEIGHT = 100
+HINT_TEXT = "Press 'Q' to quit | Lower hand to end sentence"
+
+
+def get_window_size(window_name):
+    """Current drawable size of the window, or 1280x720 if unknown."""
+    win_w, win_h = DEFAULT_WINDOW_SIZE
+    try:
+        _, _, cur_w, cur_h = cv2.getWindowImageRect(window_name)
+        if cur_w > 0 and cur_h > 0:
+            win_w, win_h = cur_w, cur_h
+    except:
+        pass
+    return win_w, win_h
+
+
+class OverlayRenderer:
+    def __init__(self, window_name=None, window_poll_interval=0.25):
+        """
+        Args:
+            window_name: OpenCV window whose size the letterbox follows
+            window_poll_interval: Seconds between getWindowImageRect calls
+        """
+        self.window_name = window_name
+        self.window_poll_interval = window_poll_interval
+        self._window_size = DEFAULT_WINDOW_SIZE
+        self._window_polled = float("-inf")
+
+        self._frame_size = None
+        self._canvas = None
+        self._canvas_key = None
+        self._canvas_roi = None
+        self._resized_size = None
+
+    def _build_layers(self, w, h):
+        top_h = min(TOP_BAR_HEIGHT, h)
+        bottom_h = min(BOTTOM_BAR_HEIGHT, h)
+        self._top_tint = np.full((top_h, w, 3), (40, 40, 40), dtype=np.uint8)
+        self._bottom_tint = np.full((bottom_h, w, 3), (30, 30, 30), dtype=np.uint8)
+        self._frame_size = (w, h)
+
+    def draw_overlay(self, display_img, stabilized, sentence_words, fps_text):
+        """Draw the top/bottom UI bars, current sign and sentence onto the frame in place."""
+        h, w = display_img.shape[:2]
+        if self._frame_size != (w, h):
+            self._build_layers(w, h)
+
+        # Semi-transparent top bar (Glassmorphism effect), blended only where the bar is
+        top = display_img[:self._top_tint.shape[0]]
+        cv2.addWeighted(self._top_tint, 0.6, top, 0.4, 0, dst=top)
+
+        # Top boundary line (accent)
+        cv2.line(display_img, (0, 90), (w, 90), (0, 255, 127), 2)
+
+        # Current Prediction with better styling
+        word_text = stabilized if stabilized else "..."
+        color = (0, 255, 127) if stabilized else (200, 200, 200)
+        cv2.putText(display_img, f"SIGN: {word_text.upper()}",
+                    (25, 60), cv2.FONT_HERSHEY_DUPLEX, 1.2, color, 2)
+
+        # FPS Indicator
+        (text_w, _), _ = cv2.getTextSize(fps_text, cv2.FONT_HERSHEY_PLAIN, 1.2, 1)
+        cv2.putText(display_img, fps_text, (w - max(140, text_w + 20), 55),
+                    cv2.FONT_HERSHEY_PLAIN, 1.2, (255, 255, 255), 1)
+
+        # Semi-transparent bottom bar
+        bottom = display_img[h - self._bottom_tint.shape[0]:]
+        cv2.addWeighted(self._bottom_tint, 0.7, bottom, 0.3, 0, dst=bottom)
+        cv2.line(display_img, (0, h - 100), (w, h - 100), (0, 165, 255), 2)
+
+        # Sentence Display
+        current_sentence = " ".join(sentence_words)
+        if not current_sentence:
+            current_sentence = "Ready for signs..."
+
+        # Wrap/Truncate sentence
+        if len(current_sentence) > 45:
+            current_sentence = "..." + current_sentence[-42:]
+
+        cv2.putText(display_img, f"SENTENCE: {current_sentence}",
+                    (25, h - 45), cv2.FONT_HERSHEY_DUPLEX, 0.9, (255, 255, 255), 1)
+
+        # Instructions (Subtle)
+        cv2.putText(display_img, HINT_TEXT,
+                    (w - 380, h - 15), cv2.FONT_HERSHEY_PLAIN, 0.8, (180, 180, 180), 1)
+        return display_img
+
+    def window_size(self):
+        """Window size, re-read from OpenCV at most every window_poll_interval seconds."""
+        now = time.monotonic()
+        if self.window_name and now - self._window_polled >= self.window_poll_interval:
+            self._window_size = get_window_size(self.window_name)
+            self._window_polled = now
+        return self._window_size
+
+    def letterbox(self, display_img, win_w=None, win_h=None):
+        """
+        Fit the frame into a win_w x win_h canvas without stretching.
+
+        The returned canvas is reused between calls; it is only valid until
+        the next call.
+        """
+        if win_w is None or win_h is None:
+            win_w, win_h = self.window_size()
+        h, w = display_img.shape[:2]
+
+        key = (win_w, win_h, w, h)
+        if key != self._canvas_key:
+            # Calculate scaling to fit without stretching (Letterboxing)
+            scale = min(win_w / w, win_h / h)
+            new_w = int(w * scale)
+            new_h = int(h * scale)
+            start_y = (win_h - new_h) // 2
+            start_x = (win_w - new_w) // 2
+            self._canvas = np.zeros((win_h, win_w, 3), dtype=np.uint8)
+            self._canvas_roi = self._canvas[start_y:start_y + new_h, start_x:start_x + new_w]
+            self._resized_size = (new_w, new_h)
+            self._canvas_key = key
+
+        # Resize straight into the centered region of the canvas
+        cv2.resize(display_img, self._resized_size, dst=self._canvas_roi, interpolation=cv2.INTER_AREA)
+        return self._canvas
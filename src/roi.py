@@ -0,0 +1,286 @@
+"""
+Hand region-of-interest cropping ahead of hands.process().
+
+Only one hand is tracked and it usually covers a small part of the camera
+frame, yet find_hands() converted the whole frame and handed it to
+MediaPipe. HandROI shapes the input instead:
+
+- while a hand is tracked, a square crop around its last bounding box
+  (padded by `padding` box sizes on every side) is resized to size x size
+  and converted, so the colour conversion and MediaPipe's own resizing
+  work on a few hundred pixels instead of the full frame, and a distant
+  hand reaches the model with more detail
+- the crop only moves when the hand drifts towards its edge or changes
+  size a lot, so MediaPipe's frame-to-frame tracking keeps working in a
+  stable coordinate frame
+- the landmarks are mapped back into full-frame coordinates in place, so
+  draw_results(), get_landmarks() and everything after them are unchanged
+- when the hand stays lost in the crop for more than `retries` frames,
+  the next frame goes through full-frame detection again
+
+ROITuner picks the crop size from a latency budget: it steps down to a
+smaller size while the measured per-frame cost is over budget and back up
+once there is headroom again.
+
+Measure the accuracy and latency tradeoff on a recorded video with:
+
+    python -m src.roi session.mp4 --sizes 128 192 256 --budget-ms 12
+"""
+import time
+
+import cv2
+import numpy as np
+
+from src.buffers import FrameBuffer
+
+
+class ROITuner:
+    def __init__(self, budget_ms, sizes=(128, 160, 192, 224, 256, 320), headroom=0.75,
+                 patience=30, alpha=0.1):
+        """
+        Args:
+            budget_ms: Target cost of cropping plus hands.process() per frame
+            sizes: Candidate crop sizes in pixels, smallest first
+            headroom: Step up once the average is below headroom * budget
+            patience: Frames to wait after a change before stepping up
+            alpha: Weight of the newest frame in the moving average
+        """
+        self.budget = budget_ms / 1000.0
+        self.sizes = tuple(sorted(sizes))
+        self.headroom = headroom
+        self.patience = patience
+        self.alpha = alpha
+        self.index = len(self.sizes) - 1
+        self.average = None
+        self._steady = 0
+        self.changes = 0
+
+    @property
+    def size(self):
+        return self.sizes[self.index]
+
+    def record(self, seconds):
+        """Report the cost of one cropped frame; returns the size to use next."""
+        self.average = seconds if self.average is None else \
+            (1 - self.alpha) * self.average + self.alpha * seconds
+        self._steady += 1
+        if self.average > self.budget and self.index > 0:
+            self._step(-1)
+        elif (self.average < self.headroom * self.budget and self._steady >= self.patience
+              and self.index < len(self.sizes) - 1):
+            self._step(1)
+        return self.size
+
+    def _step(self, direction):
+        self.index += direction
+        self.average = None
+        self._steady = 0
+        self.changes += 1
+
+
+class HandROI:
+    def __init__(self, size=256, padding=0.5, recenter=0.2, rescale=0.3, retries=2, tuner=None):
+        """
+        Args:
+            size: Side of the square image handed to MediaPipe while tracking
+            padding: Margin around the hand's bounding box on every side, in
+                     box sizes (the hand moves between frames)
+            recenter: Move the crop when the hand's centre is further than
+                      this fraction of the crop from the crop's centre
+            rescale: Resize the crop when the hand's size changed by more than
+                     this fraction
+            retries: Frames the crop is kept after the hand was lost in it
+                     before falling back to the full frame (MediaPipe's own
+                     tracking loses the hand for a frame whenever the crop
+                     moves, and then re-detects it inside the crop)
+            tuner: Optional ROITuner choosing size from a latency budget
+        """
+        self.size = tuner.size if tuner else size
+        self.padding = padding
+        self.recenter = recenter
+        self.rescale = rescale
+        self.retries = retries
+        self.tuner = tuner
+        self._crop_img = FrameBuffer()
+        self._rgb = FrameBuffer()
+        self.reset()
+        self.cropped = 0
+        self.full = 0
+
+    def reset(self):
+        """Forget the hand: the next frame goes through full-frame detection."""
+        self.box = None        # last hand box in pixels: centre x, centre y, side
+        self.crop = None       # crop used for the current frame: x0, y0, side
+        self._anchor = None    # hand box the current crop was placed for
+        self._frame_shape = None
+        self._started = None
+        self._misses = 0
+
+    def _place(self, width, height):
+        cx, cy, side = self.box
+        if self._anchor is not None:
+            ax, ay, aside = self._anchor
+            crop_side = self.crop[2] if self.crop else aside
+            drift = max(abs(cx - ax), abs(cy - ay)) / crop_side
+            if drift <= self.recenter and abs(side - aside) <= self.rescale * aside:
+                return self._clamp(ax, ay, aside, width, height)
+        self._anchor = self.box
+        return self._clamp(cx, cy, side, width, height)
+
+    def _clamp(self, cx, cy, side, width, height):
+        crop = int(min(side * (1 + 2 * self.padding), width, height))
+        x0 = int(min(max(cx - crop / 2, 0), width - crop))
+        y0 = int(min(max(cy - crop / 2, 0), height - crop))
+        return x0, y0, crop
+
+    def prepare(self, img):
+        """
+        RGB image to hand to hands.process() for this BGR frame: a resized
+        crop around the hand, or the full frame when there is no hand yet.
+        """
+        self._started = time.perf_counter()
+        height, width = img.shape[:2]
+        self._frame_shape = (height, width)
+        if self.box is None:
+            self.crop = None
+            self.full += 1
+            return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self._rgb.like(img))
+        self.crop = self._place(width, height)
+        x0, y0, side = self.crop
+        size = self.size
+        interpolation = cv2.INTER_AREA if side > size else cv2.INTER_LINEAR
+        crop = cv2.resize(img[y0:y0 + side, x0:x0 + side], (size, size),
+                          dst=self._crop_img.get((size, size, 3)), interpolation=interpolation)
+        self.cropped += 1
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=self._rgb.get((size, size, 3)))
+
+    def finish(self, results):
+        """
+        Map the landmarks of hands.process(prepare(img)) back into full-frame
+        coordinates (in place) and remember where the hand is.
+        """
+        hands = results.multi_hand_landmarks if results else None
+        height, width = self._frame_shape
+        if self.crop is not None and self.tuner is not None:
+            self.size = self.tuner.record(time.perf_counter() - self._started)
+        if not hands:
+            self._misses += 1
+            if self.crop is None or self._misses > self.retries:
+                self.box = None
+                self._anchor = None
+            return results
+        self._misses = 0
+
+        if self.crop is not None:
+            x0, y0, side = self.crop
+            sx, sy, sz = side / width, side / height, side / width
+            ox, oy = x0 / width, y0 / height
+            for hand in hands:
+                for lm in hand.landmark:
+                    lm.x = ox + lm.x * sx
+                    lm.y = oy + lm.y * sy
+                    lm.z = lm.z * sz
+        points = hands[0].landmark
+        xs = [lm.x for lm in points]
+        ys = [lm.y for lm in points]
+        left, right = min(xs) * width, max(xs) * width
+        top, bottom = min(ys) * height, max(ys) * height
+        self.box = ((left + right) / 2, (top + bottom) / 2, max(right - left, bottom - top, 1.0))
+        return results
+
+    def stats(self):
+        frames = self.cropped + self.full
+        return {
+            "frames": frames,
+            "cropped": self.cropped,
+            "full_frame": self.full,
+            "crop_rate": round(self.cropped / frames, 3) if frames else 0.0,
+            "size": self.size,
+            "size_changes": self.tuner.changes if self.tuner else 0,
+        }
+
+
+def make_roi(size=None, budget_ms=None):
+    """HandROI for the --roi / --roi-budget-ms options, or None when neither is set."""
+    if budget_ms:
+        return HandROI(tuner=ROITuner(budget_ms))
+    if size:
+        return HandROI(size=size)
+    return None
+
+
+def _landmark_array(results, shape):
+    """(21, 2) pixel coordinates of the first hand, or None."""
+    if not results or not results.multi_hand_landmarks:
+        return None
+    height, width = shape[:2]
+    return np.array([[lm.x * width, lm.y * height] for lm in results.multi_hand_landmarks[0].landmark])
+
+
+def evaluate_video(path, sizes=(128, 192, 256), budget_ms=None, max_frames=None):
+    """
+    Full-frame tracking against ROI cropping at each size (and with the
+    tuner, if budget_ms is given) on the same frames. Landmark error is the
+    mean distance in pixels to the full-frame landmarks, scaled by the hand
+    size, on frames where both found the hand.
+    """
+    from src.pretrained_detector import PretrainedSignDetector
+
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while max_frames is None or len(frames) < max_frames:
+        success, img = cap.read()
+        if not success:
+            break
+        frames.append(cv2.flip(img, 1))
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"No frames read from {path}")
+
+    def run(roi):
+        detector = PretrainedSignDetector(roi=roi)
+        points, seconds = [], []
+        for img in frames:
+            start = time.perf_counter()
+            detector.find_hands(img, draw=False)
+            seconds.append(time.perf_counter() - start)
+            points.append(_landmark_array(detector.results, img.shape))
+        return points, np.array(seconds)
+
+    reference, full_seconds = run(None)
+    report = {
+        "frames": len(frames),
+        "resolution": f"{frames[0].shape[1]}x{frames[0].shape[0]}",
+        "full_frame": {"ms": round(float(full_seconds.mean()) * 1e3, 2),
+                       "hand_frames": sum(p is not None for p in reference)},
+    }
+    variants = [(f"crop_{size}", HandROI(size=size)) for size in sizes]
+    if budget_ms:
+        variants.append((f"tuned_{budget_ms:g}ms", HandROI(tuner=ROITuner(budget_ms))))
+    for name, roi in variants:
+        points, seconds = run(roi)
+        both = [(p, r) for p, r in zip(points, reference) if p is not None and r is not None]
+        errors = [np.linalg.norm(p - r, axis=1).mean() / max(np.ptp(r, axis=0).max(), 1.0) for p, r in both]
+        report[name] = {
+            "ms": round(float(seconds.mean()) * 1e3, 2),
+            "p95_ms": round(float(np.percentile(seconds, 95)) * 1e3, 2),
+            "hand_frames": sum(p is not None for p in points),
+            "agreement": round(float(np.mean([(p is None) == (r is None) for p, r in zip(points, reference)])), 3),
+            "landmark_error": round(float(np.mean(errors)), 4) if errors else None,
+            **roi.stats(),
+        }
+    return report
+
+
+# For quick testing: python -m src.roi <video> [--sizes ...] [--budget-ms ...]
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Accuracy and latency of hand ROI cropping")
+    parser.add_argument("video")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[128, 192, 256])
+    parser.add_argument("--budget-ms", type=float, help="also run the auto-tuner with this budget")
+    parser.add_argument("--max-frames", type=int)
+    args = parser.parse_args()
+    print(json.dumps(evaluate_video(args.video, args.sizes, args.budget_ms, args.max_frames), indent=2))
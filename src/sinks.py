@@ -0,0 +1,256 @@
+"""
+Output sinks for the headless runner.
+
+Every sink has its own thread and a small bounded queue. emit() only appends
+to that queue, so a slow sink (a stalled socket, a long utterance, a window
+that is being dragged) drops its own oldest events instead of slowing down
+the detection loop.
+
+    StdoutSink   JSON lines on stdout
+    FileSink     JSON lines appended to a file
+    SocketSink   JSON lines over TCP (reconnects in the background)
+    VoiceSink    speaks words and sentence completions
+    WindowSink   shows the frames with the usual overlay
+"""
+import json
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from src.buffers import FramePool
+
+
+class Sink:
+    """Base class: queues events on the caller's thread, handles them on its own."""
+
+    # Event types this sink wants ("frame", "word", "sentence", "summary")
+    kinds = ("word", "sentence", "summary")
+    wants_images = False
+
+    def __init__(self, maxsize=1024, kinds=None):
+        self.maxsize = maxsize
+        if kinds is not None:
+            self.kinds = tuple(kinds)
+        self.dropped = 0
+        self.handled = 0
+        self.closed = False
+        self._events = deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"sink-{type(self).__name__}", daemon=True)
+        self._thread.start()
+
+    def emit(self, event):
+        """Queue an event without blocking; the oldest queued event is dropped when full."""
+        if self.closed or event["type"] not in self.kinds:
+            return
+        with self._cond:
+            if len(self._events) >= self.maxsize:
+                self._discard(self._events.popleft())
+                self.dropped += 1
+            self._events.append(event)
+            self._cond.notify()
+
+    def _run(self):
+        self.open()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._events or self.closed)
+                if not self._events:
+                    break
+                event = self._events.popleft()
+            try:
+                self.handle(event)
+                self.handled += 1
+            except Exception as e:
+                print(f"[{type(self).__name__}] {e}", file=sys.stderr)
+            finally:
+                self._discard(event)
+        self.shutdown()
+
+    def close(self, timeout=2.0):
+        """Stop accepting events, let the queue drain for up to timeout seconds."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def open(self):
+        """Called on the sink thread before the first event."""
+
+    def handle(self, event):
+        raise NotImplementedError
+
+    def shutdown(self):
+        """Called on the sink thread after the last event."""
+
+    def _discard(self, event):
+        """Called once an event is handled or dropped (e.g. to recycle its frame)."""
+
+
+def to_json(event):
+    return json.dumps({k: v for k, v in event.items() if k != "image"})
+
+
+class StdoutSink(Sink):
+    def handle(self, event):
+        sys.stdout.write(to_json(event) + "\n")
+        sys.stdout.flush()
+
+
+class FileSink(Sink):
+    def __init__(self, path, **kwargs):
+        self.path = path
+        self.file = None
+        super().__init__(**kwargs)
+
+    def open(self):
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def handle(self, event):
+        self.file.write(to_json(event) + "\n")
+        if event["type"] != "frame":
+            self.file.flush()
+
+    def shutdown(self):
+        if self.file:
+            self.file.close()
+
+
+class SocketSink(Sink):
+    """JSON lines to a TCP listener; events are dropped while it is unreachable."""
+
+    retry_seconds = 2.0
+
+    def __init__(self, host, port, **kwargs):
+        self.host = host
+        self.port = port
+        self.sock = None
+        self._next_attempt = 0.0
+        super().__init__(**kwargs)
+
+    def _connect(self):
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return False
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=2.0)
+            return True
+        except OSError:
+            self._next_attempt = now + self.retry_seconds
+            return False
+
+    def handle(self, event):
+        if self.sock is None and not self._connect():
+            self.dropped += 1
+            return
+        try:
+            self.sock.sendall((to_json(event) + "\n").encode("utf-8"))
+        except OSError:
+            self.sock.close()
+            self.sock = None
+            self.dropped += 1
+
+    def shutdown(self):
+        if self.sock:
+            self.sock.close()
+
+
+class VoiceSink(Sink):
+    kinds = ("word", "sentence")
+
+    def __init__(self, voice=None, tracer=None, **kwargs):
+        if voice is None:
+            # Created on the caller's thread, like the live app does
+            from src.voice import VoiceEngine
+            voice = VoiceEngine(tracer=tracer)
+        self.voice = voice
+        super().__init__(**kwargs)
+
+    def handle(self, event):
+        if event["type"] == "word":
+            self.voice.speak(event["word"])
+        else:
+            self.voice.speak_sentence(f"Sentence completed: {event['sentence']}")
+
+    def shutdown(self):
+        self.voice.stop()
+
+
+class WindowSink(Sink):
+    """
+    Displays frames from its own thread, always the newest one. HighGUI
+    windows work from a non-main thread on Windows and Linux, not on macOS.
+    """
+
+    kinds = ("frame",)
+    wants_images = True
+
+    def __init__(self, window_name="SignToWords (headless)", **kwargs):
+        self.window_name = window_name
+        self.pool = FramePool(max_free=3)
+        self.quit_requested = False
+        self.renderer = None
+        kwargs.setdefault("maxsize", 1)
+        super().__init__(**kwargs)
+
+    def emit(self, event):
+        if self.closed or event["type"] not in self.kinds or event.get("image") is None:
+            return
+        # The loop reuses its frame buffer, so keep a copy in a pooled buffer
+        image = event["image"]
+        copy = self.pool.acquire(image.shape, image.dtype)
+        np.copyto(copy, image)
+        super().emit(dict(event, image=copy))
+
+    def _discard(self, event):
+        self.pool.release(event.get("image"))
+
+    def open(self):
+        import cv2
+        from src.renderer import OverlayRenderer
+        cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+        self.renderer = OverlayRenderer(self.window_name)
+
+    def handle(self, event):
+        import cv2
+        img = event["image"]
+        self.renderer.draw_overlay(img, event.get("stabilized"), event.get("sentence", []),
+                                   f"FPS: {event.get('fps', 0)}")
+        cv2.imshow(self.window_name, self.renderer.letterbox(img))
+        if cv2.waitKey(1) & 0xFF in (ord('q'), ord('Q')):
+            self.quit_requested = True
+
+    def shutdown(self):
+        import cv2
+        cv2.destroyWindow(self.window_name)
+
+
+def parse_sink(spec, tracer=None):
+    """
+    Build a sink from a command-line spec:
+    stdout | file:PATH | tcp:HOST:PORT | voice | window   (append +frames for per-frame events)
+
+    A voice sink hands the words it speaks to tracer (see src/tracing.py).
+    """
+    kinds = None
+    if spec.endswith("+frames"):
+        spec = spec[:-len("+frames")]
+        kinds = ("frame", "word", "sentence", "summary")
+    name, _, arg = spec.partition(":")
+    kwargs = {"kinds": kinds} if kinds else {}
+    if name == "stdout":
+        return StdoutSink(**kwargs)
+    if name == "file":
+        return FileSink(arg, **kwargs)
+    if name == "tcp":
+        host, _, port = arg.rpartition(":")
+        return SocketSink(host or "127.0.0.1", int(port), **kwargs)
+    if name == "voice":
+        return VoiceSink(tracer=tracer)
+    if name == "window":
+        return WindowSink()
+    raise ValueError(f"Unknown sink: {spec}")
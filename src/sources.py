@@ -0,0 +1,549 @@
+"""
+Pluggable frame sources with decode-ahead prefetching.
+
+The live loop called cap.read() on a cv2.VideoCapture(0) and waited for
+the camera (or the video decoder) before every frame. Readers give every
+kind of input the same VideoCapture-like interface (read, get, set,
+isOpened, release), and PrefetchSource reads ahead on a background thread
+into a bounded ring of reused frame buffers, so read() only copies out a
+frame that is already decoded:
+
+    0, 1, ...          camera index (live)
+    rtsp://..., http://...  stream URL (live)
+    clip.mp4           video file
+    frames/            directory of images, in file name order
+    frames.npy         raw frames in a memory-mapped .npy file (see write_raw)
+    synthetic[:WxH]    generated frames, no camera or files needed
+
+Live sources drop old frames: the reader keeps grabbing at the device's
+rate and read() returns the newest frame, counting the ones skipped.
+Files, image directories and generated frames never drop; the background
+thread waits for room in the ring instead.
+
+Every frame carries the wall-clock and perf_counter times it was read off
+the source, available after read() as cap.timestamp and cap.captured (see
+frame_times()), and its position in the file as cap.position.
+
+Compare how long a loop waits for frames with and without prefetching:
+
+    python -m src.sources bench clip.mp4 --work-ms 15
+    python -m src.sources raw clip.mp4 clip.npy
+"""
+import glob
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from src.buffers import FramePool
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+
+class FrameReader:
+    """Base class: a synchronous source with a VideoCapture-like interface."""
+
+    live = False
+    fps = 30.0
+
+    def __init__(self):
+        self.index = 0        # frames read so far
+        self.position = 0.0  # seconds into the source of the last frame
+
+    def read(self, image=None):
+        raise NotImplementedError
+
+    def isOpened(self):
+        return True
+
+    def frame_count(self):
+        return 0
+
+    def seek(self, index):
+        """Continue from frame index; returns False if the source can't seek."""
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.index)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.position * 1000.0
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count())
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.seek(int(value))
+        return False
+
+    def release(self):
+        pass
+
+
+def _into(image, frame):
+    """Copy frame into image when the shapes match, like VideoCapture.read(image)."""
+    if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+        np.copyto(image, frame)
+        return image
+    return frame.copy()
+
+
+class VideoReader(FrameReader):
+    """cv2.VideoCapture: camera index, video file or stream URL."""
+
+    def __init__(self, source):
+        super().__init__()
+        self.live = isinstance(source, int) or "://" in source
+        self.cap = cv2.VideoCapture(source)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self, image=None):
+        success, img = self.cap.read(image)
+        if success:
+            self.index += 1
+            self.position = (self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 if not self.live
+                             else self.index / self.fps)
+        return success, img
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def frame_count(self):
+        return int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def seek(self, index):
+        if self.live:
+            return False
+        self.index = index
+        return self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+    def get(self, prop):
+        if prop in (cv2.CAP_PROP_POS_FRAMES, cv2.CAP_PROP_POS_MSEC, cv2.CAP_PROP_FPS):
+            return super().get(prop)
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirReader(FrameReader):
+    """Images in a directory, in file name order, at a nominal fps."""
+
+    def __init__(self, path, fps=30.0):
+        super().__init__()
+        self.paths = sorted(p for p in glob.glob(os.path.join(path, "*"))
+                            if p.lower().endswith(IMAGE_EXTENSIONS))
+        self.fps = fps
+
+    def read(self, image=None):
+        while self.index < len(self.paths):
+            img = cv2.imread(self.paths[self.index], cv2.IMREAD_COLOR)
+            self.index += 1
+            if img is not None:
+                self.position = (self.index - 1) / self.fps
+                return True, _into(image, img)
+        return False, None
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def frame_count(self):
+        return len(self.paths)
+
+    def seek(self, index):
+        self.index = max(0, index)
+        return True
+
+
+class RawFileReader(FrameReader):
+    """
+    BGR frames stored uncompressed in a .npy file of shape (frames, height,
+    width, 3), memory-mapped: reading a frame is a copy out of the page cache,
+    with nothing to decode.
+    """
+
+    def __init__(self, path, fps=30.0):
+        super().__init__()
+        self.frames = np.load(path, mmap_mode="r")
+        if self.frames.ndim != 4:
+            raise ValueError(f"{path}: expected (frames, height, width, channels), got {self.frames.shape}")
+        self.fps = fps
+
+    def read(self, image=None):
+        if self.index >= len(self.frames):
+            return False, None
+        frame = self.frames[self.index]
+        self.position = self.index / self.fps
+        self.index += 1
+        return True, _into(image, frame)
+
+    def frame_count(self):
+        return len(self.frames)
+
+    def seek(self, index):
+        self.index = max(0, index)
+        return True
+
+    def release(self):
+        self.frames = np.empty((0,) + self.frames.shape[1:], dtype=self.frames.dtype)
+
+
+class SyntheticReader(FrameReader):
+    """Generated frames (a bright blob moving over noise) for machines without a camera."""
+
+    def __init__(self, width=640, height=480, fps=30.0, count=None, seed=0):
+        """
+        Args:
+            count: Frames to generate; None never ends
+        """
+        super().__init__()
+        self.width, self.height = width, height
+        self.fps = fps
+        self.count = count
+        self._background = np.random.default_rng(seed).integers(0, 60, (height, width, 3), dtype=np.uint8)
+
+    def read(self, image=None):
+        if self.count is not None and self.index >= self.count:
+            return False, None
+        shape = self._background.shape
+        img = image if image is not None and image.shape == shape and image.dtype == np.uint8 \
+            else np.empty(shape, dtype=np.uint8)
+        np.copyto(img, self._background)
+        phase = (self.index % 120) / 120.0
+        cx = int(self.width * (0.2 + 0.6 * abs(2 * phase - 1)))
+        cv2.circle(img, (cx, self.height // 2), self.height // 6, (180, 200, 230), -1)
+        self.position = self.index / self.fps
+        self.index += 1
+        return True, img
+
+    def frame_count(self):
+        return self.count or 0
+
+    def seek(self, index):
+        self.index = max(0, index)
+        return True
+
+
+class LoopingReader(FrameReader):
+    """Starts a seekable reader over whenever it ends (for soak tests)."""
+
+    def __init__(self, reader):
+        super().__init__()
+        self.reader = reader
+        self.fps = reader.fps
+        self.loops = 0
+        self._offset = 0.0
+
+    def read(self, image=None):
+        success, img = self.reader.read(image)
+        if not success and self.reader.seek(0):
+            self.loops += 1
+            self._offset += self.reader.position + 1.0 / self.fps
+            success, img = self.reader.read(image)
+        if success:
+            self.index += 1
+            self.position = self._offset + self.reader.position
+        return success, img
+
+    def isOpened(self):
+        return self.reader.isOpened()
+
+    def release(self):
+        self.reader.release()
+
+
+class _Frame:
+    __slots__ = ("image", "timestamp", "captured", "position", "generation")
+
+    def __init__(self, image, timestamp, captured, position, generation):
+        self.image = image
+        self.timestamp = timestamp
+        self.captured = captured
+        self.position = position
+        self.generation = generation
+
+
+class PrefetchSource:
+    """
+    Reads a FrameReader ahead on a background thread into a bounded ring.
+
+    The ring's buffers come from a FramePool: read(image) copies the frame
+    into the caller's buffer and recycles the slot, so the steady state
+    allocates nothing. read() without a buffer hands the slot itself over.
+    """
+
+    def __init__(self, reader, depth=4, drop_old=None):
+        """
+        Args:
+            reader: FrameReader to read from
+            depth: Frames decoded ahead
+            drop_old: Return the newest frame and skip older ones (default:
+                      only for live sources); otherwise the reader waits
+                      for room in the ring and no frame is lost
+        """
+        self.reader = reader
+        self.depth = max(1, depth)
+        self.drop_old = reader.live if drop_old is None else drop_old
+        self.pool = FramePool(max_free=self.depth + 2)
+        self.timestamp = None
+        self.captured = None
+        self.position = 0.0
+        self.frames_read = 0
+        self.dropped = 0
+        self.wait_seconds = 0.0
+        self._ring = deque()
+        self._cond = threading.Condition()
+        self._read_lock = threading.Lock()
+        self._generation = 0
+        self._ended = False
+        self._running = False
+        self._thread = None
+
+    @property
+    def live(self):
+        return self.reader.live
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._ended = False
+            self._thread = threading.Thread(target=self._read_loop, name="frame-source", daemon=True)
+            self._thread.start()
+        return self
+
+    def _read_loop(self):
+        shape = None
+        while self._running:
+            slot = self.pool.acquire(shape) if shape else None
+            with self._read_lock:
+                success, img = self.reader.read(slot)
+                timestamp, captured = time.time(), time.perf_counter()
+                position, generation = self.reader.position, self._generation
+            if not success:
+                self.pool.release(slot)
+                break
+            if img is not slot:
+                self.pool.release(slot)
+            shape = img.shape
+            self._put(_Frame(img, timestamp, captured, position, generation))
+        with self._cond:
+            self._ended = True
+            self._cond.notify_all()
+
+    def _put(self, frame):
+        with self._cond:
+            if not self.drop_old:
+                self._cond.wait_for(lambda: len(self._ring) < self.depth or not self._running)
+            if frame.generation != self._generation or not self._running:
+                self.pool.release(frame.image)
+                return
+            if len(self._ring) >= self.depth:
+                self.pool.release(self._ring.popleft().image)
+                self.dropped += 1
+            self._ring.append(frame)
+            self._cond.notify_all()
+
+    def read(self, image=None):
+        """Next frame (the newest one when dropping old frames), like VideoCapture.read()."""
+        if self._thread is None:
+            self.start()
+        start = time.perf_counter()
+        with self._cond:
+            self._cond.wait_for(lambda: self._ring or self._ended)
+            if not self._ring:
+                return False, None
+            if self.drop_old:
+                while len(self._ring) > 1:
+                    self.pool.release(self._ring.popleft().image)
+                    self.dropped += 1
+            frame = self._ring.popleft()
+            self._cond.notify_all()
+        self.wait_seconds += time.perf_counter() - start
+        self.frames_read += 1
+        self.timestamp, self.captured, self.position = frame.timestamp, frame.captured, frame.position
+        if image is not None and image.shape == frame.image.shape and image.dtype == frame.image.dtype:
+            np.copyto(image, frame.image)
+            self.pool.release(frame.image)
+            return True, image
+        return True, frame.image
+
+    def isOpened(self):
+        return self.reader.isOpened()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.position * 1000.0
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frames_read)
+        return self.reader.get(prop)
+
+    def set(self, prop, value):
+        """Seeking (CAP_PROP_POS_FRAMES) discards the frames read ahead."""
+        with self._read_lock:
+            if not self.reader.set(prop, value):
+                return False
+            with self._cond:
+                self._generation += 1
+                while self._ring:
+                    self.pool.release(self._ring.popleft().image)
+                self._cond.notify_all()
+            if prop == cv2.CAP_PROP_POS_FRAMES:
+                self.frames_read = int(value)
+        if self._ended and self._running:
+            # The reader had reached the end; read from the new position again
+            self._thread.join()
+            self.start()
+        return True
+
+    def release(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.reader.release()
+
+    def stats(self):
+        return {
+            "frames": self.frames_read,
+            "dropped": self.dropped,
+            "buffered": len(self._ring),
+            "avg_wait_ms": round(1000.0 * self.wait_seconds / self.frames_read, 3) if self.frames_read else 0.0,
+            **self.pool.stats(),
+        }
+
+
+def open_reader(spec):
+    """FrameReader for a source spec (see the module docstring)."""
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return VideoReader(int(spec))
+    if spec == "synthetic" or spec.startswith("synthetic:"):
+        _, _, size = spec.partition(":")
+        width, _, height = size.partition("x")
+        return SyntheticReader(int(width or 640), int(height or 480))
+    if spec.lower().endswith(".npy"):
+        return RawFileReader(spec)
+    if os.path.isdir(spec):
+        return ImageDirReader(spec)
+    return VideoReader(spec)
+
+
+def open_frame_source(spec, prefetch=4, drop_old=None, loop=False):
+    """
+    Open a source spec, read ahead on a background thread unless prefetch is 0.
+
+    Args:
+        prefetch: Frames decoded ahead (0 reads on the caller's thread)
+        drop_old: See PrefetchSource; default: only for live sources
+        loop: Start files, image directories and .npy frames over at the end
+    """
+    reader = open_reader(spec)
+    if loop and not reader.live:
+        reader = LoopingReader(reader)
+    if not prefetch:
+        return reader
+    return PrefetchSource(reader, depth=prefetch, drop_old=drop_old)
+
+
+def frame_times(cap):
+    """
+    (time.time(), time.perf_counter()) at which cap's last frame was read off
+    the source; the current time for sources that don't track it.
+    """
+    captured = getattr(cap, "captured", None)
+    if captured is None:
+        return time.time(), time.perf_counter()
+    return cap.timestamp, captured
+
+
+def write_raw(spec, path, max_frames=None):
+    """Decode a source once into a .npy raw frame file for RawFileReader; returns its shape."""
+    reader = open_reader(spec)
+    first = reader.read()[1] if reader.isOpened() else None
+    if first is None:
+        raise RuntimeError(f"No frames read from {spec}")
+    count = reader.frame_count() or max_frames
+    if not count:
+        raise ValueError(f"{spec} has no known length; pass max_frames")
+    count = min(count, max_frames or count)
+    frames = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(count,) + first.shape)
+    frames[0] = first
+    written = 1
+    while written < count and reader.read(frames[written])[0]:
+        written += 1
+    reader.release()
+    frames.flush()
+    del frames
+    if written < count:
+        # The container reported more frames than it held: keep what was read
+        np.save(path, np.load(path)[:written])
+    return (written,) + first.shape
+
+
+def measure_wait(cap, frames, work_seconds):
+    """
+    Read frames while "processing" each for work_seconds, like the live loop
+    running the detector. Returns (milliseconds per frame spent waiting in
+    read(), frames read).
+    """
+    buffer = None
+    waited, count = 0.0, 0
+    while count < frames:
+        start = time.perf_counter()
+        success, img = cap.read(buffer)
+        waited += time.perf_counter() - start
+        if not success:
+            break
+        buffer = img
+        count += 1
+        # Busy work stands in for the detector, which holds the GIL in parts as well
+        deadline = time.perf_counter() + work_seconds
+        while time.perf_counter() < deadline:
+            pass
+    return 1000.0 * waited / max(1, count), count
+
+
+# For quick testing:
+#   python -m src.sources bench <spec> [--frames N] [--work-ms MS]
+#   python -m src.sources raw <spec> <out.npy> [--frames N]
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Frame sources with decode-ahead prefetching")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench", help="time spent waiting for frames, with and without prefetching")
+    bench.add_argument("source", nargs="?", default="synthetic:1280x720")
+    bench.add_argument("--frames", type=int, default=300)
+    bench.add_argument("--work-ms", type=float, default=15.0, help="simulated per-frame processing")
+    bench.add_argument("--depth", type=int, default=4)
+    raw = commands.add_parser("raw", help="decode a source into a memory-mapped .npy frame file")
+    raw.add_argument("source")
+    raw.add_argument("output")
+    raw.add_argument("--frames", type=int)
+    args = parser.parse_args()
+
+    if args.command == "raw":
+        shape = write_raw(args.source, args.output, args.frames)
+        print(f"✓ Wrote {shape[0]} frames of {shape[2]}x{shape[1]} to {args.output}")
+    else:
+        report = {"source": str(args.source), "work_ms": args.work_ms}
+        for name, prefetch in (("direct", 0), ("prefetch", args.depth)):
+            cap = open_frame_source(args.source, prefetch=prefetch)
+            if not cap.isOpened():
+                raise SystemExit(f"Could not open source: {args.source}")
+            start = time.perf_counter()
+            wait_ms, frames = measure_wait(cap, args.frames, args.work_ms / 1000.0)
+            elapsed = time.perf_counter() - start
+            report[name] = {"frames": frames, "wait_ms_per_frame": round(wait_ms, 3),
+                            "fps": round(frames / elapsed, 1)}
+            if prefetch:
+                report[name].update(cap.stats())
+            cap.release()
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,154 @@
+"""
+Latency-bounded scheduling of speech output.
+
+Speaking takes longer than signing, so a plain FIFO lets the voice trail the
+hand by seconds and then repeats the whole sentence on top. SpeechScheduler
+keeps the spoken output close to the signer:
+
+- words older than max_word_age when the speaker is ready are dropped
+- all words waiting at that moment are merged into one utterance
+- a sentence completion goes ahead of waiting words, and those words are
+  dropped as superseded (the sentence already contains them)
+- the speech thread sleeps on a condition variable and wakes on put/close
+
+Items may carry a WordTrace (src/tracing.py); dropped items finish theirs
+with the reason they were dropped.
+"""
+import threading
+import time
+from collections import deque
+
+WORD = "word"
+SENTENCE = "sentence"
+
+
+class SpeechItem:
+    __slots__ = ("text", "kind", "queued_at", "trace")
+
+    def __init__(self, text, kind, queued_at, trace=None):
+        self.text = text
+        self.kind = kind
+        self.queued_at = queued_at
+        self.trace = trace
+
+
+class SpeechScheduler:
+    def __init__(self, max_word_age=1.5, max_sentence_age=8.0, coalesce=True,
+                 max_items=64, metrics=None):
+        """
+        Args:
+            max_word_age: Seconds after which a waiting word is no longer worth saying
+            max_sentence_age: Same deadline for sentence completions
+            coalesce: Merge all waiting words into one utterance
+            max_items: Queue bound; the oldest item is dropped beyond it
+            metrics: Optional Metrics registry (queue wait, drops, merges)
+        """
+        self.max_word_age = max_word_age
+        self.max_sentence_age = max_sentence_age
+        self.coalesce = coalesce
+        self.max_items = max_items
+        self.metrics = metrics
+        self.closed = False
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.counts = {"queued": 0, "spoken": 0, "stale": 0, "superseded": 0,
+                       "coalesced": 0, "overflow": 0}
+
+    def put(self, text, kind=WORD, trace=None):
+        if not text:
+            return
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._items) >= self.max_items:
+                self._drop(self._items.popleft(), "overflow")
+            self._items.append(SpeechItem(text, kind, time.monotonic(), trace))
+            self.counts["queued"] += 1
+            self._cond.notify()
+
+    def qsize(self):
+        return len(self._items)
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Block until there is something worth saying and return it as one
+        utterance, or None when closed (or on timeout).
+        """
+        items = self.get_items(timeout)
+        return " ".join(item.text for item in items) if items else None
+
+    def get_items(self, timeout=None):
+        """Like get(), but returns the SpeechItems making up the utterance."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._drop_stale(time.monotonic())
+                if self._items:
+                    break
+                if self.closed:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            items = self._take()
+
+        now = time.monotonic()
+        if self.metrics:
+            for item in items:
+                self.metrics.observe("speech_queue_wait", now - item.queued_at)
+        self.counts["spoken"] += len(items)
+        return items
+
+    def _drop_stale(self, now):
+        kept = deque()
+        for item in self._items:
+            limit = self.max_sentence_age if item.kind == SENTENCE else self.max_word_age
+            if now - item.queued_at > limit:
+                self._drop(item, "stale")
+            else:
+                kept.append(item)
+        self._items = kept
+
+    def _take(self):
+        sentences = [i for i in self._items if i.kind == SENTENCE]
+        if sentences:
+            # Sentence completions preempt words; words queued before the
+            # sentence are part of it and would only be said twice
+            sentence = sentences[0]
+            kept = deque()
+            for item in self._items:
+                if item is sentence:
+                    continue
+                if item.kind == WORD and item.queued_at <= sentence.queued_at:
+                    self._drop(item, "superseded")
+                else:
+                    kept.append(item)
+            self._items = kept
+            return [sentence]
+
+        if not self.coalesce:
+            return [self._items.popleft()]
+        items = list(self._items)
+        self._items.clear()
+        if len(items) > 1:
+            self._count("coalesced", len(items) - 1)
+        return items
+
+    def _drop(self, item, reason):
+        self._count(reason)
+        if item.trace is not None:
+            item.trace.finish(reason)
+
+    def _count(self, name, amount=1):
+        self.counts[name] += amount
+        if self.metrics:
+            self.metrics.inc(f"speech_{name}", amount)
+
+    def stats(self):
+        return dict(self.counts, depth=len(self._items))
@@ -0,0 +1,285 @@
+"""
+Temporal stabilization of per-frame gesture predictions.
+
+A Stabilizer keeps the last `buffer_size` labels in a ring buffer with running
+per-label counts, so every update is O(1) regardless of the buffer size, and
+delegates the decision to a pluggable policy:
+
+    MajorityVote   most frequent label in the window (the original behaviour)
+    Hysteresis     switch labels only on a clear majority, hold them on a weaker one
+    DecayedVote    exponentially-decayed votes over the whole history
+
+stabilize_sequence() stabilizes a whole recorded label sequence at once, using
+vectorized NumPy for majority voting.
+"""
+from collections import deque
+
+import numpy as np
+
+
+class VoteWindow:
+    """
+    Fixed-size ring buffer of labels with running counts.
+
+    mode() returns the most frequent label; ties go to the label whose oldest
+    occurrence in the window is earliest, matching Counter(buffer).most_common(1).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        self._ring = [None] * self.size
+        self._head = 0
+        self._len = 0
+        self._seq = 0
+        self.counts = {}
+        self._positions = {}                                # label -> seq numbers in the window
+        self._by_count = [set() for _ in range(self.size + 1)]  # count -> labels with that count
+        self.max_count = 0
+
+    def __len__(self):
+        return self._len
+
+    def push(self, label):
+        """Append a label, evicting the oldest one when full. Returns the evicted label."""
+        evicted = None
+        if self._len == self.size:
+            evicted = self._ring[self._head]
+            self._decrement(evicted)
+        else:
+            self._len += 1
+        self._ring[self._head] = label
+        self._head = (self._head + 1) % self.size
+        self._increment(label)
+        return evicted
+
+    def _increment(self, label):
+        count = self.counts.get(label, 0)
+        if count:
+            self._by_count[count].discard(label)
+            self._positions[label].append(self._seq)
+        else:
+            self._positions[label] = deque((self._seq,))
+        self.counts[label] = count + 1
+        self._by_count[count + 1].add(label)
+        if count + 1 > self.max_count:
+            self.max_count = count + 1
+        self._seq += 1
+
+    def _decrement(self, label):
+        count = self.counts[label]
+        self._by_count[count].discard(label)
+        if count == 1:
+            del self.counts[label]
+            del self._positions[label]
+        else:
+            self.counts[label] = count - 1
+            self._by_count[count - 1].add(label)
+            self._positions[label].popleft()
+        if count == self.max_count and not self._by_count[count]:
+            self.max_count = count - 1
+
+    def mode(self):
+        """Return (label, count) of the most frequent label, or (None, 0) if empty."""
+        if not self.max_count:
+            return None, 0
+        tied = self._by_count[self.max_count]
+        if len(tied) == 1:
+            return next(iter(tied)), self.max_count
+        label = min(tied, key=lambda l: self._positions[l][0])
+        return label, self.max_count
+
+    def labels(self):
+        """Labels in the window, oldest first."""
+        if self._len < self.size:
+            return self._ring[:self._len]
+        return self._ring[self._head:] + self._ring[:self._head]
+
+
+class StabilizerPolicy:
+    """Base class for stabilization policies."""
+
+    def push(self, label):
+        """Called for every non-None label before decide()."""
+
+    def decide(self, window):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+
+class MajorityVote(StabilizerPolicy):
+    """Most frequent label in the window, if it has at least min_votes."""
+
+    def __init__(self, min_votes=0):
+        self.min_votes = min_votes
+
+    def decide(self, window):
+        label, votes = window.mode()
+        return label if votes >= self.min_votes else None
+
+
+class Hysteresis(StabilizerPolicy):
+    """
+    Switch to a label only once it has enter_votes in the window, and keep
+    emitting it while it still has exit_votes. Avoids flicker between two
+    labels that are close in the vote.
+    """
+
+    def __init__(self, enter_votes, exit_votes=None):
+        self.enter_votes = enter_votes
+        self.exit_votes = exit_votes if exit_votes is not None else max(1, enter_votes // 2)
+        self.current = None
+
+    def decide(self, window):
+        label, votes = window.mode()
+        if label is not None and votes >= self.enter_votes:
+            self.current = label
+        elif self.current is not None and window.counts.get(self.current, 0) < self.exit_votes:
+            self.current = None
+        return self.current
+
+    def reset(self):
+        self.current = None
+
+
+class DecayedVote(StabilizerPolicy):
+    """
+    Exponentially-decayed voting: a label seen n updates ago weighs decay**n.
+    Emits the top label when its share of the total weight reaches threshold.
+
+    Instead of decaying every score on each update, new votes get a growing
+    weight (1 / decay**t), so an update touches one score only.
+    """
+
+    # Renormalize before the growing vote weight can overflow
+    _MAX_WEIGHT = 1e100
+
+    def __init__(self, decay=0.8, threshold=0.5):
+        if not 0 < decay < 1:
+            raise ValueError("decay must be between 0 and 1")
+        self.decay = decay
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        self.scores = {}
+        self.total = 0.0
+        self.weight = 1.0
+        self.best = None
+
+    def push(self, label):
+        self.weight /= self.decay
+        if self.weight > self._MAX_WEIGHT:
+            self._renormalize()
+        score = self.scores.get(label, 0.0) + self.weight
+        self.scores[label] = score
+        self.total += self.weight
+        # Only this label's score grew, so it is the only possible new maximum
+        if self.best is None or score >= self.scores[self.best]:
+            self.best = label
+
+    def _renormalize(self):
+        scale = self.weight
+        self.scores = {k: v / scale for k, v in self.scores.items() if v / scale > 1e-12}
+        self.total /= scale
+        self.weight = 1.0
+        if self.best not in self.scores:
+            self.best = max(self.scores, key=self.scores.get) if self.scores else None
+
+    def decide(self, window):
+        if self.best is None or self.total <= 0:
+            return None
+        return self.best if self.scores[self.best] / self.total >= self.threshold else None
+
+
+class Stabilizer:
+    """
+    Stabilizes a stream of per-frame labels.
+
+    Args:
+        buffer_size: Number of recent labels kept in the window
+        policy: StabilizerPolicy (default: MajorityVote())
+        min_fill: Labels needed in the window before anything is emitted
+    """
+
+    def __init__(self, buffer_size=10, policy=None, min_fill=0):
+        self.buffer_size = buffer_size
+        self.window = VoteWindow(buffer_size)
+        self.policy = policy or MajorityVote()
+        self.min_fill = min_fill
+        self.output = None
+
+    def update(self, label):
+        """Add a label and return the stabilized label (None input returns None)."""
+        if label is None:
+            return None
+        self.window.push(label)
+        self.policy.push(label)
+        decision = self.policy.decide(self.window)
+        self.output = decision if len(self.window) >= self.min_fill else None
+        return self.output
+
+    def reset(self):
+        self.window.clear()
+        self.policy.reset()
+        self.output = None
+
+    def __len__(self):
+        return len(self.window)
+
+
+def stabilize_sequence(labels, buffer_size=10, policy=None, min_fill=0):
+    """
+    Stabilize a whole label sequence; equivalent to calling Stabilizer.update
+    on each element in order with a fresh Stabilizer.
+
+    Majority voting is computed in vectorized form with windowed cumulative
+    counts; stateful policies (Hysteresis, DecayedVote) fall back to the O(1)
+    per-item loop.
+
+    Args:
+        labels: sequence of labels, None where there was no prediction
+
+    Returns:
+        object array of stabilized labels (None where nothing is emitted)
+    """
+    labels = np.asarray(labels, dtype=object)
+    out = np.full(len(labels), None, dtype=object)
+
+    if policy is not None and not isinstance(policy, MajorityVote):
+        stabilizer = Stabilizer(buffer_size, policy, min_fill)
+        for i, label in enumerate(labels):
+            out[i] = stabilizer.update(label)
+        return out
+
+    min_votes = policy.min_votes if policy is not None else 0
+    valid = np.fromiter((label is not None for label in labels), dtype=bool, count=len(labels))
+    if not valid.any():
+        return out
+
+    # Vote codes of the non-None labels, in the order they entered the window
+    vocab, codes = np.unique(labels[valid], return_inverse=True)
+    m, v = len(codes), len(vocab)
+
+    onehot = np.zeros((m + 1, v), dtype=np.int32)
+    onehot[np.arange(1, m + 1), codes] = 1
+    cumulative = np.cumsum(onehot, axis=0)
+
+    position = np.arange(m)
+    window_start = np.maximum(0, position - buffer_size + 1)
+    counts = cumulative[position + 1] - cumulative[window_start]
+    max_counts = counts.max(axis=1)
+
+    # Tie-break like VoteWindow.mode: earliest first occurrence inside the window
+    occurrence = np.where(onehot[1:] == 1, position[:, None], m)
+    next_occurrence = np.minimum.accumulate(occurrence[::-1], axis=0)[::-1]
+    first_seen = next_occurrence[window_start]
+    winner = np.where(counts == max_counts[:, None], first_seen, m + 1).argmin(axis=1)
+
+    emit = (position - window_start + 1 >= min_fill) & (max_counts >= min_votes)
+    out[valid] = np.where(emit, vocab[winner], None)
+    return out
@@ -0,0 +1,125 @@
+"""
+Startup sequencing and timeline.
+
+The camera, the MediaPipe Hands graph (including importing MediaPipe) and the
+TTS engine used to be created one after another behind a fixed 3 s delay.
+start_components() opens the camera and builds and warms up the detector on
+background threads while the caller builds the voice engine, and a
+StartupTimeline records when each step ran:
+
+    [Startup] camera               0.000 -> 0.412 s
+    [Startup] detector             0.001 -> 0.687 s
+    [Startup] warm-up inference    0.687 -> 0.779 s
+    [Startup] voice engine         0.002 -> 0.311 s
+    [Startup] first frame                   0.902 s
+    [Startup] first recognition             2.480 s
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.sources import open_frame_source
+
+
+class StartupTimeline:
+    def __init__(self, metrics=None):
+        """
+        Args:
+            metrics: Optional Metrics registry; every mark becomes a
+                     startup_<name>_seconds gauge
+        """
+        self.metrics = metrics
+        self.t0 = time.perf_counter()
+        self.spans = {}    # name -> [start, end]
+        self.marks = {}    # name -> time
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter() - self.t0
+
+    def span(self, name):
+        """Context manager recording when a startup step ran."""
+        return _Span(self, name)
+
+    def mark(self, name):
+        """Record a one-off event (only the first call per name counts)."""
+        if name in self.marks:
+            return
+        with self._lock:
+            if name in self.marks:
+                return
+            value = self.marks[name] = self.now()
+        if self.metrics:
+            metric = name.replace(" ", "_").replace("-", "_")
+            self.metrics.gauge(f"startup_{metric}_seconds", lambda: round(value, 4))
+
+    def report(self):
+        lines = []
+        for name, (start, end) in sorted(self.spans.items(), key=lambda kv: kv[1][0]):
+            lines.append(f"[Startup] {name:<20} {start:6.3f} -> {end:6.3f} s")
+        for name, at in sorted(self.marks.items(), key=lambda kv: kv[1]):
+            lines.append(f"[Startup] {name:<20}           {at:6.3f} s")
+        return "\n".join(lines)
+
+    def snapshot(self):
+        return {
+            "spans": {k: [round(a, 4), round(b, 4)] for k, (a, b) in self.spans.items()},
+            "marks": {k: round(v, 4) for k, v in self.marks.items()},
+        }
+
+
+class _Span:
+    __slots__ = ("timeline", "name")
+
+    def __init__(self, timeline, name):
+        self.timeline = timeline
+        self.name = name
+
+    def __enter__(self):
+        self.timeline.spans[self.name] = [self.timeline.now(), None]
+        return self
+
+    def __exit__(self, *exc):
+        self.timeline.spans[self.name][1] = self.timeline.now()
+
+
+def _open_camera(source, timeline, prefetch):
+    with timeline.span("camera"):
+        cap = open_frame_source(source, prefetch=prefetch)
+        # Reading one frame makes sure the device has actually started streaming
+        success, frame = cap.read() if cap.isOpened() else (False, None)
+    return cap, frame.shape if success else None
+
+
+def _build_detector(timeline, shape_future, detector_kwargs):
+    with timeline.span("detector"):
+        from src.pretrained_detector import PretrainedSignDetector
+        detector = PretrainedSignDetector(**detector_kwargs)
+    # Warm up at the camera's resolution once it is known
+    shape = shape_future.result()[1] or (480, 640, 3)
+    with timeline.span("warm-up inference"):
+        detector.warm_up(shape)
+    return detector
+
+
+def start_components(source=0, timeline=None, voice_factory=None, detector_kwargs=None, prefetch=4):
+    """
+    Open the camera and build + warm up the detector concurrently, while the
+    calling thread runs voice_factory (pyttsx3 prefers to be created there).
+    detector_kwargs are passed to PretrainedSignDetector.
+
+    source is any spec open_frame_source() accepts (camera index, video,
+    image directory, .npy frames, synthetic), read ahead by prefetch frames.
+
+    Returns (cap, detector, voice); cap may not be opened - check isOpened().
+    """
+    timeline = timeline or StartupTimeline()
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as pool:
+        camera = pool.submit(_open_camera, source, timeline, prefetch)
+        detector = pool.submit(_build_detector, timeline, camera, detector_kwargs or {})
+        voice = None
+        if voice_factory:
+            with timeline.span("voice engine"):
+                voice = voice_factory()
+        cap, _ = camera.result()
+        return cap, detector.result(), voice
@@ -0,0 +1,510 @@
+"""
+Serve many frame sources (kiosks, cameras, recorded clips) from one process.
+
+Each stream owns its own MediaPipe Hands graph - that is where the hand
+tracking state lives, so streams must not share one - plus its own
+GestureManager (stabilizer and sentence). The compute is a bounded pool of
+worker threads; hands.process releases the GIL while the graph runs, so the
+pool scales with the core count.
+
+Scheduling is round-robin over streams that have a frame waiting, with at
+most one frame in flight per stream and "latest frame wins" inside a stream.
+A stream sending 60 fps therefore gets the same turn as one sending 10 fps
+and cannot starve the others; it just drops more of its own frames.
+Unpaced video files are the exception: nothing is lost by waiting for them,
+so their reader waits for the pending frame to be taken instead of
+replacing it, and every frame is processed.
+
+Sources:
+    path/to/clip.mp4         video file (paced to its own fps by default)
+    rtsp://... / http://...  anything cv2.VideoCapture can open
+    0, 1, ...                local camera index
+    --listen HOST:PORT       every TCP connection becomes a stream of
+                             length-prefixed JPEG frames (see send_video)
+"""
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from src.buffers import FramePool
+from src.metrics import RollingHistogram
+from src.utils import GestureManager
+
+# Socket frame header: payload length, big-endian uint32
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+
+def _recv_exact(sock, size):
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if not n:
+            return None
+        received += n
+    return data
+
+
+class SocketFrameSource:
+    """VideoCapture-like reader for length-prefixed JPEG frames on a socket."""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def read(self, image=None):
+        try:
+            header = _recv_exact(self.sock, _HEADER.size)
+            if header is None:
+                return False, None
+            (size,) = _HEADER.unpack(header)
+            if size > MAX_FRAME_BYTES:
+                return False, None
+            payload = _recv_exact(self.sock, size)
+        except OSError:
+            return False, None
+        if payload is None:
+            return False, None
+        img = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return False, None
+        if image is not None and image.shape == img.shape:
+            image[...] = img
+            return True, image
+        return True, img
+
+    def get(self, prop):
+        return 0.0
+
+    def interrupt(self):
+        """Make a read() blocked on the socket return, without closing it under the reader."""
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def release(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def send_video(path, host, port, fps=None, quality=80, loop=False):
+    """Stream a video file to a listening StreamServer as JPEG frames (for testing)."""
+    cap = cv2.VideoCapture(path)
+    fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30.0
+    with socket.create_connection((host, port)) as sock:
+        next_time = time.perf_counter()
+        while True:
+            success, img = cap.read()
+            if not success:
+                if not loop:
+                    break
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            ok, jpeg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ok:
+                sock.sendall(_HEADER.pack(len(jpeg)) + jpeg.tobytes())
+            next_time += 1.0 / fps
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+    cap.release()
+
+
+def open_source(spec):
+    """cv2.VideoCapture for a file path, URL or camera index."""
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return cv2.VideoCapture(int(spec))
+    return cv2.VideoCapture(spec)
+
+
+class Stream:
+    """Per-stream state: source, tracking graph, gesture state and statistics."""
+
+    def __init__(self, name, source, paced, manager, lossless=False):
+        self.name = name
+        self.source = source
+        self.paced = paced
+        self.lossless = lossless   # reader waits for the pending frame instead of dropping it
+        self.manager = manager
+        self.detector = None
+        self.reader = None         # reader thread
+
+        self.frame = None          # latest unprocessed frame (pool buffer)
+        self.frame_time = 0.0      # perf_counter when it was read
+        self.queued = False        # in the ready queue
+        self.in_flight = False     # being processed by a worker
+        self.ready_since = None
+        self.reader_finished = False
+        self.done = False
+        self.shape = None
+        self.lock = threading.Lock()
+        self.taken = threading.Condition(self.lock)  # the pending frame went to a worker
+
+        self.offered = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_wait = 0.0
+        self.started = None
+        self.finished = None
+        self.latency = RollingHistogram()
+        self.words = []
+        self.sentences = []
+
+    def snapshot(self):
+        end = self.finished or time.perf_counter()
+        elapsed = end - self.started if self.started else 0.0
+        return {
+            "stream": self.name,
+            "offered": self.offered,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "served_ratio": round(self.processed / self.offered, 3) if self.offered else 0.0,
+            "fps": round(self.processed / elapsed, 1) if elapsed > 0 else 0.0,
+            "offered_fps": round(self.offered / elapsed, 1) if elapsed > 0 else 0.0,
+            "avg_inference_ms": round(1000.0 * self.busy_seconds / self.processed, 2) if self.processed else 0.0,
+            "max_wait_ms": round(1000.0 * self.max_wait, 1),
+            "latency": self.latency.snapshot(),
+            "words": list(self.words),
+            "sentence": list(self.manager.sentence),
+            "done": self.done,
+        }
+
+
+def jain_fairness(values):
+    """Jain's fairness index: 1.0 when all values are equal, 1/n when one takes everything."""
+    values = [v for v in values if v is not None]
+    if not values or not any(values):
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(v * v for v in values))
+
+
+def max_min_shares(demands, capacity):
+    """
+    Max-min fair split of capacity: streams asking for less than an equal
+    share get what they ask for, the rest is split evenly among the others.
+    """
+    shares = [0.0] * len(demands)
+    remaining = sorted(range(len(demands)), key=lambda i: demands[i])
+    while remaining:
+        equal = capacity / len(remaining)
+        i = remaining[0]
+        if demands[i] <= equal:
+            shares[i] = demands[i]
+            capacity -= demands[i]
+            remaining.pop(0)
+        else:
+            for i in remaining:
+                shares[i] = equal
+            break
+    return shares
+
+
+class StreamServer:
+    def __init__(self, workers=None, max_streams=16, detector_factory=None,
+                 on_word=None, on_sentence=None, flip=True, manager_factory=GestureManager):
+        """
+        Args:
+            workers: Inference threads (default: number of cores)
+            max_streams: Streams accepted at once; each holds a Hands graph in memory
+            detector_factory: Callable creating a detector (default: PretrainedSignDetector)
+            on_word: callback(stream_name, word) for every finalized word
+            on_sentence: callback(stream_name, sentence) for every completed sentence
+            flip: Mirror frames like the live app does
+            manager_factory: Callable creating each stream's GestureManager
+        """
+        if detector_factory is None:
+            from src.pretrained_detector import PretrainedSignDetector
+            detector_factory = PretrainedSignDetector
+        self.workers = workers or os.cpu_count() or 1
+        self.max_streams = max_streams
+        self.detector_factory = detector_factory
+        self.manager_factory = manager_factory
+        self.on_word = on_word
+        self.on_sentence = on_sentence
+        self.flip = flip
+
+        self.streams = {}
+        self.pool = FramePool(max_free=2 * max_streams)
+        self.running = False
+        self._ready = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._listener = None
+        self._accept_thread = None
+        self._detector_lock = threading.Lock()
+
+    # --- Sources ---
+
+    def add_source(self, spec, name=None, paced=None):
+        """
+        Add a file, URL or camera index as a stream.
+
+        Args:
+            paced: Read files at their own frame rate, like a live camera
+                   (default: True for files, False for live sources).
+                   Unpaced files are read as fast as they are processed,
+                   without dropping frames.
+        """
+        source = spec if hasattr(spec, "read") else open_source(spec)
+        is_file = isinstance(spec, str) and os.path.isfile(spec)
+        if paced is None:
+            paced = is_file
+        return self._add_stream(source, name or str(spec), paced, lossless=is_file and not paced)
+
+    def _add_stream(self, source, name, paced, lossless=False):
+        with self._cond:
+            if len([s for s in self.streams.values() if not s.done]) >= self.max_streams:
+                raise RuntimeError(f"Stream limit reached ({self.max_streams})")
+            base, n = name, 1
+            while name in self.streams:
+                n += 1
+                name = f"{base}#{n}"
+            stream = Stream(name, source, paced, self.manager_factory(), lossless)
+            self.streams[name] = stream
+        if self.running:
+            self._start_reader(stream)
+        return stream
+
+    def listen(self, host="127.0.0.1", port=0):
+        """Accept TCP connections, each one a stream of length-prefixed JPEG frames."""
+        self._listener = socket.create_server((host, port))
+        self._listener.settimeout(0.5)
+        self._accept_thread = threading.Thread(target=self._accept_loop, name="stream-accept", daemon=True)
+        if self.running:
+            self._accept_thread.start()
+        return self._listener.getsockname()[1]
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                conn, addr = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.settimeout(None)
+            try:
+                self._add_stream(SocketFrameSource(conn), f"{addr[0]}:{addr[1]}", paced=False)
+                print(f"✓ Stream connected: {addr[0]}:{addr[1]}")
+            except RuntimeError as e:
+                print(f"Rejected stream {addr[0]}:{addr[1]}: {e}")
+                conn.close()
+
+    # --- Lifecycle ---
+
+    def start(self):
+        self.running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"stream-worker-{i}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        for stream in list(self.streams.values()):
+            self._start_reader(stream)
+        if self._accept_thread and not self._accept_thread.is_alive():
+            self._accept_thread.start()
+        return self
+
+    def _start_reader(self, stream):
+        stream.reader = threading.Thread(target=self._reader_loop, args=(stream,),
+                                         name=f"stream-reader-{stream.name}", daemon=True)
+        stream.reader.start()
+
+    def stop(self):
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        for stream in list(self.streams.values()):
+            with stream.taken:
+                stream.taken.notify_all()
+        if self._listener:
+            self._listener.close()
+        streams = list(self.streams.values())
+        # Unblock readers waiting on a socket; cameras and files return within a frame
+        for stream in streams:
+            if hasattr(stream.source, "interrupt"):
+                stream.source.interrupt()
+        # A source is released only once its reader is out of read()
+        for stream in streams:
+            if stream.reader is not None:
+                stream.reader.join(timeout=1.0)
+            stream.source.release()
+        for thread in self._threads + [self._accept_thread]:
+            if thread and thread.is_alive():
+                thread.join(timeout=1.0)
+
+    def wait(self, timeout=None):
+        """Block until every stream has ended and been drained (or timeout)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.running:
+            if self.streams and all(s.done for s in self.streams.values()) and self._listener is None:
+                return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return False
+
+    # --- Stages ---
+
+    def _reader_loop(self, stream):
+        fps = stream.source.get(cv2.CAP_PROP_FPS) or 30.0
+        interval = 1.0 / fps if stream.paced else 0.0
+        next_time = time.perf_counter()
+        stream.started = next_time
+        while self.running:
+            buf = self.pool.acquire(stream.shape) if stream.shape else None
+            success, img = stream.source.read(buf)
+            if not success:
+                self.pool.release(buf)
+                break
+            if img is not buf:
+                self.pool.release(buf)
+                stream.shape = img.shape
+            if self.flip:
+                cv2.flip(img, 1, dst=img)
+            self._offer(stream, img, time.perf_counter())
+            if interval:
+                next_time += interval
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+
+        with stream.lock:
+            stream.done = not stream.in_flight and stream.frame is None
+            stream.reader_finished = True
+        if stream.done:
+            self._finish(stream)
+
+    def _offer(self, stream, img, read_time):
+        with stream.lock:
+            if stream.lossless:
+                stream.taken.wait_for(lambda: stream.frame is None or not self.running)
+                if not self.running:
+                    self.pool.release(img)
+                    return
+            stream.offered += 1
+            if stream.frame is not None:
+                # Latest frame wins within a stream
+                self.pool.release(stream.frame)
+                stream.dropped += 1
+            stream.frame = img
+            stream.frame_time = read_time
+            enqueue = not stream.queued and not stream.in_flight
+            if enqueue:
+                stream.queued = True
+                stream.ready_since = read_time
+        if enqueue:
+            with self._cond:
+                self._ready.append(stream)
+                self._cond.notify()
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._ready or not self.running)
+                if not self.running:
+                    return
+                stream = self._ready.popleft()
+
+            with stream.lock:
+                img, read_time = stream.frame, stream.frame_time
+                stream.frame = None
+                stream.taken.notify()
+                stream.queued = False
+                stream.in_flight = True
+                stream.max_wait = max(stream.max_wait, time.perf_counter() - stream.ready_since)
+
+            try:
+                self._process(stream, img, read_time)
+            except Exception as e:
+                # One bad frame must not take the worker down or leave the stream in flight
+                stream.errors += 1
+                print(f"Warning: stream {stream.name} frame failed: {e!r}")
+            finally:
+                self.pool.release(img)
+
+            with stream.lock:
+                stream.in_flight = False
+                requeue = stream.frame is not None
+                if requeue:
+                    # Back of the line: every other waiting stream goes first
+                    stream.queued = True
+                    stream.ready_since = time.perf_counter()
+                finished = not requeue and stream.reader_finished and not stream.done
+                if finished:
+                    stream.done = True
+            if requeue:
+                with self._cond:
+                    self._ready.append(stream)
+                    self._cond.notify()
+            if finished:
+                self._finish(stream)
+
+    def _process(self, stream, img, read_time):
+        if stream.detector is None:
+            # Graph construction is not thread-safe in every MediaPipe build
+            with self._detector_lock:
+                stream.detector = self.detector_factory()
+        detector = stream.detector
+
+        start = time.perf_counter()
+        detector.find_hands(img, draw=False)
+        landmarks = detector.get_landmarks(img)
+        prediction = detector.recognize_frame(landmarks)
+        end = time.perf_counter()
+
+        manager = stream.manager
+        stabilized = manager.update(prediction, captured=read_time)
+        word = manager.get_final_word(stabilized)
+        if word:
+            stream.words.append(word)
+            if self.on_word:
+                self.on_word(stream.name, word)
+        sentence = manager.should_finalize_sentence()
+        if sentence:
+            self._emit_sentence(stream, sentence)
+
+        stream.processed += 1
+        stream.busy_seconds += end - start
+        stream.latency.observe(time.perf_counter() - read_time)
+
+    def _emit_sentence(self, stream, sentence):
+        stream.sentences.append(sentence)
+        if self.on_sentence:
+            self.on_sentence(stream.name, sentence)
+
+    def _finish(self, stream):
+        # Flush whatever sentence was in progress when the source ended
+        if stream.manager.sentence:
+            self._emit_sentence(stream, " ".join(stream.manager.sentence))
+            stream.manager.sentence = []
+        stream.finished = time.perf_counter()
+        stream.detector = None  # free the Hands graph
+
+    # --- Reporting ---
+
+    def report(self):
+        """Per-stream statistics plus fairness across streams."""
+        streams = [s.snapshot() for s in list(self.streams.values())]
+        total_fps = sum(s["fps"] for s in streams)
+        # Throughput of each stream relative to its max-min fair share of the total:
+        # 1.0 means no stream got less than it was entitled to
+        fair = max_min_shares([s["offered_fps"] for s in streams], total_fps)
+        relative = [s["fps"] / f if f > 0 else 1.0 for s, f in zip(streams, fair)]
+        return {
+            "workers": self.workers,
+            "streams": streams,
+            "total_fps": round(total_fps, 1),
+            "fairness": round(jain_fairness(relative), 3),
+            "min_fair_share": round(min(relative), 3) if relative else 1.0,
+            "max_wait_ms": max((s["max_wait_ms"] for s in streams), default=0.0),
+            "frame_pool": self.pool.stats(),
+        }
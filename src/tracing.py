@@ -0,0 +1,230 @@
+"""
+Glass-to-speech latency tracing per recognized word.
+
+What users notice is the time from holding a sign in front of the camera
+to hearing it. WordTracer follows every word through the stages that add
+to it and breaks the total down into spans:
+
+    detection      capture of the first frame showing the sign -> its recognition
+    stabilization  -> the stabilizer's output switches to the sign (buffer size)
+    cooldown       -> GestureManager.get_final_word() releases it
+    queue          -> the speech thread picks it up (previous utterances, coalescing)
+    speech_onset   -> audio starts: the cached waveform's player is running
+                      (SpeechCache.play) or the TTS engine reports the
+                      utterance started
+
+GestureManager reports frames and released words to the tracer, and
+VoiceEngine claims the trace of every word it is asked to say, so loops
+only need to pass the capture time of each frame along. Words dropped by
+the speech scheduler (stale, superseded, overflow) are traced too, with
+their outcome. Finished traces are written as JSON lines to an optional
+trace file, observed as latency metrics, and summarized as percentiles
+per span:
+
+    tracer = WordTracer(metrics, "words.jsonl")
+    manager = GestureManager(tracer=tracer)
+    voice = VoiceEngine(tracer=tracer)
+    ...
+    manager.update(prediction, captured=t_captured)
+    ...
+    print(tracer.report())
+
+All times are time.perf_counter() seconds.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+SPANS = ("detection", "stabilization", "cooldown", "queue", "speech_onset")
+# Mark that ends each span, in order; the first span starts at "captured"
+MARKS = ("captured", "recognized", "stabilized", "released", "dequeued", "speech_start")
+
+
+class WordTrace:
+    __slots__ = ("word", "marks", "outcome", "_tracer")
+
+    def __init__(self, word, marks, tracer):
+        self.word = word
+        self.marks = marks
+        self.outcome = None
+        self._tracer = tracer
+
+    def mark(self, name, when=None):
+        self.marks[name] = time.perf_counter() if when is None else when
+
+    def finish(self, outcome):
+        """Close the trace ("spoken", "stale", "superseded", "overflow" or "unspoken")."""
+        if self.outcome is None:
+            self.outcome = outcome
+            self._tracer._finished(self)
+
+    def spans(self):
+        """Seconds spent in every span that has both of its marks."""
+        spans = {}
+        for name, start, end in zip(SPANS, MARKS, MARKS[1:]):
+            if start in self.marks and end in self.marks:
+                spans[name] = max(0.0, self.marks[end] - self.marks[start])
+        if "speech_start" in self.marks:
+            spans["glass_to_speech"] = self.marks["speech_start"] - self.marks["captured"]
+        return spans
+
+    def to_dict(self):
+        return {
+            "word": self.word,
+            "outcome": self.outcome,
+            "captured": round(self.marks["captured"], 6),
+            **{f"{name}_ms": round(seconds * 1e3, 2) for name, seconds in self.spans().items()},
+        }
+
+
+class WordTracer:
+    def __init__(self, metrics=None, path=None, window=10, keep=10000, max_pending=64):
+        """
+        Args:
+            metrics: Optional Metrics registry; every span is observed as
+                     word_<span> and the total as glass_to_speech
+            path: Optional JSON-lines file receiving one record per word
+            window: Frames a sign may be missing before its hold starts
+                    over (the GestureManager's buffer size)
+            keep: Finished traces kept in memory for summary()
+            max_pending: Released words waiting to be claimed by a voice;
+                         beyond it the oldest finishes as "unspoken" (no
+                         voice is listening)
+        """
+        self.metrics = metrics
+        self.window = window
+        self.traces = deque(maxlen=keep)
+        self.max_pending = max_pending
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        self._held = {}        # label -> (captured, recognized) of the first frame of its hold
+        self._last_seen = {}   # label -> frame number it was last predicted
+        self._stabilized = {}  # label -> when the stabilizer's output became it
+        self._output = None
+        self._frame = 0
+        self._pending = {}     # word -> released traces not claimed by the voice yet
+        self._order = deque()  # the same traces, oldest first
+        self._lock = threading.Lock()
+
+    def frame(self, prediction, stabilized, captured=None, recognized=None):
+        """Report one frame's raw prediction and stabilized output."""
+        now = time.perf_counter()
+        recognized = now if recognized is None else recognized
+        captured = recognized if captured is None else captured
+        self._frame += 1
+        if prediction is not None:
+            last_seen = self._last_seen.get(prediction)
+            if prediction not in self._held or last_seen is None or self._frame - last_seen > self.window:
+                # The sign is new, or was gone long enough to have left the stabilizer
+                self._held[prediction] = (captured, recognized)
+            self._last_seen[prediction] = self._frame
+        if stabilized != self._output:
+            self._output = stabilized
+            if stabilized is not None:
+                self._stabilized[stabilized] = now
+        elif stabilized is not None and stabilized not in self._stabilized:
+            # Still showing the word that was just released: its repeat starts now
+            self._stabilized[stabilized] = now
+
+    def release(self, word, when=None):
+        """A word left get_final_word(); returns its trace."""
+        when = time.perf_counter() if when is None else when
+        captured, recognized = self._held.pop(word, (when, when))
+        stabilized = self._stabilized.pop(word, when)
+        trace = WordTrace(word, {"captured": captured, "recognized": recognized,
+                                 "stabilized": max(stabilized, recognized), "released": when}, self)
+        with self._lock:
+            self._pending.setdefault(word, deque()).append(trace)
+            self._order.append(trace)
+            unclaimed = self._order.popleft() if len(self._order) > self.max_pending else None
+            if unclaimed is not None:
+                waiting = self._pending[unclaimed.word]
+                waiting.remove(unclaimed)
+                if not waiting:
+                    del self._pending[unclaimed.word]
+        if unclaimed is not None:
+            unclaimed.finish("unspoken")
+        return trace
+
+    def claim(self, text):
+        """Trace of the oldest released, not yet spoken word equal to text, or None."""
+        with self._lock:
+            waiting = self._pending.get(text)
+            if not waiting:
+                return None
+            trace = waiting.popleft()
+            if not waiting:
+                del self._pending[text]
+            self._order.remove(trace)
+            return trace
+
+    def pending(self):
+        """Released words not claimed by a voice yet."""
+        return len(self._order)
+
+    def _finished(self, trace):
+        spans = trace.spans()
+        with self._lock:
+            self.traces.append(trace)
+            if self._file:
+                self._file.write(json.dumps(trace.to_dict()) + "\n")
+                self._file.flush()
+        if self.metrics:
+            for name, seconds in spans.items():
+                self.metrics.observe(name if name == "glass_to_speech" else f"word_{name}", seconds)
+            self.metrics.inc(f"words_{trace.outcome}")
+
+    def close(self):
+        """Finish words that were released but never handed to a voice."""
+        with self._lock:
+            waiting = list(self._order)
+            self._pending.clear()
+            self._order.clear()
+        for trace in waiting:
+            trace.finish("unspoken")
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def summary(self):
+        """Percentiles per span over the kept traces, and the span that costs the most."""
+        with self._lock:
+            traces = list(self.traces)
+        outcomes = {}
+        for trace in traces:
+            outcomes[trace.outcome] = outcomes.get(trace.outcome, 0) + 1
+        summary = {"words": len(traces), "outcomes": outcomes, "spans": {}}
+        values = {}
+        for trace in traces:
+            for name, seconds in trace.spans().items():
+                values.setdefault(name, []).append(seconds * 1e3)
+        for name in SPANS + ("glass_to_speech",):
+            if name in values:
+                ms = np.array(values[name])
+                summary["spans"][name] = {
+                    "n": len(ms),
+                    "mean_ms": round(float(ms.mean()), 1),
+                    "p50_ms": round(float(np.percentile(ms, 50)), 1),
+                    "p90_ms": round(float(np.percentile(ms, 90)), 1),
+                    "p99_ms": round(float(np.percentile(ms, 99)), 1),
+                    "max_ms": round(float(ms.max()), 1),
+                }
+        parts = {name: s["mean_ms"] for name, s in summary["spans"].items() if name in SPANS}
+        summary["dominant"] = max(parts, key=parts.get) if parts else None
+        return summary
+
+    def report(self):
+        """Human-readable summary()."""
+        summary = self.summary()
+        if not summary["words"]:
+            return "[Trace] No words traced"
+        lines = [f"[Trace] {summary['words']} words "
+                 + ", ".join(f"{k} {v}" for k, v in sorted(summary["outcomes"].items()))]
+        for name, s in summary["spans"].items():
+            lines.append(f"  {name:<16} p50 {s['p50_ms']:8.1f} ms   p90 {s['p90_ms']:8.1f} ms   "
+                         f"p99 {s['p99_ms']:8.1f} ms")
+        if summary["dominant"]:
+            lines.append(f"  dominated by {summary['dominant']}")
+        return "\n".join(lines)
@@ -0,0 +1,219 @@
+"""
+Waveform cache for the fixed speech vocabulary.
+
+The app only ever says the 13 gesture words and "Sentence completed", so each
+phrase is synthesized once with pyttsx3's save_to_file, kept in memory and on
+disk, and played straight from the waveform afterwards. Entries are keyed by
+voice, rate and volume, so changing any of them synthesizes a fresh set.
+
+Text made only of cached phrases ("Sentence completed: Hello Thank You") is
+spliced together from the cached waveforms; anything else goes to the engine.
+
+Measure time-to-first-audio for cached vs engine speech (lookup to player
+start vs say() to the engine's started-utterance callback) with:
+
+    python -m src.tts_cache
+"""
+import hashlib
+import io
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import wave
+
+if os.name == 'nt':
+    import winsound
+else:
+    winsound = None
+
+DEFAULT_CACHE_DIR = os.path.join("data", "tts_cache")
+SENTENCE_PREFIX = "Sentence completed"
+PHRASE_GAP_SECONDS = 0.06
+
+
+def vocabulary():
+    """Every phrase the app speaks on its own: the gesture labels plus the sentence prefix."""
+    from src.pretrained_detector import GESTURE_LABELS
+    return [label for label in GESTURE_LABELS if label] + [SENTENCE_PREFIX]
+
+
+def _normalize(text):
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def _player_command():
+    """
+    Command-line WAV player for platforms without winsound.
+
+    Returns:
+        (command, reads_stdin), or (None, False) when there is none. Players
+        that read the WAV from stdin don't need a temporary file.
+    """
+    for player, reads_stdin in ((["afplay"], False), (["paplay"], True), (["aplay", "-q"], True)):
+        if shutil.which(player[0]):
+            return player, reads_stdin
+    return None, False
+
+
+class SpeechCache:
+    def __init__(self, engine, cache_dir=DEFAULT_CACHE_DIR, phrases=None):
+        """
+        Args:
+            engine: Initialized pyttsx3 engine (used for synthesis only)
+            cache_dir: Directory for the WAV files
+            phrases: Phrases to cache (default: vocabulary())
+        """
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.phrases = list(phrases) if phrases is not None else vocabulary()
+        self.waveforms = {}     # normalized phrase -> WAV bytes
+        self._player, self._player_stdin = (None, False) if winsound else _player_command()
+        self.playable = bool(winsound or self._player)
+        # Longest phrases first, so "thank you" wins over a single "you"
+        self._tokens = sorted((tuple(_normalize(p)) for p in self.phrases), key=len, reverse=True)
+
+    def key(self):
+        """Voice, rate and volume the current waveforms were made with."""
+        props = [self.engine.getProperty(name) for name in ("voice", "rate", "volume")]
+        return hashlib.sha1("|".join(str(p) for p in props).encode("utf-8")).hexdigest()[:12]
+
+    def _path(self, phrase, key):
+        slug = "_".join(_normalize(phrase)) or "blank"
+        return os.path.join(self.cache_dir, key, f"{slug}.wav")
+
+    def warm(self):
+        """Load cached waveforms from disk and synthesize the missing ones (call on the speech thread)."""
+        key = self.key()
+        missing = []
+        self.waveforms = {}
+        for phrase in self.phrases:
+            path = self._path(phrase, key)
+            if os.path.exists(path):
+                self._load(phrase, path)
+            else:
+                missing.append((phrase, path))
+
+        if missing:
+            os.makedirs(os.path.join(self.cache_dir, key), exist_ok=True)
+            for phrase, path in missing:
+                self.engine.save_to_file(phrase, path)
+            self.engine.runAndWait()  # one engine run for the whole vocabulary
+            for phrase, path in missing:
+                if os.path.exists(path):
+                    self._load(phrase, path)
+        return len(missing)
+
+    def _load(self, phrase, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            with wave.open(io.BytesIO(data)) as w:
+                w.getparams()
+        except (wave.Error, EOFError):
+            return  # some drivers write AIFF; leave those to the engine
+        self.waveforms[" ".join(_normalize(phrase))] = data
+
+    def split(self, text):
+        """Cached phrases that make up text, or None if any part is not cached."""
+        words = _normalize(text)
+        parts, i = [], 0
+        while i < len(words):
+            for tokens in self._tokens:
+                if tuple(words[i:i + len(tokens)]) == tokens and " ".join(tokens) in self.waveforms:
+                    parts.append(" ".join(tokens))
+                    i += len(tokens)
+                    break
+            else:
+                return None
+        return parts or None
+
+    def waveform(self, text):
+        """WAV bytes for text spliced from cached phrases, or None."""
+        parts = self.split(text)
+        if not parts:
+            return None
+        if len(parts) == 1:
+            return self.waveforms[parts[0]]
+        return self._splice([self.waveforms[p] for p in parts])
+
+    def _splice(self, waveforms):
+        out = io.BytesIO()
+        writer = None
+        for data in waveforms:
+            with wave.open(io.BytesIO(data)) as r:
+                params = r.getparams()
+                frames = r.readframes(r.getnframes())
+            if writer is None:
+                writer = wave.open(out, "wb")
+                writer.setparams(params)
+                gap = b"\0" * int(PHRASE_GAP_SECONDS * params.framerate) * params.sampwidth * params.nchannels
+            elif (params.nchannels, params.sampwidth, params.framerate) != \
+                    (writer.getnchannels(), writer.getsampwidth(), writer.getframerate()):
+                return None
+            else:
+                writer.writeframes(gap)
+            writer.writeframes(frames)
+        writer.close()
+        return out.getvalue()
+
+    def play(self, data):
+        """
+        Play WAV bytes, blocking until done.
+
+        Returns:
+            time.perf_counter() when playback started: the PlaySound call on
+            Windows, otherwise the moment the player process was running with
+            its input ready (any temporary file is written before that)
+        """
+        if winsound:
+            onset = time.perf_counter()
+            winsound.PlaySound(data, winsound.SND_MEMORY)
+            return onset
+        if self._player_stdin:
+            process = subprocess.Popen(self._player, stdin=subprocess.PIPE)
+            onset = time.perf_counter()
+            process.communicate(data)
+            return onset
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+            f.write(data)
+        try:
+            process = subprocess.Popen(self._player + [f.name])
+            onset = time.perf_counter()
+            process.wait()
+        finally:
+            os.unlink(f.name)
+        return onset
+
+
+# For quick testing: time-to-first-audio for cached playback vs the engine
+if __name__ == "__main__":
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    engine.setProperty('rate', 160)
+    cache = SpeechCache(engine)
+    start = time.perf_counter()
+    synthesized = cache.warm()
+    print(f"✓ Cache ready: {len(cache.waveforms)} phrases ({synthesized} synthesized) "
+          f"in {time.perf_counter() - start:.2f}s")
+    if not cache.playable:
+        print("No audio player available; only synthesis was timed.")
+        raise SystemExit(0)
+
+    onset = {}
+    engine.connect('started-utterance', lambda name: onset.setdefault("engine", time.perf_counter()))
+    print(f"{'phrase':<22}{'engine ms':>12}{'cached ms':>12}")
+    for phrase in cache.phrases:
+        onset.clear()
+        start = time.perf_counter()
+        engine.say(phrase)
+        engine.runAndWait()
+        engine_ms = 1000.0 * (onset.get("engine", time.perf_counter()) - start)
+
+        # Timed like VoiceEngine._say: from lookup to the player starting
+        start = time.perf_counter()
+        cached_ms = 1000.0 * (cache.play(cache.waveform(phrase)) - start)
+        print(f"{phrase:<22}{engine_ms:>12.1f}{cached_ms:>12.3f}")
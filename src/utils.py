@@ -1,8 +1,11 @@
 import time
-from collections import Counter
+from collections import deque
+
+from src.stabilizer import Stabilizer
 
 class GestureManager:
-    def __init__(self, buffer_size=10, cooldown_seconds=0.8, silence_threshold=15):
+    def __init__(self, buffer_size=10, cooldown_seconds=0.8, silence_threshold=15, policy=None,
+                 tracer=None, max_sentence_words=30):
         """
         Manages gesture recognition with temporal smoothing.
         
@@ -10,41 +13,58 @@ class GestureManager:
             buffer_size: Number of frames to buffer for stabilization
             cooldown_seconds: Time between recognizing different words (default: 0.8s)
             silence_threshold: Frames without hand to finalize sentence (default: 15)
+            policy: Stabilization policy from src/stabilizer.py (default: majority vote)
+            tracer: Optional WordTracer (see src/tracing.py) following every
+                    released word through to speech
+            max_sentence_words: A sentence is completed at this length even
+                                without a pause, so signing without ever
+                                lowering the hand can't grow it forever
         """
-        self.buffer = []
+        self.stabilizer = Stabilizer(buffer_size, policy, min_fill=buffer_size // 2)
         self.buffer_size = buffer_size
         self.cooldown_seconds = cooldown_seconds
-        self.last_spoken_time = 0
+        self.last_spoken_time = float("-inf")
         self.last_word = None
         
         self.silence_counter = 0
         self.silence_threshold = silence_threshold
         
         self.sentence = []
+        self.max_sentence_words = max_sentence_words
+        self.tracer = tracer
+        if tracer is not None:
+            tracer.window = buffer_size
+
+    def update(self, word, captured=None):
+        """
+        Adds a word to the buffer and returns the stabilized prediction.
 
-    def update(self, word):
-        """Adds a word to the buffer and returns the stabilized prediction."""
+        Args:
+            captured: time.perf_counter() when the frame was captured, for tracing
+        """
         if word is None:
             self.silence_counter += 1
             if self.silence_counter > self.silence_threshold:
                 self.last_word = None # Reset last word so it can be repeated
-            return None
-        
-        self.silence_counter = 0
-        self.buffer.append(word)
-        if len(self.buffer) > self.buffer_size:
-            self.buffer.pop(0)
-            
-        # Get the most frequent word in the buffer
-        if len(self.buffer) < self.buffer_size // 2:
-            return None
-            
-        most_common = Counter(self.buffer).most_common(1)[0][0]
-        return most_common
+            stabilized = None
+        else:
+            self.silence_counter = 0
+            # Most frequent word in the buffer, once it is at least half full
+            stabilized = self.stabilizer.update(word)
+        if self.tracer is not None:
+            self.tracer.frame(word, stabilized, captured)
+        return stabilized
 
-    def get_final_word(self, stabilized_word):
-        """Handles cooldown and returns a word if it's ready to be 'spoken/written'."""
-        current_time = time.time()
+    def get_final_word(self, stabilized_word, timestamp=None):
+        """
+        Handles cooldown and returns a word if it's ready to be 'spoken/written'.
+
+        Args:
+            stabilized_word: Output of update()
+            timestamp: Time of the frame in seconds; defaults to time.time().
+                       Pass the video position when replaying recorded footage.
+        """
+        current_time = time.time() if timestamp is None else timestamp
         
         # If we have a stabilized word and enough time has passed
         if stabilized_word:
@@ -56,24 +76,35 @@ class GestureManager:
                 self.last_word = stabilized_word
                 self.last_spoken_time = current_time
                 self.sentence.append(stabilized_word)
+                if self.tracer is not None:
+                    self.tracer.release(stabilized_word)
                 return stabilized_word
         return None
 
     def should_finalize_sentence(self):
-        """Check if hands have been down long enough to complete a sentence."""
-        if self.silence_counter >= self.silence_threshold and len(self.sentence) > 0:
-            full_sentence = " ".join(self.sentence)
-            self.sentence = []
+        """Check if hands have been down long enough (or the sentence is full) to complete a sentence."""
+        if not self.sentence:
+            return None
+        if self.silence_counter >= self.silence_threshold:
             self.silence_counter = 0
-            return full_sentence
-        return None
+        elif len(self.sentence) < self.max_sentence_words:
+            return None
+        full_sentence = " ".join(self.sentence)
+        self.sentence = []
+        return full_sentence
 
 class FPS:
-    def __init__(self):
-        self.prev_time = 0
+    def __init__(self, window=30):
+        """
+        Frame rate averaged over the last `window` frames.
+
+        For per-stage latency percentiles see src/metrics.py.
+        """
+        self.frame_times = deque(maxlen=window)
         
     def get_fps(self):
-        curr_time = time.time()
-        fps = 1 / (curr_time - self.prev_time) if (curr_time - self.prev_time) > 0 else 0
-        self.prev_time = curr_time
-        return int(fps)
+        self.frame_times.append(time.perf_counter())
+        if len(self.frame_times) < 2:
+            return 0
+        span = self.frame_times[-1] - self.frame_times[0]
+        return int((len(self.frame_times) - 1) / span) if span > 0 else 0
@@ -1,19 +1,34 @@
-import pyttsx3
 import threading
-import queue
-import pythoncom
 import os
 import time
 
+from src.tts_cache import SpeechCache, DEFAULT_CACHE_DIR
+from src.speech_scheduler import SpeechScheduler, WORD, SENTENCE
+
 class VoiceEngine:
-    def __init__(self):
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, use_cache=True, metrics=None, max_word_age=1.5,
+                 tracer=None):
+        """
+        Args:
+            cache_dir: Where synthesized vocabulary waveforms are stored
+            use_cache: Play known words from cached waveforms instead of the engine
+            metrics: Optional Metrics registry for speech latency and queue metrics
+            max_word_age: Seconds after which an unspoken word is dropped
+            tracer: Optional WordTracer; words it released are traced until they are heard
+        """
         # Initialize the engine in the main thread
         # This is more stable on Windows for certain pyttsx3 drivers
-        self.speech_queue = queue.Queue()
+        self.speech_queue = SpeechScheduler(max_word_age=max_word_age, metrics=metrics)
         self.running = True
+        self.metrics = metrics
+        self.tracer = tracer
+        self.cache = None
+        self._onset = None
         
         try:
             print("✓ Initializing TTS engine...")
+            # Imported here so importing this module stays cheap
+            import pyttsx3
             self.engine = pyttsx3.init()
             self.engine.setProperty('rate', 160)
             self.engine.setProperty('volume', 1.0)
@@ -22,6 +37,9 @@ class VoiceEngine:
             if len(voices) > 1:
                 self.engine.setProperty('voice', voices[1].id)
             print(f"✓ TTS Engine ready with {len(voices)} voices found.")
+            self.engine.connect('started-utterance', self._on_utterance_start)
+            if use_cache:
+                self.cache = SpeechCache(self.engine, cache_dir)
         except Exception as e:
             print(f"FAILED to init TTS: {e}")
             self.engine = None
@@ -37,22 +55,35 @@ class VoiceEngine:
             return
 
         try:
-            # Initialize COM for the background thread (Critical for Windows SAPI5)
+            # Initialize COM for the background thread (Critical for Windows SAPI5;
+            # pythoncom only exists there)
             if os.name == 'nt':
+                import pythoncom
                 pythoncom.CoInitialize()
-            
-            # Process queue
+
+            # Synthesize the vocabulary on this thread, where the engine's COM objects live
+            self._warm_cache()
+
+            # Process queue; get() sleeps until there is something to say
             while self.running:
+                items = self.speech_queue.get_items()
+                if not items:
+                    break
+                text = " ".join(item.text for item in items)
+                traces = [item.trace for item in items if item.trace is not None]
                 try:
-                    text = self.speech_queue.get(timeout=0.1)
-                    if text:
-                        print(f"[Voice] Speaking now: '{text}'")
-                        self.engine.say(text)
-                        self.engine.runAndWait()
-                        print(f"[Voice] Finished speaking: '{text}'")
-                    self.speech_queue.task_done()
-                except queue.Empty:
-                    continue
+                    print(f"[Voice] Speaking now: '{text}'")
+                    start = time.perf_counter()
+                    for trace in traces:
+                        trace.mark("dequeued", start)
+                    # When playback actually started, for either path (see _say)
+                    onset = self._say(text)
+                    for trace in traces:
+                        if onset is not None:
+                            trace.mark("speech_start", onset)
+                        trace.finish("spoken")
+                    self._observe("speech_duration", time.perf_counter() - start)
+                    print(f"[Voice] Finished speaking: '{text}'")
                 except Exception as e:
                     print(f"TTS Loop Error: {e}")
             
@@ -64,15 +95,70 @@ class VoiceEngine:
             import traceback
             traceback.print_exc()
 
-    def speak(self, text):
-        """Public method to speak text without blocking."""
+    def _warm_cache(self):
+        if not self.cache:
+            return
+        if not self.cache.playable:
+            print("[Voice] No audio player for cached speech; using the TTS engine only.")
+            self.cache = None
+            return
+        try:
+            start = time.perf_counter()
+            synthesized = self.cache.warm()
+            print(f"✓ Speech cache ready: {len(self.cache.waveforms)} phrases "
+                  f"({synthesized} synthesized) in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"[Voice] Speech cache unavailable: {e}")
+            self.cache = None
+
+    def _on_utterance_start(self, name):
+        if self._onset is None:
+            self._onset = time.perf_counter()
+
+    def _say(self, text):
+        """
+        Speak text, from cached waveforms when possible; records time-to-first-audio.
+
+        Returns:
+            time.perf_counter() when audio started, or None if the engine never said
+        """
+        start = time.perf_counter()
+        data = self.cache.waveform(text) if self.cache else None
+        if data:
+            # Stamped by the player once playback starts, not at the lookup
+            onset = self.cache.play(data)
+            self._observe("speech_onset_cached", onset - start)
+            return onset
+        self._onset = None
+        self.engine.say(text)
+        self.engine.runAndWait()
+        if self._onset is not None:
+            self._observe("speech_onset_engine", self._onset - start)
+        return self._onset
+
+    def _observe(self, stage, seconds):
+        if self.metrics:
+            self.metrics.observe(stage, seconds)
+
+    def speak(self, text, kind=WORD):
+        """
+        Public method to speak text without blocking.
+
+        Args:
+            kind: WORD, or SENTENCE for sentence completions (spoken first,
+                  and replacing words that have not been said yet)
+        """
         if text:
-            # print(f"DEBUG: Adding to queue: {text}")
-            self.speech_queue.put(text)
-    
+            trace = self.tracer.claim(text) if self.tracer and kind == WORD else None
+            self.speech_queue.put(text, kind, trace)
+
+    def speak_sentence(self, text):
+        self.speak(text, SENTENCE)
+
     def stop(self):
         """Stop the speech engine."""
         self.running = False
+        self.speech_queue.close()
         if hasattr(self, 'speech_thread') and self.speech_thread.is_alive():
             # Don't wait too long for join to avoid hanging on exit
             self.speech_thread.join(timeout=0.5)
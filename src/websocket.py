@@ -0,0 +1,182 @@
+"""
+Minimal RFC 6455 WebSocket support on asyncio streams.
+
+Just enough for the landmark service and its load test (text/binary
+messages, fragmentation, ping/pong, close) without adding a dependency.
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+
+_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+MAX_MESSAGE_BYTES = 1 << 20
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+def accept_key(key):
+    return base64.b64encode(hashlib.sha1(key.encode("ascii") + _GUID).digest()).decode("ascii")
+
+
+def _mask(payload, key):
+    # XOR as one big integer instead of byte by byte
+    n = len(payload)
+    if not n:
+        return payload
+    repeated = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(n, "big")
+
+
+def encode_frame(opcode, payload, mask=False):
+    header = bytearray([0x80 | opcode])
+    n = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if n < 126:
+        header.append(mask_bit | n)
+    elif n < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack(">H", n)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack(">Q", n)
+    if mask:
+        key = os.urandom(4)
+        return bytes(header) + key + _mask(payload, key)
+    return bytes(header) + payload
+
+
+class WebSocket:
+    """A WebSocket connection over an asyncio (reader, writer) pair."""
+
+    def __init__(self, reader, writer, client=False):
+        self.reader = reader
+        self.writer = writer
+        self.client = client  # clients must mask what they send
+        self.closed = False
+
+    async def _read_frame(self):
+        head = await self.reader.readexactly(2)
+        fin = head[0] & 0x80
+        opcode = head[0] & 0x0F
+        masked = head[1] & 0x80
+        n = head[1] & 0x7F
+        if n == 126:
+            (n,) = struct.unpack(">H", await self.reader.readexactly(2))
+        elif n == 127:
+            (n,) = struct.unpack(">Q", await self.reader.readexactly(8))
+        if n > MAX_MESSAGE_BYTES:
+            raise ConnectionClosed("message too large")
+        key = await self.reader.readexactly(4) if masked else None
+        payload = await self.reader.readexactly(n)
+        if key:
+            payload = _mask(payload, key)
+        return fin, opcode, payload
+
+    async def recv(self):
+        """Next text (str) or binary (bytes) message; raises ConnectionClosed."""
+        parts, message_opcode = [], None
+        while True:
+            try:
+                fin, opcode, payload = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                self.closed = True
+                raise ConnectionClosed(str(e))
+            if opcode == OP_PING:
+                await self._send(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    await self.close(payload[:2] or b"\x03\xe8")
+                raise ConnectionClosed("closed by peer")
+            if opcode != OP_CONTINUATION:
+                message_opcode = opcode
+            parts.append(payload)
+            if fin:
+                data = b"".join(parts)
+                return data.decode("utf-8") if message_opcode == OP_TEXT else data
+
+    async def _send(self, opcode, payload):
+        self.writer.write(encode_frame(opcode, payload, mask=self.client))
+        await self.writer.drain()
+
+    async def send(self, message):
+        if self.closed:
+            raise ConnectionClosed("connection closed")
+        if isinstance(message, str):
+            await self._send(OP_TEXT, message.encode("utf-8"))
+        else:
+            await self._send(OP_BINARY, bytes(message))
+
+    async def close(self, code=b"\x03\xe8"):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._send(OP_CLOSE, code)
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+async def read_http_request(reader):
+    """Parse an HTTP/1.1 request head; returns (method, path, headers) or None on EOF."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, path, headers
+
+
+async def server_handshake(writer, headers):
+    """Complete the upgrade for a request whose headers ask for a WebSocket."""
+    response = ("HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept_key(headers['sec-websocket-key'])}\r\n\r\n")
+    writer.write(response.encode("ascii"))
+    await writer.drain()
+
+
+def is_upgrade(headers):
+    return (headers.get("upgrade", "").lower() == "websocket"
+            and "sec-websocket-key" in headers)
+
+
+async def connect(host, port, path="/"):
+    """Open a client WebSocket connection."""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    request = (f"GET {path} HTTP/1.1\r\n"
+               f"Host: {host}:{port}\r\n"
+               "Upgrade: websocket\r\n"
+               "Connection: Upgrade\r\n"
+               f"Sec-WebSocket-Key: {key}\r\n"
+               "Sec-WebSocket-Version: 13\r\n\r\n")
+    writer.write(request.encode("ascii"))
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    if b" 101 " not in head.split(b"\r\n", 1)[0] or accept_key(key).encode() not in head:
+        writer.close()
+        raise ConnectionClosed("handshake failed")
+    return WebSocket(reader, writer, client=True)
@@ -0,0 +1,78 @@
+"""
+Train the landmark classifier from labelled examples.
+
+Examples come from CSV files (label, x0, y0, z0, ... z20 per row, like
+data/gestures.csv) and/or landmark recordings made with --record, whose
+per-frame labels are used as-is. Frames of a hand that is not signing
+(empty label) teach the classifier when to say nothing:
+
+    python train_classifier.py data/gestures.csv --out data/classifier.npz
+    python train_classifier.py session1.lmrec session2.lmrec --k 7
+
+Then run the app with it:
+
+    python main_pretrained.py --classifier data/classifier.npz
+"""
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+from src.classifier import LandmarkClassifier, load_csv, load_recordings
+
+
+def load_examples(paths):
+    landmarks, labels = [], []
+    for path in paths:
+        if path.lower().endswith(".csv"):
+            lms, labs = load_csv(path)
+        else:
+            lms, labs = load_recordings([path])
+        print(f"✓ {path}: {len(labs)} examples")
+        landmarks.append(lms)
+        labels.extend(labs)
+    if not labels:
+        return np.zeros((0, 21, 3), dtype=np.float32), np.array([], dtype=object)
+    return np.concatenate(landmarks), np.array(labels, dtype=object)
+
+
+def train(paths, out, k=5, min_confidence=0.6, holdout=0.2, seed=0):
+    landmarks, labels = load_examples(paths)
+    if not len(labels):
+        raise SystemExit("No labelled examples found")
+    counts = Counter(label or "(no sign)" for label in labels.tolist())
+    print(f"✓ {len(labels)} examples: "
+          + ", ".join(f"{label} ({n})" for label, n in sorted(counts.items())))
+
+    if holdout > 0:
+        order = np.random.default_rng(seed).permutation(len(labels))
+        n_test = int(len(labels) * holdout)
+        test, fit = order[:n_test], order[n_test:]
+        clf = LandmarkClassifier(k=k, min_confidence=min_confidence).fit(landmarks[fit], labels[fit])
+        predicted = clf.predict(landmarks[test])
+        accuracy = float(np.mean(predicted == labels[test])) if n_test else float("nan")
+        print(f"✓ Held-out accuracy: {accuracy:.3f} ({n_test} examples)")
+
+    clf = LandmarkClassifier(k=k, min_confidence=min_confidence).fit(landmarks, labels)
+    start = time.perf_counter()
+    for frame in landmarks[:200]:
+        clf.recognize_gesture(frame)
+    per_frame = (time.perf_counter() - start) / min(len(landmarks), 200)
+    print(f"✓ {clf.components.shape[0]} feature dimensions, {per_frame * 1e6:.0f} us per frame")
+    clf.save(out)
+    print(f"✓ Saved classifier to {out}")
+    return clf
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the SignToWords landmark classifier")
+    parser.add_argument("sources", nargs="+", help="CSV files and/or landmark recordings")
+    parser.add_argument("--out", default="data/classifier.npz", help="where to save the classifier")
+    parser.add_argument("--k", type=int, default=5, help="neighbours voting on each frame")
+    parser.add_argument("--min-confidence", type=float, default=0.6,
+                        help="fraction of the votes a sign needs to be recognized")
+    parser.add_argument("--holdout", type=float, default=0.2,
+                        help="fraction of the examples held out to report accuracy (0 to skip)")
+    args = parser.parse_args()
+    train(args.sources, args.out, args.k, args.min_confidence, args.holdout)
@@ -0,0 +1,214 @@
+"""
+Offline transcription of recorded signing sessions.
+
+Splits each video into frame chunks, runs MediaPipe hand tracking and gesture
+recognition on the chunks in a process pool (one Hands instance per worker),
+then stitches the per-frame predictions back together in order and runs the
+GestureManager over them to produce timestamped words and sentences.
+
+Every chunk starts from a reset tracker plus WARMUP_FRAMES frames before
+it, so its landmarks do not depend on which chunk (or video) the worker ran
+before. Near chunk borders they can still differ slightly from tracking the
+whole video in one pass.
+
+Usage:
+    python transcribe.py session1.mp4 session2.mp4 --workers 8 --output transcripts
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+import cv2
+import numpy as np
+
+from src.utils import GestureManager
+
+# Frames decoded before each chunk so MediaPipe's tracker is warmed up at the border
+WARMUP_FRAMES = 5
+MIN_CHUNK_FRAMES = 20
+DEFAULT_FPS = 30.0
+
+_detector = None
+
+
+def _init_worker():
+    """Create one detector (and one MediaPipe Hands graph) per worker process."""
+    global _detector
+    from src.pretrained_detector import PretrainedSignDetector
+    _detector = PretrainedSignDetector()
+
+
+def _process_chunk(task):
+    """
+    Run hand tracking + gesture recognition on frames [start, end) of a video.
+
+    Returns:
+        (video_index, start, codes) where codes[i] is the gesture code of frame
+        start + i (see GESTURE_LABELS), or -1 when no hand was found.
+    """
+    video_index, path, start, end = task
+    from src.pretrained_detector import PretrainedSignDetector
+
+    # Tracking state from the worker's previous chunk belongs to other frames
+    _detector.hands.reset()
+    cap = cv2.VideoCapture(path)
+    first = max(0, start - WARMUP_FRAMES)
+    if first:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+
+    landmarks = np.zeros((end - start, 21, 3), dtype=np.float32)
+    has_hand = np.zeros(end - start, dtype=bool)
+
+    for frame_index in range(first, end):
+        success, img = cap.read()
+        if not success:
+            break
+        # Same orientation as the live app, which mirrors the webcam image
+        img = cv2.flip(img, 1)
+        _detector.find_hands(img, draw=False)
+        if frame_index < start:
+            continue
+        # Decoded straight into the chunk's array
+        if _detector.get_landmarks(out=landmarks[frame_index - start]) is not None:
+            has_hand[frame_index - start] = True
+    cap.release()
+
+    codes = PretrainedSignDetector.recognize_gesture_codes(landmarks).astype(np.int8)
+    codes[~has_hand] = -1
+    return video_index, start, codes
+
+
+def probe_video(path):
+    """Return (frame_count, fps) of a video file."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video: {path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    cap.release()
+    return frame_count, fps
+
+
+def plan_chunks(videos, chunk_frames):
+    """Split every video into [start, end) frame ranges."""
+    tasks = []
+    for video_index, (path, frame_count, _) in enumerate(videos):
+        for start in range(0, frame_count, chunk_frames):
+            tasks.append((video_index, path, start, min(start + chunk_frames, frame_count)))
+    return tasks
+
+
+def stitch(codes, fps, manager=None):
+    """
+    Run temporal stabilization, cooldown and sentence detection over the
+    stitched per-frame gesture codes of one video.
+
+    Stabilization state (buffer, cooldown, silence counter) spans chunk
+    borders, so it is replayed here in frame order rather than per chunk;
+    given the same per-frame codes this matches running the GestureManager
+    live over the video.
+
+    Returns:
+        (words, sentences) as lists of dicts with frame indices and timestamps
+    """
+    from src.pretrained_detector import GESTURE_LABELS
+
+    manager = manager or GestureManager()
+    words, sentences = [], []
+    sentence_start = None
+
+    for frame_index, code in enumerate(codes):
+        timestamp = frame_index / fps
+        prediction = GESTURE_LABELS[code] if code > 0 else None
+
+        stabilized = manager.update(prediction)
+        final_word = manager.get_final_word(stabilized, timestamp=timestamp)
+        if final_word:
+            words.append({"word": final_word, "frame": frame_index, "time": round(timestamp, 3)})
+            if sentence_start is None:
+                sentence_start = timestamp
+
+        sentence = manager.should_finalize_sentence()
+        if sentence:
+            sentences.append({"text": sentence, "start": round(sentence_start, 3),
+                              "end": round(timestamp, 3)})
+            sentence_start = None
+
+    # Flush a sentence that was still open when the video ended
+    if manager.sentence:
+        sentences.append({"text": " ".join(manager.sentence), "start": round(sentence_start, 3),
+                          "end": round((len(codes) - 1) / fps, 3)})
+        manager.sentence = []
+    return words, sentences
+
+
+def format_time(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes):02d}:{seconds:06.3f}"
+
+
+def write_transcript(path, output_dir, fps, frame_count, words, sentences):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    json_path = os.path.join(output_dir, f"{stem}.transcript.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"video": path, "fps": fps, "frames": frame_count,
+                   "words": words, "sentences": sentences}, f, indent=2)
+
+    txt_path = os.path.join(output_dir, f"{stem}.transcript.txt")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        for s in sentences:
+            f.write(f"[{format_time(s['start'])} - {format_time(s['end'])}] {s['text']}\n")
+    return json_path, txt_path
+
+
+def transcribe(paths, workers=None, chunk_seconds=10.0, output_dir="transcripts"):
+    workers = workers or os.cpu_count() or 1
+
+    videos = []
+    for path in paths:
+        frame_count, fps = probe_video(path)
+        videos.append((path, frame_count, fps))
+        print(f"✓ {path}: {frame_count} frames @ {fps:.1f} fps")
+
+    # Keep at least a few chunks per worker so short inputs still spread over the pool
+    total_frames = sum(v[1] for v in videos)
+    chunk_frames = int(chunk_seconds * min(v[2] for v in videos))
+    chunk_frames = max(MIN_CHUNK_FRAMES, min(chunk_frames, -(-total_frames // (workers * 4))))
+    tasks = plan_chunks(videos, chunk_frames)
+    print(f"✓ {len(tasks)} chunks of up to {chunk_frames} frames on {workers} workers")
+
+    codes = [np.full(v[1], -1, dtype=np.int8) for v in videos]
+    start_time = time.perf_counter()
+
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_worker) as pool:
+        done = 0
+        for video_index, start, chunk_codes in pool.imap_unordered(_process_chunk, tasks):
+            codes[video_index][start:start + len(chunk_codes)] = chunk_codes
+            done += 1
+            print(f"\r  Processed {done}/{len(tasks)} chunks", end="", flush=True)
+    print()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"✓ Inference done in {elapsed:.1f}s ({total_frames / elapsed:.0f} frames/s)")
+
+    for (path, frame_count, fps), video_codes in zip(videos, codes):
+        words, sentences = stitch(video_codes, fps)
+        json_path, _ = write_transcript(path, output_dir, fps, frame_count, words, sentences)
+        print(f"✓ {len(words)} words, {len(sentences)} sentences -> {json_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcribe recorded signing videos")
+    parser.add_argument("videos", nargs="+", help="video files to transcribe")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: number of CPU cores)")
+    parser.add_argument("--chunk-seconds", type=float, default=10.0,
+                        help="length of the video chunks handed to each worker")
+    parser.add_argument("--output", default="transcripts", help="output directory")
+    args = parser.parse_args()
+    transcribe(args.videos, args.workers, args.chunk_seconds, args.output)